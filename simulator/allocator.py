@@ -0,0 +1,91 @@
+import numpy as np
+
+
+class Allocator:
+    """
+    This class is the object representation of the allocation engine.
+    It takes the whole set of positions a model portfolio opens on a
+    day and sizes them in one NumPy pass, so the result does not depend
+    on the order the positions were handed in.
+
+    Rules (same as the single position opening):
+    - expected investment is weight * cash_balance at the start of the batch
+    - investment is capped at max_percentage * (cash_balance + allocated_balance)
+    - a position is only opened if the cap allows the minimum lot,
+      math.ceil(minimum_investment / price) shares
+    """
+    def __init__(self):
+        self.minimum_investment = 200
+
+    # --------------------------------------------
+    #               SET METHODS
+    # --------------------------------------------
+    def set_minimum_investment(self, minimum_investment):
+        self.minimum_investment = minimum_investment
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_minimum_investment(self):
+        return self.minimum_investment
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def equal_weights(self, number_of_securities):
+        """
+        Equal weight of 1/n. Amounts are floored to whole dollars so
+        the batch never spends more than the cash balance.
+        """
+        if number_of_securities == 0:
+            return np.zeros(0)
+        return np.full(number_of_securities, 1/number_of_securities)
+
+    def allocate(self, prices, cash_balance, allocated_balance, max_percentage, weights=None):
+        """
+        This method sizes a batch of positions.
+
+        Every argument can also be 2-D (one row per variant, see
+        lockstep.py), cash_balance and allocated_balance are then
+        columns of shape (variants, 1).
+
+        Arguments:
+        ----------
+            prices - array of open prices
+            cash_balance - cash of the model portfolio before the batch
+            allocated_balance - allocated balance of the model portfolio
+            max_percentage - maximum percentage of the portfolio in one security
+            weights - array of weights (equal weights if None). Weights
+                      adding up to more than 1 are scaled down.
+
+        Return
+        ------
+        (opened, amounts, shares)
+            opened - bool array, False where the minimum lot is not allowed
+            amounts - cash moved to each position (0 where not opened)
+            shares - number of shares of each position (0 where not opened)
+        """
+        _prices = np.asarray(prices, dtype=float)
+        if weights is None:
+            _weights = self.equal_weights(_prices.shape[0])
+        else:
+            _weights = np.asarray(weights, dtype=float)
+            # Per row when sizing several variants at once
+            _total_weight = _weights.sum(axis=-1, keepdims=True)
+            _weights = _weights / np.maximum(_total_weight, 1)
+
+        # Worthless securities (e.g. expired options) are never opened
+        _priced = _prices > 0
+        _safe_prices = np.where(_priced, _prices, 1.0)
+
+        _min_acceptable_shares = np.ceil(self.minimum_investment / _safe_prices)
+        _max_acceptable_investment = max_percentage * (cash_balance + allocated_balance)
+        _expected_investment = _weights * cash_balance
+        _max_share_possible = np.floor(_max_acceptable_investment / _safe_prices)
+
+        _opened = _priced & (_min_acceptable_shares <= _max_share_possible)
+        _amounts = np.floor(np.minimum(_expected_investment, _max_acceptable_investment))
+        _amounts = np.where(_opened, _amounts, 0)
+        _shares = np.floor(_amounts / _safe_prices)
+
+        return _opened, _amounts, _shares
@@ -0,0 +1,248 @@
+import warnings
+import numpy as np
+from data_source import to_date
+
+
+class CommissionSchedule:
+    """
+    This class is the object representation of the commission schedule
+    of a broker. Commissions of a whole batch of orders are computed in
+    one NumPy pass.
+
+    commission = per_share * shares + per_order, clipped to
+    [minimum, maximum_percentage * trade value]
+
+    Tiered schedules replace per_share with the rate of the tier the
+    month-to-date volume (shares) of the account is in before the order.
+    """
+    def __init__(self, per_share=0, per_order=0, minimum=0, maximum_percentage=None, tiers=None):
+        """
+        Arguments:
+        ----------
+            per_share - float, dollars per share
+            per_order - float, dollars per order
+            minimum - float, minimum dollars per order
+            maximum_percentage - float, maximum share of the trade value
+            tiers - ((monthly_volume_up_to, per_share), ...) sorted by volume
+        """
+        self.per_share = per_share
+        self.per_order = per_order
+        self.minimum = minimum
+        self.maximum_percentage = maximum_percentage
+        self.tiers = tiers
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def get_rates(self, shares, month_volume):
+        """
+        Return
+        ------
+        per share rate of every order of the batch
+        """
+        if self.tiers is None:
+            return np.full(shares.shape[0], float(self.per_share))
+        _limits = np.array([i[0] for i in self.tiers], dtype=float)
+        _rates = np.array([i[1] for i in self.tiers], dtype=float)
+        # Volume of the month before each order of the batch
+        _volume_before = month_volume + np.cumsum(shares) - shares
+        _tier = np.minimum(np.searchsorted(_limits, _volume_before, side='right'), _limits.shape[0] - 1)
+        return _rates[_tier]
+
+    def compute(self, shares, trade_values, month_volume=0):
+        """
+        Arguments:
+        ----------
+            shares - array of shares (or contracts) of every order
+            trade_values - array of dollars traded by every order
+
+        Return
+        ------
+        array of commissions, 0 for orders of 0 shares
+        """
+        _shares = np.abs(np.asarray(shares, dtype=float))
+        _commissions = self.get_rates(_shares, month_volume) * _shares + self.per_order
+        _commissions = np.maximum(_commissions, self.minimum)
+        if self.maximum_percentage is not None:
+            _commissions = np.minimum(_commissions, self.maximum_percentage * np.abs(trade_values))
+        return np.where(_shares > 0, _commissions, 0)
+
+
+# IB Pro equity schedules (USD)
+COMMISSION_SCHEDULES = {
+    '': CommissionSchedule(),
+    'IB': CommissionSchedule(per_share=0.005, minimum=1.0, maximum_percentage=0.01),
+    'IB_TIERED': CommissionSchedule(
+        minimum=0.35,
+        maximum_percentage=0.01,
+        tiers=(
+            (300000, 0.0035),
+            (3000000, 0.002),
+            (20000000, 0.0015),
+            (100000000, 0.001),
+            (np.inf, 0.0005)
+        )
+    )
+}
+
+
+class CostEngine:
+    """
+    This class is the object representation of the trading costs of the
+    account: the commission schedule of the broker and the slippage of
+    the fills. The costs of a day's batch of fills are computed in a
+    few array operations against the trailing volume and spread of the
+    symbols, pulled with one data source call per batch.
+
+    Slippage, as a fraction of the price, paid against the position:
+
+        spread / 2 + impact * volatility * sqrt(shares / adv)
+
+    with adv the average daily volume and volatility the standard
+    deviation of the daily returns over the last window bars. The
+    spread is the mean of the 'spread' field (relative spread) when the
+    data has one, default_spread otherwise.
+
+    Slippage is off until set_slippage() is called, a broker alone only
+    charges its commissions.
+    """
+    def __init__(self, broker=''):
+        self.set_broker(broker)
+        self.slippage = False
+        self.default_spread = 0
+        self.impact = 0
+        self.window = 20
+        # Month-to-date shares of the account, for tiered schedules
+        self.month = None
+        self.month_volume = 0
+
+    # --------------------------------------------
+    #               SET METHODS
+    # --------------------------------------------
+    def set_broker(self, broker):
+        """
+        Brokers without a schedule in COMMISSION_SCHEDULES are accepted
+        and charge no commission (with a warning), as before the
+        schedules existed.
+        """
+        self.broker = broker
+        if broker not in COMMISSION_SCHEDULES:
+            warnings.warn(f"No commission schedule for broker {broker}, commissions are not charged")
+        self.schedule = COMMISSION_SCHEDULES.get(broker, COMMISSION_SCHEDULES[''])
+
+    def set_schedule(self, schedule):
+        # Custom CommissionSchedule instead of the one of the broker
+        self.schedule = schedule
+
+    def set_slippage(self, default_spread=0.0005, impact=0.1, window=20):
+        """
+        Arguments:
+        ----------
+            default_spread - float, relative spread used without spread data
+            impact - float, coefficient of the square root impact (0 disables it)
+            window - integer, trading days behind adv, volatility and spread
+        """
+        self.slippage = True
+        self.default_spread = default_spread
+        self.impact = impact
+        self.window = window
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_broker(self):
+        return self.broker
+
+    def get_month_volume(self):
+        return self.month_volume
+
+    def has_slippage(self):
+        return self.slippage
+
+    def get_market_data(self, data_source, tickers, date):
+        """
+        This method pulls the trailing bars of the batch in one call.
+
+        Return
+        ------
+        { 'adv' : array, 'volatility' : array, 'spread' : array }
+        NaN adv or volatility where there is not enough data
+        """
+        _bars = data_source.get_trailing_bars(list(tickers), date, self.window, ('close', 'volume', 'spread'))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _returns = np.diff(_bars['close'], axis=0) / _bars['close'][:-1]
+        # Sample standard deviation of the returns each symbol has
+        _counts = (~np.isnan(_returns)).sum(axis=0)
+        _variance = _nanmean((_returns - _nanmean(_returns)) ** 2) * _counts / np.maximum(_counts - 1, 1)
+        _market = dict()
+        _market['adv'] = _nanmean(_bars['volume'])
+        _market['volatility'] = np.where(_counts > 1, np.sqrt(_variance), np.nan)
+        _spread = _nanmean(_bars['spread'])
+        _market['spread'] = np.where(np.isnan(_spread), self.default_spread, _spread)
+        return _market
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def compute_fill_prices(self, market, prices, shares, sides):
+        """
+        Arguments:
+        ----------
+            market - dictionary returned by get_market_data()
+            prices - array of market prices
+            shares - array of shares (or contracts) traded
+            sides - array, 1 for buys and -1 for sells
+
+        Return
+        ------
+        array of fill prices
+        """
+        if not self.slippage:
+            return np.asarray(prices, dtype=float)
+        _slippage = market['spread'] / 2
+        if self.impact != 0:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                _participation = np.abs(shares) / market['adv']
+            _impact = self.impact * market['volatility'] * np.sqrt(_participation)
+            # No volume or volatility data, only the spread is paid
+            _slippage = _slippage + np.where(np.isfinite(_impact), _impact, 0)
+        return prices * (1 + sides * _slippage)
+
+    def get_fill_prices(self, data_source, tickers, date, prices, shares, sides):
+        """
+        Same as compute_fill_prices() but pulls the market data of the
+        batch first, only when slippage is on.
+        """
+        if not self.slippage:
+            return np.asarray(prices, dtype=float)
+        _market = self.get_market_data(data_source, tickers, date)
+        return self.compute_fill_prices(_market, prices, shares, sides)
+
+    def get_commissions(self, shares, trade_values, date):
+        """
+        This method computes the commissions of a batch of orders
+        without recording them, e.g. to size the orders.
+        """
+        _date = to_date(date)
+        _month = (_date.year, _date.month)
+        if _month != self.month:
+            self.month = _month
+            self.month_volume = 0
+        return self.schedule.compute(np.abs(np.asarray(shares, dtype=float)), trade_values, self.month_volume)
+
+    def compute_commissions(self, shares, trade_values, date):
+        """
+        This method computes the commissions of a batch of orders and
+        adds the batch to the month-to-date volume.
+        """
+        _commissions = self.get_commissions(shares, trade_values, date)
+        self.month_volume += np.abs(np.asarray(shares, dtype=float)).sum()
+        return _commissions
+
+
+def _nanmean(values):
+    # np.nanmean without the warning on all-NaN columns
+    _valid = ~np.isnan(values)
+    _counts = _valid.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(_counts > 0, np.where(_valid, values, 0).sum(axis=0) / _counts, np.nan)
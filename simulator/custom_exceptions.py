@@ -18,10 +18,55 @@ class BadModelName(Exception):
     def __init__(self):
         super().__init__("Duplicate model name. Please change one. If you don't have one use Test_Model.")
 
+class BadUniverseEvent(Exception):
+    def __init__(self, action):
+        self.action = action
+        self.message = f"Universe events must be 'add' or 'remove', got {action}."
+        super().__init__(self.message)
+    def __str__(self):
+        return self.message
+
+class BadRebalanceFrequency(Exception):
+    def __init__(self, frequency, frequencies):
+        self.frequency = frequency
+        self.message = f"Unknown rebalance frequency {frequency}, use one of {frequencies}."
+        super().__init__(self.message)
+    def __str__(self):
+        return self.message
+
+class UnknownChoice(Exception):
+    def __init__(self, kind, value, choices):
+        self.value = value
+        self.message = f"Unknown {kind} {value}, use one of {choices}."
+        super().__init__(self.message)
+    def __str__(self):
+        return self.message
+
+class BadOptionSymbol(Exception):
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.message = f"{symbol} is not an OCC option symbol (e.g. SPY220318C00450000)."
+        super().__init__(self.message)
+    def __str__(self):
+        return self.message
+
+class UnsupportedConfiguration(Exception):
+    def __init__(self, feature, reason):
+        self.feature = feature
+        self.message = f"{feature} is not supported: {reason}"
+        super().__init__(self.message)
+    def __str__(self):
+        return self.message
+
 
 CUSTOM_EXCEPTIONS = {
     'no_model': NoModelError,
     'set_universe': SetUniverseFailure,
     'closing_security_issue': ClosingSecurityNotFound,
-    'duplicate_model_name': BadModelName
+    'duplicate_model_name': BadModelName,
+    'bad_universe_event': BadUniverseEvent,
+    'bad_rebalance_frequency': BadRebalanceFrequency,
+    'unknown_choice': UnknownChoice,
+    'bad_option_symbol': BadOptionSymbol,
+    'unsupported_configuration': UnsupportedConfiguration
 }
\ No newline at end of file
@@ -0,0 +1,424 @@
+import datetime
+import queue
+import sqlite3
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from option_chain import OptionChain
+
+
+class DataSource:
+    """
+    This class is the interface every data backend has to follow.
+    The simulator, the portfolios and the models only talk to the
+    data through these methods, so swapping the database is a matter
+    of handing a different object to Simulator.set_data_source().
+
+    Functionalities:
+    - Pull price bars for one symbol
+    - Pull price bars for many symbols over a date range in one call
+    - Pull the open price of many symbols for a given date
+
+    All dates are 'YYYY-MM-DD' strings. start_date is inclusive and
+    end_date is exclusive. Returned frames have a 'date' column and
+    the price columns (open, high, low, close, volume) sorted by date.
+    """
+    # Number of calendar days we look back when a date has no data
+    # (e.g. a holiday that wasn't covered by the trading calendar)
+    open_price_look_back = 5
+
+    def get_price_time_bars(self, symbol, timespan, start_date, end_date):
+        raise NotImplementedError
+
+    def get_option_chains(self, underlyings, date):
+        """
+        This method pulls the option chains of the underlyings quoted
+        on the date (or the last quote before it).
+
+        Return
+        ------
+        { 'underlying' : OptionChain, ... } (underlyings without chain are omitted)
+        """
+        raise NotImplementedError
+
+    def get_futures_contracts(self, roots):
+        """
+        This method pulls the contract schedule of the futures roots.
+        The bars of each contract are pulled like any other symbol.
+
+        Return
+        ------
+        { 'root' : DataFrame with the columns symbol, expiry and
+          optionally multiplier, ... } (roots without contracts are omitted)
+        """
+        raise NotImplementedError
+
+    def has_option_chains(self):
+        # Backends without option chains keep the method of the interface
+        return type(self).get_option_chains is not DataSource.get_option_chains
+
+    def has_futures_contracts(self):
+        # Backends without futures contracts keep the method of the interface
+        return type(self).get_futures_contracts is not DataSource.get_futures_contracts
+
+    def get_batch_price_time_bars(self, symbols, timespan, start_date, end_date):
+        """
+        This method pulls the bars of many symbols at once. Backends
+        that can do it in a single query should override it, the
+        default falls back to one call per symbol.
+
+        Return
+        ------
+        { 'symbol' : DataFrame, ... } (symbols without data are omitted)
+        """
+        _data = dict()
+        for symbol in symbols:
+            _frame = self.get_price_time_bars(symbol, timespan, start_date, end_date)
+            if _frame.shape[0] != 0:
+                _data[symbol] = _frame
+        return _data
+
+    def get_open_prices(self, symbols, date):
+        """
+        This method returns the open price of every symbol for the date.
+        If there is no bar on the date, the last open found in the
+        look back window is passed forward.
+
+        Return
+        ------
+        { 'symbol' : open_price, ... } (symbols without data are omitted)
+        """
+        if len(symbols) == 0:
+            return dict()
+        _date = to_date(date)
+        _start_date = str(_date - datetime.timedelta(days=self.open_price_look_back))
+        _end_date = str(_date + datetime.timedelta(days=1))
+        _data = self.get_batch_price_time_bars(symbols, 'Daily', _start_date, _end_date)
+
+        _open_prices = dict()
+        for symbol in _data:
+            _open_prices[symbol] = _data[symbol]['open'].values[-1]
+        return _open_prices
+
+    def get_trailing_bars(self, symbols, date, window, fields):
+        """
+        This method returns the last window daily bars before the date
+        (the date itself is excluded) of every symbol as arrays aligned
+        on the dates. Fields the data does not have (e.g. 'spread') are NaN.
+
+        Return
+        ------
+        { 'field' : (window, len(symbols)) array, oldest bar first, NaN
+          where there is no bar }
+        """
+        _bars = {field: np.full((window, len(symbols)), np.nan) for field in fields}
+        if len(symbols) == 0 or window == 0:
+            return _bars
+        _date = to_date(date)
+        # Calendar days covering window trading days (holidays included),
+        # widened while the data goes further back than what was pulled
+        _span = int(window * 365 / 252) + 2 * self.open_price_look_back
+        _number_of_dates = -1
+        while True:
+            _start_date = str(_date - datetime.timedelta(days=_span))
+            _data = self.get_batch_price_time_bars(symbols, 'Daily', _start_date, str(_date))
+            # Rows are the last window dates any symbol has a bar on
+            _dates = set()
+            for symbol in _data:
+                _dates.update(str(i).split()[0] for i in _data[symbol]['date'])
+            if len(_dates) >= window or len(_dates) == _number_of_dates:
+                break
+            _number_of_dates = len(_dates)
+            _span *= 2
+        _date_index = pd.Index(sorted(_dates)[-window:])
+        _offset = window - _date_index.shape[0]
+        for j, symbol in enumerate(symbols):
+            if symbol not in _data:
+                continue
+            _rows = _date_index.get_indexer([str(i).split()[0] for i in _data[symbol]['date']])
+            _kept = _rows >= 0
+            for field in fields:
+                if field in _data[symbol].columns:
+                    _bars[field][_offset + _rows[_kept], j] = _data[symbol][field].values[_kept]
+        return _bars
+
+
+class InMemoryDataSource(DataSource):
+    """
+    Data source that serves bars from DataFrames held in memory.
+    Mostly used for tests and small experiments.
+    """
+    def __init__(self, data=None, timespan='Daily'):
+        # { 'timespan' : { 'symbol' : DataFrame } }
+        self.data = dict()
+        # { 'underlying' : DataFrame } of option quotes
+        self.option_chains = dict()
+        # { 'root' : DataFrame } of futures contracts
+        self.futures_contracts = dict()
+        if data is not None:
+            for symbol in data:
+                self.add_data(symbol, data[symbol], timespan)
+
+    def add_data(self, symbol, frame, timespan='Daily'):
+        """
+        Arguments:
+        ----------
+            symbol - string
+            frame - DataFrame with a 'date' column (or a DatetimeIndex)
+            timespan - string
+        """
+        frame = frame.copy()
+        if 'date' not in frame.columns:
+            frame = frame.rename_axis('date').reset_index()
+        frame['date'] = [str(i).split()[0] for i in frame['date']]
+        frame = frame.sort_values('date').reset_index(drop=True)
+        if timespan not in self.data:
+            self.data[timespan] = dict()
+        self.data[timespan][symbol] = frame
+
+    def add_option_chain(self, underlying, frame):
+        """
+        Arguments:
+        ----------
+            underlying - string
+            frame - DataFrame with the columns date, expiry, strike,
+                    right ('C' or 'P') and implied_volatility
+        """
+        frame = frame.copy()
+        frame['date'] = [str(i).split()[0] for i in frame['date']]
+        self.option_chains[underlying] = frame.sort_values('date').reset_index(drop=True)
+
+    def get_option_chains(self, underlyings, date):
+        _date = str(to_date(date))
+        _chains = dict()
+        for underlying in underlyings:
+            if underlying not in self.option_chains:
+                continue
+            _frame = self.option_chains[underlying]
+            _frame = _frame[_frame['date'] <= _date]
+            if _frame.shape[0] == 0:
+                continue
+            _frame = _frame[_frame['date'] == _frame['date'].values[-1]]
+            _chains[underlying] = OptionChain.from_frame(underlying, _frame)
+        return _chains
+
+    def add_futures_contracts(self, root, frame):
+        """
+        Arguments:
+        ----------
+            root - string
+            frame - DataFrame with the columns symbol, expiry and
+                    optionally multiplier
+        """
+        self.futures_contracts[root] = frame.copy()
+
+    def get_futures_contracts(self, roots):
+        return {root: self.futures_contracts[root] for root in roots if root in self.futures_contracts}
+
+    def get_price_time_bars(self, symbol, timespan, start_date, end_date):
+        _frame = self.data.get(timespan, dict()).get(symbol)
+        if _frame is None:
+            return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume'])
+        _mask = (_frame['date'] >= str(start_date)) & (_frame['date'] < str(end_date))
+        return _frame[_mask].reset_index(drop=True)
+
+
+class SQLiteDataSource(DataSource):
+    """
+    Data source backed by a SQLite database. Connections are kept in
+    a pool so repeated calls do not pay the connection cost and a batch
+    of symbols is pulled with a single query.
+
+    Expected table layout (name configurable):
+        symbol TEXT, timespan TEXT, date TEXT,
+        open REAL, high REAL, low REAL, close REAL, volume REAL
+    """
+    # SQLite limits the number of bound parameters in one statement
+    max_variables = 900
+
+    def __init__(self, path, table='price_bars', pool_size=4):
+        self.path = path
+        self.table = table
+        self.pool_size = pool_size
+        self.pool = queue.Queue(maxsize=pool_size)
+        self.connections_created = 0
+
+    @contextmanager
+    def connection(self):
+        """
+        Hands out a pooled connection and puts it back when done.
+        """
+        try:
+            _connection = self.pool.get_nowait()
+        except queue.Empty:
+            if self.connections_created < self.pool_size:
+                _connection = sqlite3.connect(self.path, check_same_thread=False)
+                self.connections_created += 1
+            else:
+                _connection = self.pool.get()
+        try:
+            yield _connection
+        finally:
+            self.pool.put(_connection)
+
+    def close(self):
+        while not self.pool.empty():
+            self.pool.get_nowait().close()
+        self.connections_created = 0
+
+    def get_price_time_bars(self, symbol, timespan, start_date, end_date):
+        _data = self.get_batch_price_time_bars([symbol], timespan, start_date, end_date)
+        if symbol in _data:
+            return _data[symbol]
+        return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume'])
+
+    def get_batch_price_time_bars(self, symbols, timespan, start_date, end_date):
+        _symbols = list(dict.fromkeys(symbols))
+        _frames = list()
+        with self.connection() as _connection:
+            for i in range(0, len(_symbols), self.max_variables):
+                _chunk = _symbols[i:i + self.max_variables]
+                _query = (
+                    f"SELECT symbol, date, open, high, low, close, volume FROM {self.table} "
+                    f"WHERE timespan = ? AND date >= ? AND date < ? "
+                    f"AND symbol IN ({','.join('?' * len(_chunk))}) "
+                    f"ORDER BY symbol, date"
+                )
+                _params = [timespan, str(start_date), str(end_date)] + _chunk
+                _frames.append(pd.read_sql_query(_query, _connection, params=_params))
+
+        _data = dict()
+        if len(_frames) == 0:
+            return _data
+        _all = pd.concat(_frames, ignore_index=True)
+        for symbol, _frame in _all.groupby('symbol', sort=False):
+            _data[symbol] = _frame.drop(columns='symbol').reset_index(drop=True)
+        return _data
+
+
+class PanelDataSource(DataSource):
+    """
+    Data source that serves daily bars straight from a PricePanel (see
+    shared_panel.py). Combined with PricePanel.attach() every worker
+    process reads the same shared memory instead of its own copy.
+
+    Option chains and futures contracts are not part of the panel,
+    they are pulled from source when one is given.
+    """
+    def __init__(self, panel, source=None):
+        self.panel = panel
+        self.source = source
+
+    def get_option_chains(self, underlyings, date):
+        if self.source is None:
+            raise NotImplementedError
+        return self.source.get_option_chains(underlyings, date)
+
+    def get_futures_contracts(self, roots):
+        if self.source is None:
+            raise NotImplementedError
+        return self.source.get_futures_contracts(roots)
+
+    def has_option_chains(self):
+        return self.source is not None and self.source.has_option_chains()
+
+    def has_futures_contracts(self):
+        return self.source is not None and self.source.has_futures_contracts()
+
+    def get_price_time_bars(self, symbol, timespan, start_date, end_date):
+        _data = self.get_batch_price_time_bars([symbol], timespan, start_date, end_date)
+        if symbol in _data:
+            return _data[symbol]
+        return pd.DataFrame(columns=['date'] + list(self.panel.fields))
+
+    def get_batch_price_time_bars(self, symbols, timespan, start_date, end_date):
+        _start = np.searchsorted(self.panel.dates, str(start_date).encode(), side='left')
+        _end = np.searchsorted(self.panel.dates, str(end_date).encode(), side='left')
+        _dates = [i.decode() for i in self.panel.dates[_start:_end]]
+
+        _data = dict()
+        for symbol in symbols:
+            if symbol not in self.panel.symbol_ids:
+                continue
+            _id = self.panel.symbol_ids[symbol]
+            _frame = pd.DataFrame({'date': _dates})
+            for f, field in enumerate(self.panel.fields):
+                _frame[field] = self.panel.values[f, _start:_end, _id]
+            _frame = _frame[_frame['open'].notna()].reset_index(drop=True)
+            if _frame.shape[0] != 0:
+                _data[symbol] = _frame
+        return _data
+
+    def get_open_prices(self, symbols, date):
+        """
+        Same as DataSource.get_open_prices but done with array lookups
+        on the panel instead of building frames.
+        """
+        _symbols = [i for i in symbols if i in self.panel.symbol_ids]
+        if len(_symbols) == 0:
+            return dict()
+        _date = to_date(date)
+        _start_date = str(_date - datetime.timedelta(days=self.open_price_look_back))
+        _start = np.searchsorted(self.panel.dates, _start_date.encode(), side='left')
+        _end = np.searchsorted(self.panel.dates, str(_date).encode(), side='right')
+        if _end <= _start:
+            # No bar of the panel in the look back window
+            return dict()
+
+        _ids = np.array([self.panel.symbol_ids[i] for i in _symbols])
+        _window = self.panel.get_field('open')[_start:_end, _ids]
+        _valid = ~np.isnan(_window)
+        # last row with data in the window for each symbol
+        _last = _window.shape[0] - 1 - np.argmax(_valid[::-1], axis=0)
+
+        _open_prices = dict()
+        for j in np.flatnonzero(_valid.any(axis=0)):
+            _open_prices[_symbols[j]] = _window[_last[j], j]
+        return _open_prices
+
+    def get_trailing_bars(self, symbols, date, window, fields):
+        """
+        Same as DataSource.get_trailing_bars but sliced straight out of
+        the panel.
+        """
+        _bars = {field: np.full((window, len(symbols)), np.nan) for field in fields}
+        _known = [j for j, symbol in enumerate(symbols) if symbol in self.panel.symbol_ids]
+        if len(_known) == 0 or window == 0:
+            return _bars
+        _end = np.searchsorted(self.panel.dates, str(to_date(date)).encode(), side='left')
+        _start = max(_end - window, 0)
+        _ids = np.array([self.panel.symbol_ids[symbols[j]] for j in _known])
+        for field in fields:
+            if field in self.panel.fields:
+                _bars[field][window - (_end - _start):, _known] = self.panel.get_field(field)[_start:_end][:, _ids]
+        return _bars
+
+
+class DatabaseExtractorSource(DataSource):
+    """
+    Adapter around the original database_extractor module. The
+    module is only imported when the adapter is created, so the rest
+    of the simulator can run without it.
+    """
+    def __init__(self, data_source='P:/Equities'):
+        from database_extractor import database_extractor
+        self.extractor = database_extractor
+        self.data_source = data_source
+
+    def get_price_time_bars(self, symbol, timespan, start_date, end_date):
+        return self.extractor.equities_get_historical_price_time_bars(
+            data_source=self.data_source,
+            symbol=symbol,
+            timespan=timespan,
+            start_date=str(start_date),
+            end_date=str(end_date)
+        )
+
+
+def to_date(date):
+    if isinstance(date, datetime.datetime):
+        return date.date()
+    if isinstance(date, datetime.date):
+        return date
+    _split_date = str(date).split()[0].split('-')
+    return datetime.date(int(_split_date[0]), int(_split_date[1]), int(_split_date[2]))
@@ -1,5 +1,5 @@
-from database_extractor import database_extractor
-import datetime
+from memory import make_history
+
 
 class Equity:
     """
@@ -24,6 +24,9 @@ class Equity:
         self.pnl = []
         self.commission = 0
         self.date = None
+        self.data_source = None
+        # None keeps the full pnl history, see set_history_limit()
+        self.history_limit = None
 
     # --------------------------------------------
     #                GET METHODS
@@ -47,44 +50,11 @@ class Equity:
         return self.number_of_shares
 
     def get_open_price(self):
-        _start_date = self.date
-        _split_date = _start_date.split('-')
-        _end_date = datetime.date(
-            int(_split_date[0]),
-            int(_split_date[1]),
-            int(_split_date[2])
-        )
-        _end_date = _end_date + datetime.timedelta(days=1)
-        _end_date = str(_end_date)
-        _data = database_extractor.equities_get_historical_price_time_bars(
-                data_source='P:/Equities',
-                symbol=self.ticker,
-                timespan='Daily',
-                start_date=_start_date,
-                end_date=_end_date
-        )
-
-        if _data.shape[0] == 0:
-            # This means we have no data for this day...possibly a holiday
-            # that wasn't covered by the trading calendar building process
-            # Remedy -> pass the last price found backwards in time
-            _split_start = _start_date.split('-')
-            _start_date = datetime.date(
-                year=int(_split_start[0]),
-                month=int(_split_start[1]),
-                day=int(_split_start[2])
-            )
-            _start_date = str(_start_date - datetime.timedelta(days=5))
-            _data = database_extractor.equities_get_historical_price_time_bars(
-                data_source='P:/Equities',
-                symbol=self.ticker,
-                timespan='Daily',
-                start_date=_start_date,
-                end_date=_end_date
-            )
-        _open = _data['open'].values[-1]
-
-        return _open
+        _open_prices = self.data_source.get_open_prices([self.ticker], self.date)
+        return _open_prices[self.ticker]
+
+    def get_data_source(self):
+        return self.data_source
 
     def get_current_price(self):
         return self.current_price
@@ -125,14 +95,22 @@ class Equity:
     def set_current_price(self, current_price):
         self.current_price = current_price
 
-    def set_commission(self, broker):
-        # TODO: pull commission from database
-        commission = 0
+    def set_commission(self, commission):
+        # Dollars charged by charge_commission(), see costs.py
         self.commission = commission
 
     def set_date(self, date):
         self.date = date
 
+    def set_data_source(self, data_source):
+        self.data_source = data_source
+
+    def set_history_limit(self, history_limit):
+        self.history_limit = history_limit
+        _pnl = make_history(history_limit)
+        _pnl.extend(self.pnl)
+        self.pnl = _pnl
+
     # --------------------------------------------
     #                UPDATE METHODS
     # --------------------------------------------
@@ -1,5 +1,7 @@
 from equity import Equity
-import math
+from allocator import Allocator
+from memory import make_history, make_dated_history
+import numpy as np
 
 class EquityPortfolio:
     def __init__(self):
@@ -8,12 +10,25 @@ class EquityPortfolio:
         self.cash_balance = 0
         self.allocated_balance = 0
         self.pnl = []
+        # pnl + cash_balance + allocated_balance of the model, per day
+        self.value_historical = []
         self.date = None
         self.securities = dict()   # { 'ticker' : object (e.g. Equity Obj, ... }
         self.openings_failed = 0
         self.position_distribution_historical = dict()
         self.security_universe = list()
         self.broker = ""
+        self.data_source = None
+        self.price_service = None
+        self.allocator = Allocator()
+        # Price of one unit is price * multiplier (1 share for equities)
+        self.multiplier = 1
+        # None keeps the full history, see set_history_limit()
+        self.history_limit = None
+        # Volatility and correlation limits on openings, see risk.py
+        self.risk_engine = None
+        # Commissions and slippage of the fills, see costs.py
+        self.cost_engine = None
 
     # --------------------------------------------
     #               SET METHODS
@@ -36,6 +51,40 @@ class EquityPortfolio:
     def set_broker(self, broker):
         self.broker = broker
 
+    def set_data_source(self, data_source):
+        self.data_source = data_source
+        for security in self.securities:
+            self.securities[security].set_data_source(data_source)
+
+    def set_price_service(self, price_service):
+        self.price_service = price_service
+
+    def set_risk_engine(self, risk_engine):
+        self.risk_engine = risk_engine
+
+    def set_cost_engine(self, cost_engine):
+        self.cost_engine = cost_engine
+
+    def set_history_limit(self, history_limit):
+        """
+        This method switches pnl and position_distribution_historical
+        (here and in the held securities) to ring buffers keeping only
+        the last history_limit entries. None keeps everything.
+        """
+        self.history_limit = history_limit
+        _pnl = make_history(history_limit)
+        _pnl.extend(self.pnl)
+        self.pnl = _pnl
+        _value = make_history(history_limit)
+        _value.extend(self.value_historical)
+        self.value_historical = _value
+        _distribution = make_dated_history(history_limit)
+        for date in self.position_distribution_historical:
+            _distribution[date] = self.position_distribution_historical[date]
+        self.position_distribution_historical = _distribution
+        for security in self.securities:
+            self.securities[security].set_history_limit(history_limit)
+
     # --------------------------------------------
     #               GET METHODS
     # --------------------------------------------
@@ -48,6 +97,9 @@ class EquityPortfolio:
     def get_pnl(self):
         return self.pnl
 
+    def get_value_historical(self):
+        return self.value_historical
+
     def get_date(self):
         return self.date
 
@@ -70,15 +122,82 @@ class EquityPortfolio:
     def get_all_tickers(self):
         return self.securities.keys()
 
+    def has_security(self, ticker):
+        return ticker in self.securities
+
     def get_allocation_percentage(self):
         return self.allocation_percentage
 
+    def get_total_value(self):
+        _securities_pnl = 0
+        for security in self.securities:
+            _pnl = self.securities[security].get_pnl()
+            if len(_pnl) != 0:
+                _securities_pnl += _pnl[-1]
+        return self.cash_balance + self.allocated_balance + _securities_pnl
+
+    def get_position_weights(self):
+        """
+        Return
+        ------
+        { 'ticker' : signed market value / total value of the portfolio }
+        """
+        _total_value = self.get_total_value()
+        _weights = dict()
+        if _total_value <= 0:
+            return _weights
+        _multipliers = self.get_multipliers(list(self.securities))
+        for i, security in enumerate(self.securities):
+            _security = self.securities[security]
+            _weights[security] = (
+                _security.get_position_type() * _security.get_number_of_shares()
+                * _security.get_current_price() * _multipliers[i] / _total_value
+            )
+        return _weights
+
     def get_security_universe(self):
         return self.security_universe
 
+    def get_price_symbols(self):
+        """
+        Symbols whose price is needed to mark the portfolio to market.
+        """
+        return list(self.securities)
+
+    def get_universe_symbol(self, ticker):
+        # Symbol checked against the model universe for a traded ticker
+        return ticker
+
+    def get_expired_tickers(self):
+        # Equities do not expire
+        return list()
+
+    def get_open_price_symbols(self, tickers):
+        """
+        Symbols the shared price service should prefetch before tickers
+        are opened.
+        """
+        return [self.get_universe_symbol(ticker) for ticker in tickers]
+
+    def get_multipliers(self, tickers):
+        # Price of one unit of each ticker is price * multiplier
+        return np.full(len(tickers), self.multiplier, dtype=float)
+
+    def get_open_prices(self, tickers):
+        """
+        This method returns today's open prices, through the shared
+        price service when the portfolio belongs to a ParentPortfolio.
+        """
+        if self.price_service is not None:
+            return self.price_service.get_open_prices(tickers)
+        return self.data_source.get_open_prices(tickers, self.date)
+
     # --------------------------------------------
     #               UPDATE METHODS
     # --------------------------------------------
+    def compile(self, trading_schedule):
+        # Equities need no setup against the trading schedule
+        pass
 
     def update_all_dates(self):
         if len(self.securities) != 0:
@@ -92,7 +211,8 @@ class EquityPortfolio:
 
         Computation
         -----------
-        sum_all_securities_pnl + self.cash_balance _ self.allocated_balance
+        pnl: sum_all_securities_pnl
+        value_historical: sum_all_securities_pnl + self.cash_balance + self.allocated_balance
         """
         _securities_pnl =  0
         for security in self.securities:
@@ -100,10 +220,20 @@ class EquityPortfolio:
             _historical_pnl = self.securities[security].get_pnl()
             _securities_pnl += _historical_pnl[-1]
         self.pnl.append(_securities_pnl)
+        self.value_historical.append(_securities_pnl + self.cash_balance + self.allocated_balance)
 
     def update_relevant(self):
+        """
+        This method updates the current price of every held security
+        with a single batch call instead of one call per security.
+        A security with no data (e.g. delisted) keeps its last known price.
+        """
+        if len(self.securities) == 0:
+            return
+        _open_prices = self.get_open_prices(list(self.securities))
         for security in self.securities:
-            self.securities[security].update_relevant()
+            if security in _open_prices:
+                self.securities[security].set_current_price(_open_prices[security])
 
     # --------------------------------------------
     #                OTHER METHODS
@@ -122,57 +252,148 @@ class EquityPortfolio:
         # return is used to update the parent portfolio
         return _pnl_from_position
 
-    def open_position(self, ticker, security_info):
-        # Create new Equity
-        new_position = Equity()
-
-        # Run all appropriate set methods
-        new_position.set_ticker(ticker)
-        new_position.set_allocation_percentage(security_info['allocation_percentage'])
-        new_position.set_position_type(security_info['position_type'])
-        new_position.set_commission(self.broker)
-        new_position.set_date(self.date)
-
-        # Updates the current price
-        new_position.update_relevant()
-
-        # Compute and store share count
-        new_position.open_price = new_position.current_price
-
-        # Now we check if we are trading the minimum accepted amount
-        _min_acceptable_shares = math.ceil(200/new_position.open_price)
-        _max_acceptable_investment = self.maximum_percentage_single_security * (self.cash_balance + self.allocated_balance)
-        _expected_investment = new_position.allocation_percentage * self.cash_balance
+    def close_positions(self, tickers):
+        """
+        This method closes a batch of positions and returns their
+        combined pnl, which is used to update the parent portfolio.
+        """
+        if self.cost_engine is not None:
+            self.set_closing_costs(tickers)
+        _pnl_from_positions = 0
+        for ticker in tickers:
+            _pnl_from_positions += self.close_position(ticker)
+        return _pnl_from_positions
+
+    def set_closing_costs(self, tickers):
+        """
+        This method sets the cost of closing every position of the batch
+        as its commission. The pnl of the day is already booked at the
+        market price, so the slippage of the exit, (market - fill) x
+        units, is charged together with the commission.
+        """
+        _tickers = list(tickers)
+        if len(_tickers) == 0:
+            return
+        _securities = [self.securities[ticker] for ticker in _tickers]
+        _prices = np.array([i.get_current_price() for i in _securities], dtype=float)
+        _shares = np.array([i.get_number_of_shares() for i in _securities], dtype=float)
+        _sides = -np.array([i.get_position_type() for i in _securities], dtype=float)
+        _multipliers = self.get_multipliers(_tickers)
+
+        _fill_prices = self.cost_engine.get_fill_prices(self.data_source, _tickers, self.date, _prices, _shares, _sides)
+        _commissions = self.cost_engine.compute_commissions(_shares, _fill_prices * _shares * _multipliers, self.date)
+        _slippage = np.abs(_fill_prices - _prices) * _shares * _multipliers
+        for i, security in enumerate(_securities):
+            security.set_commission(_commissions[i] + _slippage[i])
+
+    def create_security(self, ticker):
+        return Equity()
 
-        _max_share_possible = int(_max_acceptable_investment/new_position.open_price)
+    def open_position(self, ticker, security_info):
+        self.open_positions({ticker: security_info})
 
-        if _min_acceptable_shares <= _max_share_possible:
-            # Update these in proper order
-            if _max_acceptable_investment < _expected_investment:
-                _amount_to_allocate = int(_max_acceptable_investment)
+    def open_positions(self, positions):
+        """
+        This method opens a whole batch of positions at once. Prices are
+        pulled in one call, the batch is sized by the Allocator against
+        the balances before the batch and only then applied, so the
+        result does not depend on the order of the positions.
+
+        Arguments:
+        ----------
+            positions - { 'ticker' : {'position_type': 1 or -1}, ... }
+                        'allocation_percentage' can be given to use a custom
+                        weight instead of the equal weight 1/len(positions)
+
+        Weights are not renormalized over the positions that have an open
+        price: the share of the cash of a position without a price stays
+        in cash.
+        """
+        _open_prices = self.get_open_prices(list(positions))
+        _tickers = list()
+        for ticker in positions:
+            if ticker in _open_prices:
+                _tickers.append(ticker)
             else:
-                _amount_to_allocate = int(_expected_investment)
-            # Allocate base amount of cash and move from Equity Portfolio
-            # to equity object
-            self.cash_balance -= _amount_to_allocate
-            self.allocated_balance += _amount_to_allocate
-            new_position.cash_balance += _amount_to_allocate
-            # Compute number of shares to hold
-            new_position.compute_number_of_shares()
-
+                self.openings_failed += 1
+        if len(_tickers) == 0:
+            return
+
+        _prices = np.array([_open_prices[ticker] for ticker in _tickers], dtype=float)
+        _lot_prices = _prices * self.get_multipliers(_tickers)
+        _equal_weight = self.allocator.equal_weights(len(positions))[0]
+        _weights = np.array(
+            [positions[ticker].get('allocation_percentage', _equal_weight) for ticker in _tickers], dtype=float
+        )
+        _opened, _amounts, _shares = self.allocator.allocate(
+            _lot_prices,
+            self.cash_balance,
+            self.allocated_balance,
+            self.maximum_percentage_single_security,
+            _weights
+        )
+
+        # Positions breaking the risk limits are not opened
+        if self.risk_engine is not None:
+            _total_value = self.get_total_value()
+            _position_types = np.array([positions[ticker]['position_type'] for ticker in _tickers], dtype=float)
+            _weights_at_risk = _position_types * _shares * _lot_prices / max(_total_value, 1)
+            _opened &= self.risk_engine.check_openings(self.get_position_weights(), _tickers, _weights_at_risk)
+            _amounts = np.where(_opened, _amounts, 0)
+
+        # Fills pay the slippage, the shares are cut so the amounts cover
+        # the fill prices and the commissions
+        _fill_prices = _prices
+        _commissions = np.zeros(len(_tickers))
+        if self.cost_engine is not None:
+            _sides = np.array([positions[ticker]['position_type'] for ticker in _tickers], dtype=float)
+            _shares = np.where(_opened, _shares, 0)
+            _fill_prices = self.cost_engine.get_fill_prices(self.data_source, _tickers, self.date, _prices, _shares, _sides)
+            _lot_prices = _fill_prices * self.get_multipliers(_tickers)
+            _safe_lot_prices = np.where(_opened, _lot_prices, 1)
+            _shares = np.where(_opened, np.minimum(_shares, np.floor(_amounts / _safe_lot_prices)), 0)
+            # Commissions only grow with the shares, one cut is enough
+            _estimates = self.cost_engine.get_commissions(_shares, _shares * _lot_prices, self.date)
+            _shares = np.where(_opened, np.minimum(_shares, np.floor((_amounts - _estimates) / _safe_lot_prices)), 0)
+            _shares = np.maximum(_shares, 0)
+            _opened &= _shares > 0
+            _amounts = np.where(_opened, _amounts, 0)
+            _commissions = self.cost_engine.compute_commissions(_shares, _shares * _lot_prices, self.date)
+
+        # Allocate base amount of cash and move from Equity Portfolio
+        # to equity objects
+        _total_to_allocate = int(_amounts.sum())
+        self.cash_balance -= _total_to_allocate
+        self.allocated_balance += _total_to_allocate
+        self.openings_failed += int((~_opened).sum())
+
+        for i in np.flatnonzero(_opened):
+            ticker = _tickers[i]
+            # Create new Equity
+            new_position = self.create_security(ticker)
+
+            # Run all appropriate set methods
+            new_position.set_ticker(ticker)
+            new_position.set_allocation_percentage(_weights[i])
+            new_position.set_position_type(positions[ticker]['position_type'])
+            new_position.set_commission(_commissions[i])
+            new_position.set_date(self.date)
+            new_position.set_data_source(self.data_source)
+            new_position.set_history_limit(self.history_limit)
+            new_position.set_current_price(_prices[i])
+            new_position.set_open_price(_fill_prices[i])
 
             # Move money around the Equity Obj when entering position
-            _amount_to_allocate = new_position.number_of_shares * new_position.current_price
-            new_position.cash_balance -= _amount_to_allocate
-            new_position.allocated_balance += _amount_to_allocate
+            _invested = _shares[i] * _lot_prices[i]
+            new_position.set_number_of_shares(int(_shares[i]))
+            new_position.set_cash_balance(int(_amounts[i]) - _invested)
+            new_position.set_allocated_balance(_invested)
 
             # Charge commissions
             new_position.charge_commission()
 
-            # Store the new position in the dictionary of securitiesFlo
+            # Store the new position in the dictionary of securities
             self.securities[ticker] = new_position
-        else:
-            self.openings_failed += 1
 
     def compute_position_distribution(self):
         _temp_distribution = list()
@@ -186,7 +407,12 @@ class EquityPortfolio:
     def compare_security(self, security, security_info):
         """
         The method returns a tuple. First item is for closing, second is for opening
+
+        security_info is the signal of the model, 1, -1, 0 or 404, or a
+        dictionary {'position_type': 1 or -1, 'weight': float}
         """
+        if isinstance(security_info, dict):
+            security_info = security_info['position_type']
         if security in self.securities.keys():
             if security_info == self.securities[security].get_position_type() or security_info == 404:
                 # Case where you have a security and you are to continue holding it
@@ -198,8 +424,9 @@ class EquityPortfolio:
             else:
                 # Case where you have a position (long|short) and are given an opposite signal (short|long)
                 return (True, True)
-        elif security_info == 404:
+        elif security_info == 404 or security_info == 0:
             # This case is for precaution...if there's no data, then do nohting
+            # A flat signal on a security that is not held does nothing either
             return (False, False)
         else:
             # Case where you do not have an open position but got signal to open it
@@ -0,0 +1,70 @@
+from equity import Equity
+
+
+class Future(Equity):
+    """
+    This class is the object representation of a position in the
+    continuous contract of a futures root. It behaves like an Equity
+    where the number of shares is the number of contracts and every
+    price move is multiplied by the contract multiplier.
+
+    On a roll the position moves to the next contract: the open price
+    is shifted by the roll gap so the pnl carries on from the old
+    contract, and the roll is charged a commission.
+    """
+    def __init__(self):
+        Equity.__init__(self)
+        self.contract = None
+        self.multiplier = 1
+        self.number_of_rolls = 0
+
+    # --------------------------------------------
+    #                GET METHODS
+    # --------------------------------------------
+    def get_root(self):
+        return self.ticker
+
+    def get_contract(self):
+        return self.contract
+
+    def get_multiplier(self):
+        return self.multiplier
+
+    def get_number_of_rolls(self):
+        return self.number_of_rolls
+
+    # --------------------------------------------
+    #                SET METHODS
+    # --------------------------------------------
+    def set_contract(self, contract):
+        self.contract = contract
+
+    def set_multiplier(self, multiplier):
+        self.multiplier = multiplier
+
+    # --------------------------------------------
+    #                UPDATE METHODS
+    # --------------------------------------------
+    def update_relevant(self):
+        # Prices come from the portfolio's roll index
+        pass
+
+    def update_pnl(self):
+        self.pnl.append(
+            (self.current_price-self.open_price)*self.position_type*self.number_of_shares*self.multiplier
+        )
+
+    # --------------------------------------------
+    #                OTHER METHODS
+    # --------------------------------------------
+    def roll(self, contract, roll_gap):
+        """
+        Arguments:
+        ----------
+            contract - symbol of the new front contract
+            roll_gap - new contract open - old contract open on the roll day
+        """
+        self.contract = contract
+        self.open_price += roll_gap
+        self.number_of_rolls += 1
+        self.charge_commission()
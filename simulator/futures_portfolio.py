@@ -0,0 +1,118 @@
+import numpy as np
+from equity_portfolio import EquityPortfolio
+from future import Future
+from roll_index import RollIndex
+
+
+class FuturesPortfolio(EquityPortfolio):
+    """
+    This class is the portfolio of a futures model. Balances, closing,
+    position distribution and signal comparison work as in the
+    EquityPortfolio; positions are held in the continuous contract of
+    each root and sized on the contract notional (price * multiplier).
+
+    The contract schedule of every root is compiled at setup into a
+    RollIndex, so marking to market and rolling the held positions are
+    array lookups on the day's row instead of expiry searches.
+
+    Model signals and the model universe are keyed by root, e.g. ES.
+    """
+    def __init__(self):
+        EquityPortfolio.__init__(self)
+        self.roll_index = RollIndex()
+        # { 'root' : multiplier }, roots not set use the contract schedule
+        # 'multiplier' column, or 1 without it
+        self.multipliers = dict()
+        self.date_index = None
+
+    # --------------------------------------------
+    #               SET METHODS
+    # --------------------------------------------
+    def set_date(self, date):
+        self.date = date
+        self.date_index = self.roll_index.get_date_index(date)
+
+    def set_roll_days(self, roll_days):
+        self.roll_index.roll_days = roll_days
+
+    def set_multiplier(self, root, multiplier):
+        self.multipliers[root] = multiplier
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_roll_index(self):
+        return self.roll_index
+
+    def get_price_symbols(self):
+        # Priced from the roll index, nothing to pull from the price service
+        return list()
+
+    def get_open_price_symbols(self, tickers):
+        return list()
+
+    def get_expired_tickers(self):
+        # Positions whose root has no front contract left
+        if self.date_index is None:
+            return list()
+        return [i for i in self.securities if self.roll_index.get_contract(i, self.date_index) is None]
+
+    def get_multipliers(self, tickers):
+        return np.array([self.multipliers.get(ticker, 1) for ticker in tickers], dtype=float)
+
+    def get_open_prices(self, tickers):
+        """
+        Front contract opens of the roots (roots without price are omitted).
+        """
+        _tickers = [i for i in tickers if i in self.roll_index.root_ids]
+        if self.date_index is None or len(_tickers) == 0:
+            return dict()
+        _prices = self.roll_index.get_prices(_tickers, self.date_index)
+        return {ticker: _prices[i] for i, ticker in enumerate(_tickers) if not np.isnan(_prices[i])}
+
+    # --------------------------------------------
+    #               UPDATE METHODS
+    # --------------------------------------------
+    def compile(self, trading_schedule):
+        """
+        This method pulls the contract schedules of the universe roots
+        and compiles the roll index over the trading schedule.
+        """
+        _contracts = self.data_source.get_futures_contracts(self.security_universe)
+        for root in _contracts:
+            if root not in self.multipliers and 'multiplier' in _contracts[root].columns:
+                self.multipliers[root] = float(_contracts[root]['multiplier'].values[0])
+        self.roll_index.compile(trading_schedule, _contracts, self.data_source)
+        self.date_index = self.roll_index.get_date_index(self.date)
+
+    def update_relevant(self):
+        """
+        This method rolls the held positions whose front contract
+        changed today and marks every position to the front contract
+        open. A root with no price keeps its last price.
+        """
+        if len(self.securities) == 0 or self.date_index is None:
+            return
+        _roots = list(self.securities)
+        _ids = self.roll_index.get_root_ids(_roots)
+        _contract_ids = self.roll_index.contract_ids[self.date_index, _ids]
+        _prices = self.roll_index.prices[self.date_index, _ids]
+        _roll_gaps = self.roll_index.roll_gaps[self.date_index, _ids]
+        for i, root in enumerate(_roots):
+            if _contract_ids[i] < 0:
+                continue
+            _future = self.securities[root]
+            _contract = self.roll_index.contracts[_contract_ids[i]]
+            if _contract != _future.get_contract():
+                _future.roll(_contract, _roll_gaps[i])
+            if not np.isnan(_prices[i]):
+                _future.set_current_price(_prices[i])
+
+    # --------------------------------------------
+    #                OTHER METHODS
+    # --------------------------------------------
+    def create_security(self, ticker):
+        _future = Future()
+        _future.set_multiplier(self.multipliers.get(ticker, 1))
+        _future.set_contract(self.roll_index.get_contract(ticker, self.date_index))
+        return _future
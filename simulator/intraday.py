@@ -0,0 +1,230 @@
+import os
+import numpy as np
+import pandas as pd
+from data_source import DataSource
+from shared_panel import FIELDS
+
+
+class IntradayBarStore:
+    """
+    This class is the object representation of intraday bars stored on
+    disk as memory-mapped arrays, so a run only ever pages in the
+    session it is on.
+
+    Files of the store directory:
+        symbols.npy     (n_symbols,)
+        timestamps.npy  (n_bars,) datetime64[m], sorted
+        values.npy      (n_bars, n_fields, n_symbols) float64, NaN where
+                        a symbol has no bar
+        sessions.npy    (n_sessions,) records (date, start, end): the
+                        bars of a session are values[start:end]
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.symbols = [str(i) for i in np.load(os.path.join(directory, 'symbols.npy'))]
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.timestamps = np.load(os.path.join(directory, 'timestamps.npy'), mmap_mode='r')
+        self.values = np.load(os.path.join(directory, 'values.npy'), mmap_mode='r')
+        self.sessions = np.load(os.path.join(directory, 'sessions.npy'))
+        self.session_ids = {date.decode(): i for i, date in enumerate(self.sessions['date'])}
+        self.fields = FIELDS
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_symbols(self):
+        return self.symbols
+
+    def get_sessions(self, start_date=None, end_date=None):
+        """
+        Return
+        ------
+        'YYYY-MM-DD' of the sessions in [start_date, end_date)
+        """
+        _dates = [i.decode() for i in self.sessions['date']]
+        if start_date is not None:
+            _dates = [i for i in _dates if i >= str(start_date)]
+        if end_date is not None:
+            _dates = [i for i in _dates if i < str(end_date)]
+        return _dates
+
+    def get_session(self, date):
+        """
+        Return
+        ------
+        (timestamps, values) of the session, views on the mapped files
+        """
+        _session = self.sessions[self.session_ids[str(date).split()[0]]]
+        return (
+            self.timestamps[_session['start']:_session['end']],
+            self.values[_session['start']:_session['end']]
+        )
+
+    def get_nbytes(self):
+        return self.values.nbytes + self.timestamps.nbytes
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def iterate_batches(self, date, batch_size=512):
+        """
+        This generator reads a session batch_size bars at a time, so
+        only one batch is held in memory whatever the session length.
+
+        Yields
+        ------
+        (timestamps, values) copies of the batch
+        """
+        _timestamps, _values = self.get_session(date)
+        for start in range(0, _timestamps.shape[0], batch_size):
+            yield np.array(_timestamps[start:start + batch_size]), np.array(_values[start:start + batch_size])
+
+    @staticmethod
+    def write(directory, frames, fields=FIELDS):
+        """
+        This method builds a store from DataFrames of minute bars. The
+        values are written straight into the mapped file.
+
+        Arguments:
+        ----------
+            directory - string
+            frames - { 'symbol' : DataFrame with a 'datetime' column and the fields }
+
+        Return
+        ------
+        IntradayBarStore
+        """
+        os.makedirs(directory, exist_ok=True)
+        _symbols = list(frames)
+        _stamps = dict()
+        for symbol in _symbols:
+            _stamps[symbol] = pd.to_datetime(frames[symbol]['datetime']).values.astype('datetime64[m]')
+        _timestamps = np.unique(np.concatenate([_stamps[i] for i in _symbols])) if _symbols else np.zeros(0, 'datetime64[m]')
+
+        _values = np.lib.format.open_memmap(
+            os.path.join(directory, 'values.npy'), mode='w+', dtype=np.float64,
+            shape=(_timestamps.shape[0], len(fields), len(_symbols))
+        )
+        _values[...] = np.nan
+        for j, symbol in enumerate(_symbols):
+            _index = np.searchsorted(_timestamps, _stamps[symbol])
+            for f, field in enumerate(fields):
+                if field in frames[symbol].columns:
+                    _values[_index, f, j] = frames[symbol][field].values
+        _values.flush()
+        del _values
+
+        _days = _timestamps.astype('datetime64[D]')
+        _dates, _starts = np.unique(_days, return_index=True)
+        _sessions = np.zeros(_dates.shape[0], dtype=[('date', 'S10'), ('start', np.int64), ('end', np.int64)])
+        _sessions['date'] = _dates.astype(str)
+        _sessions['start'] = _starts
+        _sessions['end'] = np.append(_starts[1:], _timestamps.shape[0])
+
+        np.save(os.path.join(directory, 'symbols.npy'), np.array(_symbols, dtype=str))
+        np.save(os.path.join(directory, 'timestamps.npy'), _timestamps)
+        np.save(os.path.join(directory, 'sessions.npy'), _sessions)
+        return IntradayBarStore(directory)
+
+
+class IntradayBarSource(DataSource):
+    """
+    Data source of an intraday run. The bars of a session flow through
+    a generator pipeline:
+
+        sessions -> batches read from the store -> bars (forward-filled opens)
+
+    and the source always serves the bar the pipeline is on, so the
+    price service, the portfolios and the models keep asking for open
+    prices the same way as in a daily run. Bars are stepped one
+    timestamp at a time, every symbol of the timestamp at once.
+    """
+    def __init__(self, store, batch_size=512):
+        self.store = store
+        self.batch_size = batch_size
+        self.open_field = list(store.fields).index('open')
+        # Open of the current bar, forward-filled within the session
+        self.current_open = np.full(len(store.symbols), np.nan)
+        self.current_timestamp = None
+        self.bars_processed = 0
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_current_timestamp(self):
+        return self.current_timestamp
+
+    def get_bars_processed(self):
+        return self.bars_processed
+
+    def get_open_prices(self, symbols, date):
+        """
+        Open of the current bar (or the last one of the session) of the
+        symbols, date is the timestamp of the bar the pipeline is on.
+        """
+        _open_prices = dict()
+        for symbol in symbols:
+            _id = self.store.symbol_ids.get(symbol)
+            if _id is not None and not np.isnan(self.current_open[_id]):
+                _open_prices[symbol] = self.current_open[_id]
+        return _open_prices
+
+    def get_price_time_bars(self, symbol, timespan, start_date, end_date):
+        _data = self.get_batch_price_time_bars([symbol], timespan, start_date, end_date)
+        if symbol in _data:
+            return _data[symbol]
+        return pd.DataFrame(columns=['date'] + list(self.store.fields))
+
+    def get_batch_price_time_bars(self, symbols, timespan, start_date, end_date):
+        """
+        Bars of the store in [start_date, end_date), whatever the
+        timespan asked for. end_date is capped at the current bar so
+        models never see a bar ahead of the simulation.
+        """
+        _end = np.datetime64(str(end_date), 'm')
+        if self.current_timestamp is not None:
+            _end = min(_end, np.datetime64(self.current_timestamp, 'm') + np.timedelta64(1, 'm'))
+        _start = np.searchsorted(self.store.timestamps, np.datetime64(str(start_date), 'm'), side='left')
+        _end = np.searchsorted(self.store.timestamps, _end, side='left')
+        _dates = np.asarray(self.store.timestamps[_start:_end]).astype(str)
+
+        _data = dict()
+        for symbol in symbols:
+            if symbol not in self.store.symbol_ids:
+                continue
+            _values = np.asarray(self.store.values[_start:_end, :, self.store.symbol_ids[symbol]])
+            _frame = pd.DataFrame(_values, columns=list(self.store.fields))
+            _frame.insert(0, 'date', _dates)
+            _frame = _frame[_frame['open'].notna()].reset_index(drop=True)
+            if _frame.shape[0] != 0:
+                _data[symbol] = _frame
+        return _data
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def iterate_bars(self, date):
+        """
+        This generator steps through the bars of a session. The source
+        is moved onto each bar before it is yielded.
+
+        Yields
+        ------
+        'YYYY-MM-DD HH:MM' timestamp of the bar
+        """
+        self.current_open[:] = np.nan
+        for timestamps, values in self.store.iterate_batches(date, self.batch_size):
+            _opens = values[:, self.open_field, :]
+            _has_bar = ~np.isnan(_opens)
+            # Forward fill the opens of the batch from the last bar seen
+            _opens = np.vstack([self.current_open[np.newaxis, :], _opens])
+            _rows = np.where(np.vstack([~np.isnan(self.current_open)[np.newaxis, :], _has_bar]),
+                             np.arange(_opens.shape[0])[:, np.newaxis], 0)
+            _opens = np.take_along_axis(_opens, np.maximum.accumulate(_rows, axis=0), axis=0)[1:]
+            _bars = _has_bar.sum(axis=1)
+            _labels = np.datetime_as_string(timestamps, unit='m')
+            for i in range(timestamps.shape[0]):
+                self.current_open = _opens[i]
+                self.current_timestamp = _labels[i].replace('T', ' ')
+                self.bars_processed += int(_bars[i])
+                yield self.current_timestamp
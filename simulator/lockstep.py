@@ -0,0 +1,327 @@
+import datetime
+import numpy as np
+from allocator import Allocator
+from price_service import PriceService
+from universe import DynamicUniverse
+from intraday import IntradayBarSource
+from simulator import make_trading_schedule
+from custom_exceptions import CUSTOM_EXCEPTIONS
+
+
+class LockstepSimulator:
+    """
+    This class runs K parameter sets (variants) of one equity model in
+    lockstep. The calendar, the prices and the universe are handled
+    once per day for all the variants and the portfolio state carries
+    a variant axis, (K x symbols) arrays, so the daily bookkeeping is a
+    handful of array operations whatever K is.
+
+    Each variant follows the same rules as a Simulator running the
+    model alone: same sizing (Allocator), same order of closes and
+    opens, same signal comparison, so get_pnl() matches K separate
+    Simulator runs. The position distribution is not recorded.
+
+    Only what a plain Simulator run of a single equity model does is
+    supported. Brokers with costs, slippage, risk limits, bounded
+    history, intraday data and custom signal weights raise
+    UnsupportedConfiguration instead of returning different numbers.
+
+    Day:
+    1) Move the model onto the date and the live universe
+    2) Pull the open prices needed by any variant in one call
+    3) Update the pnl of every variant
+    4) Close the queued positions
+    5) Open the queued positions, sized per variant
+    6) Run the model once for all the variants (Model.run_variants())
+       and queue the closes and opens
+    """
+    # Position types are stored as float, NaN where there is no signal
+    NO_SIGNAL = np.nan
+
+    def __init__(self, data_source=None):
+        self.start_date = datetime.date(2000, 1, 1)
+        self.end_date = datetime.date.today()
+        self.starting_capital = 0
+        self.minimum_cash_percentage = 0
+        self.maximum_single_percent_allocation = 0.05
+        self.trading_schedule = list()
+        self.data_source = data_source
+        self.price_service = PriceService()
+        self.allocator = Allocator()
+
+        self.model = None
+        self.universe = None
+        self.variants = list()
+
+        # Daily values, one column per variant
+        self.pnl = list()
+        self.value_historical = list()
+
+    # --------------------------------------------
+    #                SET METHODS
+    # --------------------------------------------
+    def set_start_date(self, start_date):
+        self.start_date = start_date
+
+    def set_end_date(self, end_date):
+        self.end_date = end_date
+
+    def set_starting_capital(self, value):
+        self.starting_capital = value
+
+    def set_minimum_cash_percentage(self, minimum_cash_percentage):
+        self.minimum_cash_percentage = minimum_cash_percentage
+
+    def set_maximum_single_percent_allocation(self, max_percent):
+        self.maximum_single_percent_allocation = max_percent
+
+    def set_data_source(self, data_source):
+        self.data_source = data_source
+
+    def set_broker(self, broker):
+        # Commissions are not modelled per variant
+        if broker != '':
+            raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+                f"Broker {broker}", "lockstep runs do not charge commissions, use a Simulator"
+            )
+
+    def set_slippage(self, *args, **kwargs):
+        raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+            "Slippage", "lockstep runs fill at the open, use a Simulator"
+        )
+
+    def set_risk_limits(self, *args, **kwargs):
+        raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+            "Risk limits", "lockstep runs have no risk engine, use a Simulator"
+        )
+
+    def set_history_limit(self, history_limit):
+        if history_limit is not None:
+            raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+                "History limit", "lockstep runs keep the whole history"
+            )
+
+    def set_model(self, model, security_universe, variants, security_type='equity'):
+        """
+        Arguments:
+        ----------
+            model - class object (Model subclass)
+            security_universe - list of tickers or DynamicUniverse object
+            variants - list of K parameter dictionaries (Model.set_parameters())
+            security_type - only 'equity' is supported
+        """
+        if security_type != 'equity':
+            raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+                f"Security type {security_type}", "lockstep runs only hold equities"
+            )
+        if not isinstance(security_universe, DynamicUniverse):
+            security_universe = DynamicUniverse(security_universe)
+        self.model = model()
+        self.universe = security_universe
+        self.variants = list(variants)
+
+    # --------------------------------------------
+    #                GET METHODS
+    # --------------------------------------------
+    def get_number_of_variants(self):
+        return len(self.variants)
+
+    def get_pnl(self):
+        """
+        Return
+        ------
+        (days, K) array, value of the whole portfolio of every variant
+        (the ParentPortfolio pnl of a single run)
+        """
+        return np.array(self.pnl)
+
+    def get_value_historical(self):
+        """
+        Return
+        ------
+        (days, K) array, value of the model portfolio of every variant
+        """
+        return np.array(self.value_historical)
+
+    def get_openings_failed(self):
+        return self.openings_failed
+
+    # --------------------------------------------
+    #                OTHER METHODS
+    # --------------------------------------------
+    def build_trading_schedule(self):
+        self.trading_schedule = make_trading_schedule(self.start_date, self.end_date)
+
+    def reset_state(self):
+        _variants = len(self.variants)
+        _symbols = len(self.symbols)
+        _shape = (_variants, _symbols)
+
+        # Same split as ParentPortfolio.allocate_all_cash() with one model
+        _to_allocate = int(self.starting_capital * (1 - self.minimum_cash_percentage))
+        # Parent cash + allocated balance, the realized pnl comes on top
+        self.parent_balance = self.starting_capital
+        self.maximum_percentage_single_security = int(self.maximum_single_percent_allocation * 100) / 100
+        self.cash_balance = np.full(_variants, float(_to_allocate))
+        self.allocated_balance = np.zeros(_variants)
+        # Realized pnl, added to the parent allocated balance on closes
+        self.realized = np.zeros(_variants)
+        self.openings_failed = np.zeros(_variants, dtype=int)
+
+        self.held = np.zeros(_shape, dtype=bool)
+        self.position_type = np.zeros(_shape)
+        self.number_of_shares = np.zeros(_shape)
+        self.open_price = np.zeros(_shape)
+        self.security_cash_balance = np.zeros(_shape)
+        self.security_allocated_balance = np.zeros(_shape)
+
+        self.to_close = np.zeros(_shape, dtype=bool)
+        self.to_open = np.zeros(_shape, dtype=bool)
+        self.open_type = np.zeros(_shape)
+
+        # Last known price of every symbol
+        self.current_price = np.full(_symbols, np.nan)
+        self.pnl = list()
+        self.value_historical = list()
+
+    def run(self):
+        if self.model is None:
+            raise CUSTOM_EXCEPTIONS['no_model']
+        if isinstance(self.data_source, IntradayBarSource):
+            raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+                "Intraday data", "lockstep runs step through daily bars"
+            )
+
+        self.build_trading_schedule()
+        self.universe.compile(self.trading_schedule)
+        self.symbols = self.universe.get_all_symbols()
+        self.model.set_data_source(self.data_source)
+        self.model.set_start_date(self.start_date)
+        self.model.get_schedule().compile(self.trading_schedule)
+        self.price_service.set_data_source(self.data_source)
+        self.reset_state()
+
+        for date_index, date in enumerate(self.trading_schedule):
+            self.run_day(date_index, date)
+
+    def run_day(self, date_index, date):
+        # Move the model onto the date and the live universe
+        self.model.set_current_date(date)
+        self.price_service.set_date(date)
+        _members = self.universe.membership[date_index]
+        if self.universe.has_changed(date_index):
+            self.model.set_security_universe(self.universe.get_members(date_index))
+            # Held symbols that dropped out are closed, pending opens dropped
+            self.to_close |= self.held & ~_members
+            self.to_open &= _members
+
+        # One price call for the symbols any variant holds or opens
+        _needed = np.flatnonzero((self.held | self.to_open).any(axis=0))
+        _day_price = np.full(len(self.symbols), np.nan)
+        if _needed.shape[0] != 0:
+            _open_prices = self.price_service.get_open_prices([self.symbols[i] for i in _needed])
+            for i in _needed:
+                _day_price[i] = _open_prices.get(self.symbols[i], np.nan)
+        self.current_price = np.where(np.isnan(_day_price), self.current_price, _day_price)
+
+        # Pnl of the held positions
+        _position_pnl = np.where(
+            self.held, (self.current_price - self.open_price) * self.position_type * self.number_of_shares, 0
+        )
+        _model_pnl = _position_pnl.sum(axis=1)
+        self.value_historical.append(_model_pnl + self.cash_balance + self.allocated_balance)
+        self.pnl.append(_model_pnl + self.parent_balance + self.realized)
+
+        self.close_positions(_position_pnl)
+        self.open_positions(_day_price)
+
+        if self.model.get_schedule().is_active(date_index):
+            self.queue_signals(self.model.run_variants(self.variants), _members)
+
+    def close_positions(self, position_pnl):
+        _closing = self.to_close & self.held
+        _released = np.where(_closing, self.security_allocated_balance + self.security_cash_balance, 0).sum(axis=1)
+        _closed_pnl = np.where(_closing, position_pnl, 0).sum(axis=1)
+        self.cash_balance += _closed_pnl + _released
+        self.allocated_balance -= _released
+        self.realized += _closed_pnl
+
+        self.held &= ~_closing
+        self.security_allocated_balance[_closing] = 0
+        self.security_cash_balance[_closing] = 0
+        self.number_of_shares[_closing] = 0
+        self.to_close[:] = False
+
+    def open_positions(self, day_price):
+        """
+        This method sizes the queued openings of all the variants in
+        one Allocator call, each variant (row) with its own balances.
+        """
+        if not self.to_open.any():
+            return
+        _count = self.to_open.sum(axis=1, keepdims=True)
+        _priced = self.to_open & ~np.isnan(day_price)
+        _weights = np.where(_priced, 1 / np.maximum(_count, 1), 0)
+        _prices = np.where(np.isnan(day_price), 0, day_price)
+
+        _opened, _amounts, _shares = self.allocator.allocate(
+            _prices,
+            self.cash_balance[:, np.newaxis],
+            self.allocated_balance[:, np.newaxis],
+            self.maximum_percentage_single_security,
+            _weights
+        )
+        _opened &= _priced
+        _amounts = np.where(_opened, _amounts, 0)
+        _shares = np.where(_opened, _shares, 0)
+
+        _total_to_allocate = _amounts.sum(axis=1)
+        self.cash_balance -= _total_to_allocate
+        self.allocated_balance += _total_to_allocate
+        self.openings_failed += (self.to_open & ~_opened).sum(axis=1)
+
+        _invested = _shares * _prices
+        self.held |= _opened
+        self.position_type = np.where(_opened, self.open_type, self.position_type)
+        self.number_of_shares = np.where(_opened, _shares, self.number_of_shares)
+        self.open_price = np.where(_opened, _prices, self.open_price)
+        self.security_cash_balance = np.where(_opened, _amounts - _invested, self.security_cash_balance)
+        self.security_allocated_balance = np.where(_opened, _invested, self.security_allocated_balance)
+        self.to_open[:] = False
+
+    def queue_signals(self, signals, members):
+        """
+        This method compares the signals of every variant with its
+        holdings (same rules as EquityPortfolio.compare_security) and
+        queues the closes and opens for the next day.
+
+        Arguments:
+        ----------
+            signals - list of K signal dictionaries or (K, len(model universe)) array
+            members - bool array, live symbols of the day
+        """
+        _signals = np.full(self.held.shape, self.NO_SIGNAL)
+        if isinstance(signals, np.ndarray):
+            _ids = [self.universe.get_symbol_id(i) for i in self.model.security_universe]
+            _signals[:, _ids] = signals
+        else:
+            for k, variant_signals in enumerate(signals):
+                for ticker in variant_signals:
+                    # Variants are all equally weighted
+                    if isinstance(variant_signals[ticker], dict):
+                        raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+                            "Weighted signals", "lockstep runs open equally weighted positions, use a Simulator"
+                        )
+                    _id = self.universe.symbol_ids.get(ticker)
+                    if _id is not None:
+                        _signals[k, _id] = variant_signals[ticker]
+
+        # Signals on symbols that are not live are ignored
+        _given = ~np.isnan(_signals) & members
+        _keep = (_signals == self.position_type) | (_signals == 404)
+        _close = _given & self.held & ~_keep
+        _open = _given & (_signals != 0) & ((self.held & ~_keep) | (~self.held & (_signals != 404)))
+
+        self.to_close |= _close
+        self.to_open |= _open
+        self.open_type = np.where(_open, _signals, self.open_type)
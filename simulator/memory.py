@@ -0,0 +1,189 @@
+from collections import deque
+from itertools import islice
+import os
+import sys
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+
+
+class BoundedDict(dict):
+    """
+    Dictionary that only keeps its last maxlen insertions. Used for
+    position_distribution_historical in bounded-history mode.
+    """
+    def __init__(self, maxlen):
+        dict.__init__(self)
+        self.maxlen = maxlen
+
+    def __setitem__(self, key, value):
+        if key in self:
+            dict.__delitem__(self, key)
+        dict.__setitem__(self, key, value)
+        while len(self) > self.maxlen:
+            dict.__delitem__(self, next(iter(self)))
+
+
+def make_history(history_limit):
+    """
+    Returns an empty pnl history: a list, or a ring buffer of
+    history_limit items in bounded-history mode.
+    """
+    if history_limit is None:
+        return list()
+    return deque(maxlen=history_limit)
+
+
+def make_dated_history(history_limit):
+    if history_limit is None:
+        return dict()
+    return BoundedDict(history_limit)
+
+
+class MemoryReport:
+    """
+    This class is the object representation of the opt-in memory
+    accounting. Every interval trading days it samples the process
+    RSS, the tracemalloc totals and the size of the containers that
+    grow with the length of a run.
+
+    Containers:
+    - parent.pnl
+    - <model>.pnl
+    - <model>.value_historical
+    - <model>.position_distribution_historical
+    - <model>.securities.pnl (all Equity pnl lists of the model)
+    - price_service.cache
+    - price_panel
+    """
+    def __init__(self, interval=20, trace=True, budget=None):
+        self.interval = interval
+        self.trace = trace
+        # Memory budget in bytes, a warning is raised when RSS goes over
+        self.budget = budget
+        self.samples = list()
+        self.started_tracing = False
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_samples(self):
+        return self.samples
+
+    def get_report(self):
+        """
+        Return
+        ------
+        DataFrame, one row per sample and one column per measure (bytes)
+        """
+        _rows = list()
+        for sample in self.samples:
+            _row = {'date': sample['date'], 'rss': sample['rss'],
+                    'traced_current': sample['traced_current'], 'traced_peak': sample['traced_peak']}
+            _row.update(sample['containers'])
+            _rows.append(_row)
+        return pd.DataFrame(_rows)
+
+    def get_largest_containers(self, number=5):
+        if len(self.samples) == 0:
+            return list()
+        _containers = self.samples[-1]['containers']
+        return sorted(_containers.items(), key=lambda item: item[1], reverse=True)[:number]
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def start(self):
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def stop(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def update(self, simulator, date_index, date):
+        if date_index % self.interval == 0:
+            self.sample(simulator, date)
+
+    def sample(self, simulator, date):
+        _traced_current, _traced_peak = (None, None)
+        if tracemalloc.is_tracing():
+            _traced_current, _traced_peak = tracemalloc.get_traced_memory()
+
+        _sample = {
+            'date': date,
+            'rss': get_rss(),
+            'traced_current': _traced_current,
+            'traced_peak': _traced_peak,
+            'containers': self.measure_containers(simulator)
+        }
+        self.samples.append(_sample)
+
+        if self.budget is not None and _sample['rss'] is not None and _sample['rss'] > self.budget:
+            _largest = ', '.join(f"{name}={size}" for name, size in self.get_largest_containers(3))
+            warnings.warn(f"RSS {_sample['rss']} bytes over the {self.budget} bytes budget on {date} ({_largest})")
+        return _sample
+
+    def measure_containers(self, simulator):
+        _portfolio = simulator.portfolio
+        _containers = {'parent.pnl': sizeof(_portfolio.pnl)}
+        for security_type in _portfolio.models:
+            for model in _portfolio.models[security_type]:
+                _model_portfolio = _portfolio.models[security_type][model]['portfolio']
+                _containers[f"{model}.pnl"] = sizeof(_model_portfolio.pnl)
+                _containers[f"{model}.value_historical"] = sizeof(_model_portfolio.value_historical)
+                _containers[f"{model}.position_distribution_historical"] = sizeof(
+                    _model_portfolio.position_distribution_historical
+                )
+                _securities_pnl = 0
+                for security in _model_portfolio.securities:
+                    _securities_pnl += sizeof(_model_portfolio.securities[security].pnl)
+                _containers[f"{model}.securities.pnl"] = _securities_pnl
+        _containers['price_service.cache'] = sizeof(_portfolio.price_service.prices)
+        if simulator.price_panel is not None and simulator.price_panel.values is not None:
+            _containers['price_panel'] = simulator.price_panel.get_nbytes()
+        return _containers
+
+
+def sizeof(obj, sample_size=100):
+    """
+    Approximate deep size in bytes. Large containers are extrapolated
+    from their first sample_size items to keep sampling cheap.
+    """
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (0 if obj.base is not None else obj.nbytes)
+    _size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        _count = len(obj)
+        _sample = list(islice(obj.items(), sample_size))
+        _sample_size = sum(sizeof(key, sample_size) + sizeof(value, sample_size) for key, value in _sample)
+    elif isinstance(obj, (list, tuple, deque, set)):
+        _count = len(obj)
+        _sample = list(islice(obj, sample_size))
+        _sample_size = sum(sizeof(item, sample_size) for item in _sample)
+    else:
+        return _size
+    if len(_sample) != 0:
+        _size += int(_sample_size * _count / len(_sample))
+    return _size
+
+
+def get_rss():
+    """
+    Resident set size of the process in bytes (None if unknown).
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in kilobytes on Linux and bytes on macOS
+        _rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return _rss if sys.platform == 'darwin' else _rss * 1024
+    except ImportError:
+        return None
@@ -1,11 +1,29 @@
+import copy
 from datetime import timedelta
-from database_extractor import database_extractor
+from data_source import to_date
+from schedule import RebalanceSchedule
+
+
+# Attributes of every Model, left out of get_parameters()
+_MODEL_ATTRIBUTES = (
+    'start_date', 'current_date', 'security_universe', 'data_source', 'schedule', 'cacheable',
+    'variant_models'
+)
+
 
 class Model:
     def __init__(self):
         self.start_date = None
         self.current_date = None
         self.security_universe = list()
+        self.data_source = None
+        # Days the model runs on, see schedule.py
+        self.schedule = RebalanceSchedule()
+        # Signals can be replayed from the signal cache (see signal_cache.py).
+        # Models whose signals depend on the portfolio have to opt out.
+        self.cacheable = True
+        # One copy of the model per variant, see run_variants()
+        self.variant_models = None
 
     # --------------------------------------------
     #               GET METHODS
@@ -16,6 +34,29 @@ class Model:
     def get_current_date(self):
         return self.current_date
 
+    def get_schedule(self):
+        return self.schedule
+
+    def is_cacheable(self):
+        return self.cacheable
+
+    def get_parameters(self):
+        """
+            This method returns the parameters that make the signals of
+            the model, used to key the signal cache. By default these are
+            the attributes the subclass sets on top of the Model ones.
+            Models can override it when that is not enough, e.g. for
+            attributes with the default repr <X object at 0x...>, which
+            keep the model out of the cache.
+
+            Return:
+            -------
+                { 'parameter' : value }
+        """
+        return {
+            key: repr(value) for key, value in vars(self).items() if key not in _MODEL_ATTRIBUTES
+        }
+
     # --------------------------------------------
     #               SET METHODS
     # --------------------------------------------
@@ -43,6 +84,34 @@ class Model:
     def set_security_universe(self, universe):
         self.security_universe = universe
 
+    def set_data_source(self, data_source):
+        self.data_source = data_source
+
+    def set_cacheable(self, cacheable):
+        self.cacheable = cacheable
+
+    def set_parameters(self, parameters):
+        """
+            This method sets the parameters of a variant, e.g.
+            {'look_back': 20, 'threshold': 0.5}, as attributes.
+        """
+        for key in parameters:
+            setattr(self, key, parameters[key])
+
+    def set_schedule(self, frequency='daily', every=1, dates=None):
+        """
+            This method sets how often the model rebalances. On the
+            other days run() is skipped and the portfolio is only
+            marked to market. Models usually call it in __init__.
+
+            Arguments:
+            ----------
+                frequency - 'daily', 'weekly', 'month_end', 'every_n' or 'custom'
+                every - integer, used by 'every_n'
+                dates - list of dates, used by 'custom'
+        """
+        self.schedule = RebalanceSchedule(frequency, every, dates)
+
     # --------------------------------------------
     #               OTHER METHODS
     # --------------------------------------------
@@ -52,5 +121,86 @@ class Model:
             will pull the currect active day, plus some additional
             look_back period as needed for the model used to
             make trades.
+
+            Arguments:
+            ----------
+                ticker - string or list of strings
+                look_back - integer (calendar days)
+                columns - list of column names to keep
+
+            Return:
+            -------
+                DataFrame for a single ticker, { 'ticker' : DataFrame }
+                for a list of tickers
         """
-        pass
+        _current_date = to_date(self.current_date)
+        _start_date = _current_date
+        if look_back is not None:
+            _start_date = _current_date - timedelta(days=look_back)
+        _end_date = _current_date + timedelta(days=1)
+
+        _tickers = [ticker] if isinstance(ticker, str) else list(ticker)
+        _data = self.data_source.get_batch_price_time_bars(_tickers, 'Daily', str(_start_date), str(_end_date))
+        if columns is not None:
+            for _ticker in _data:
+                _columns = [i for i in ['date'] + list(columns) if i in _data[_ticker].columns]
+                _data[_ticker] = _data[_ticker][list(dict.fromkeys(_columns))]
+
+        if isinstance(ticker, str):
+            return _data.get(ticker)
+        return _data
+
+    def pull_panel(self, window, fields=('close',), tickers=None):
+        """
+            This method pulls the last window daily bars, up to the
+            current date, of many tickers at once as dates x tickers
+            arrays, to be used with the operators of panel_ops.py.
+
+            Arguments:
+            ----------
+                window - integer (trading days)
+                fields - list of fields
+                tickers - list of tickers, the security universe if None
+
+            Return:
+            -------
+                { 'field' : (window, len(tickers)) array }, oldest bar
+                first, columns in the order of tickers, NaN where there
+                is no bar
+        """
+        _tickers = list(self.security_universe if tickers is None else tickers)
+        _end_date = to_date(self.current_date) + timedelta(days=1)
+        return self.data_source.get_trailing_bars(_tickers, _end_date, window, fields)
+
+    def run_variants(self, variants):
+        """
+            This method returns the signals of several parameter sets
+            of the model for the current date (see lockstep.py).
+
+            The default runs one copy of the model per variant, each
+            keeping its own state. Models override it to pull the day's
+            data once and compute every variant from it.
+
+            Arguments:
+            ----------
+                variants - list of K parameter dictionaries
+
+            Return:
+            -------
+                list of K signal dictionaries, or a (K, len(security_universe))
+                array of signals with NaN where there is no signal
+        """
+        if self.variant_models is None:
+            self.variant_models = list()
+            for parameters in variants:
+                # The data source is shared, not copied
+                _model = copy.deepcopy(self, {id(self.data_source): self.data_source})
+                _model.set_parameters(parameters)
+                self.variant_models.append(_model)
+
+        _signals = list()
+        for model in self.variant_models:
+            model.set_current_date(self.current_date)
+            model.set_security_universe(self.security_universe)
+            _signals.append(model.run())
+        return _signals
@@ -0,0 +1,102 @@
+import re
+from equity import Equity
+from custom_exceptions import CUSTOM_EXCEPTIONS
+
+
+# OCC style symbol, e.g. SPY220318C00450000 (padding spaces allowed)
+_SYMBOL = re.compile(r'^(?P<underlying>[A-Z0-9.]{1,6})\s*(?P<expiry>\d{6})(?P<right>[CP])(?P<strike>\d{8})$')
+
+
+class Option(Equity):
+    """
+    This class is the object representation of an option contract.
+    It behaves like an Equity (balances, commission, pnl) where the
+    number of shares is the number of contracts and every price move
+    is multiplied by the contract multiplier.
+
+    The price and the Greeks are set by the OptionsPortfolio, which
+    reprices all the held contracts at once.
+    """
+    def __init__(self):
+        Equity.__init__(self)
+        self.underlying = None
+        self.expiry = None
+        self.strike = 0
+        self.right = None   # 'C' or 'P'
+        self.multiplier = 100
+        self.greeks = dict()
+
+    # --------------------------------------------
+    #                GET METHODS
+    # --------------------------------------------
+    def get_underlying(self):
+        return self.underlying
+
+    def get_expiry(self):
+        return self.expiry
+
+    def get_strike(self):
+        return self.strike
+
+    def get_right(self):
+        return self.right
+
+    def get_multiplier(self):
+        return self.multiplier
+
+    def get_greeks(self):
+        return self.greeks
+
+    # --------------------------------------------
+    #                SET METHODS
+    # --------------------------------------------
+    def set_ticker(self, ticker):
+        """
+        Sets the OCC symbol and the contract terms parsed from it.
+        """
+        self.ticker = ticker
+        self.underlying, self.expiry, self.right, self.strike = parse_symbol(ticker)
+
+    def set_multiplier(self, multiplier):
+        self.multiplier = multiplier
+
+    def set_greeks(self, greeks):
+        self.greeks = greeks
+
+    # --------------------------------------------
+    #                UPDATE METHODS
+    # --------------------------------------------
+    def update_relevant(self):
+        # Prices come from the portfolio's vectorized repricing
+        pass
+
+    def update_pnl(self):
+        self.pnl.append(
+            (self.current_price-self.open_price)*self.position_type*self.number_of_shares*self.multiplier
+        )
+
+
+def parse_symbol(symbol):
+    """
+    Return
+    ------
+    (underlying, 'YYYY-MM-DD' expiry, 'C' or 'P', strike)
+    """
+    _match = _SYMBOL.match(symbol)
+    if _match is None:
+        raise CUSTOM_EXCEPTIONS['bad_option_symbol'](symbol)
+    _expiry = _match.group('expiry')
+    return (
+        _match.group('underlying'),
+        f"20{_expiry[:2]}-{_expiry[2:4]}-{_expiry[4:]}",
+        _match.group('right'),
+        int(_match.group('strike')) / 1000
+    )
+
+
+def make_symbol(underlying, expiry, right, strike):
+    """
+    Builds the OCC symbol of a contract, e.g. ('SPY', '2022-03-18', 'C', 450).
+    """
+    _expiry = str(expiry).split()[0].replace('-', '')[2:]
+    return f"{underlying}{_expiry}{right}{int(round(strike * 1000)):08d}"
@@ -0,0 +1,119 @@
+import numpy as np
+from pricing import black_scholes
+
+
+CALL = 0
+PUT = 1
+
+
+class OptionChain:
+    """
+    This class is the object representation of the option chain of one
+    underlying on one date. The chain is stored as arrays indexed by
+    expiry and strike:
+
+        expiries            (n_expiries,)  'YYYY-MM-DD' bytes, sorted
+        strikes             (n_strikes,)   sorted
+        implied_volatility  (n_expiries, n_strikes, 2)  [..., CALL | PUT]
+
+    Missing quotes are NaN. Pricing the whole chain, or any set of
+    contracts in it, is a single vectorized Black-Scholes call.
+    """
+    def __init__(self, underlying, expiries, strikes, implied_volatility):
+        self.underlying = underlying
+        self.expiries = np.asarray(expiries, dtype='S10')
+        self.strikes = np.asarray(strikes, dtype=float)
+        self.implied_volatility = np.asarray(implied_volatility, dtype=float)
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_underlying(self):
+        return self.underlying
+
+    def get_expiries(self):
+        return [i.decode() for i in self.expiries]
+
+    def get_strikes(self):
+        return self.strikes
+
+    def get_indices(self, expiries, strikes, rights):
+        """
+        This method maps contracts to chain indices.
+
+        Arguments:
+        ----------
+            expiries - array of 'YYYY-MM-DD'
+            strikes - array of floats
+            rights - array of CALL (0) / PUT (1)
+
+        Return
+        ------
+        (expiry_index, strike_index, right, found) arrays, found is
+        False for contracts that are not in the chain
+        """
+        _expiries = np.asarray(expiries, dtype='S10')
+        _strikes = np.asarray(strikes, dtype=float)
+        _expiry_index = np.minimum(np.searchsorted(self.expiries, _expiries), max(self.expiries.shape[0] - 1, 0))
+        _strike_index = np.minimum(np.searchsorted(self.strikes, _strikes), max(self.strikes.shape[0] - 1, 0))
+        if self.expiries.shape[0] == 0 or self.strikes.shape[0] == 0:
+            _found = np.zeros(_expiries.shape[0], dtype=bool)
+        else:
+            _found = (self.expiries[_expiry_index] == _expiries) & np.isclose(self.strikes[_strike_index], _strikes)
+        return _expiry_index, _strike_index, np.asarray(rights, dtype=int), _found
+
+    def get_implied_volatility(self, expiries, strikes, rights):
+        """
+        Implied volatility of the contracts, NaN where not quoted.
+        """
+        _expiry_index, _strike_index, _rights, _found = self.get_indices(expiries, strikes, rights)
+        _volatility = np.full(_found.shape[0], np.nan)
+        _volatility[_found] = self.implied_volatility[_expiry_index[_found], _strike_index[_found], _rights[_found]]
+        return _volatility
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    @staticmethod
+    def from_frame(underlying, frame):
+        """
+        This method builds a chain from a DataFrame with the columns
+        expiry, strike, right ('C' or 'P') and implied_volatility.
+        """
+        _expiries = np.unique(np.asarray([str(i).split()[0] for i in frame['expiry']], dtype='S10'))
+        _strikes = np.unique(frame['strike'].values.astype(float))
+        _volatility = np.full((_expiries.shape[0], _strikes.shape[0], 2), np.nan)
+        _expiry_index = np.searchsorted(_expiries, np.asarray([str(i).split()[0] for i in frame['expiry']], dtype='S10'))
+        _strike_index = np.searchsorted(_strikes, frame['strike'].values.astype(float))
+        _rights = np.where(frame['right'].astype(str).str.upper().str.startswith('C'), CALL, PUT)
+        _volatility[_expiry_index, _strike_index, _rights] = frame['implied_volatility'].values
+        return OptionChain(underlying, _expiries, _strikes, _volatility)
+
+    def price(self, spot, date, rate=0.0, dividend_yield=0.0):
+        """
+        This method prices every contract of the chain in one pass.
+
+        Return
+        ------
+        { 'price', 'delta', 'gamma', 'vega', 'theta', 'rho' }, each an
+        (n_expiries, n_strikes, 2) array
+        """
+        _time = year_fractions(self.expiries, date)
+        return black_scholes(
+            spot,
+            self.strikes[np.newaxis, :, np.newaxis],
+            _time[:, np.newaxis, np.newaxis],
+            rate,
+            self.implied_volatility,
+            np.array([True, False])[np.newaxis, np.newaxis, :],
+            dividend_yield
+        )
+
+
+def year_fractions(expiries, date):
+    """
+    Time in years (actual/365) from date to every expiry.
+    """
+    _expiries = np.asarray(expiries, dtype='S10').astype(str).astype('datetime64[D]')
+    _date = np.datetime64(str(date).split()[0], 'D')
+    return (_expiries - _date).astype(float) / 365
@@ -0,0 +1,172 @@
+import numpy as np
+from equity_portfolio import EquityPortfolio
+from option import Option, parse_symbol
+from option_chain import CALL, PUT, year_fractions
+from pricing import black_scholes
+
+
+class OptionsPortfolio(EquityPortfolio):
+    """
+    This class is the portfolio of an options model. Balances, closing,
+    position distribution and signal comparison work as in the
+    EquityPortfolio; what changes is how contracts are priced.
+
+    Every day the chains of the held underlyings are loaded once and
+    all the held contracts are repriced, Greeks included, in a single
+    vectorized Black-Scholes pass. Contracts missing from the chain are
+    priced with the flat fallback volatility.
+
+    Model signals are keyed by OCC symbols, e.g. SPY220318C00450000, and
+    the model universe holds the underlyings. Contracts at or past their
+    expiry are not opened, held ones are closed at intrinsic value.
+    """
+    def __init__(self):
+        EquityPortfolio.__init__(self)
+        self.multiplier = 100
+        self.risk_free_rate = 0.0
+        self.dividend_yield = 0.0
+        # Used when a contract has no implied volatility in the chain
+        self.volatility = 0.2
+        # { 'underlying' : OptionChain } of self.date
+        self.chains = dict()
+        self.chains_date = None
+
+    # --------------------------------------------
+    #               SET METHODS
+    # --------------------------------------------
+    def set_risk_free_rate(self, risk_free_rate):
+        self.risk_free_rate = risk_free_rate
+
+    def set_dividend_yield(self, dividend_yield):
+        self.dividend_yield = dividend_yield
+
+    def set_volatility(self, volatility):
+        self.volatility = volatility
+
+    def set_multiplier(self, multiplier):
+        self.multiplier = multiplier
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_price_symbols(self):
+        # The held contracts are priced off their underlyings
+        return list(dict.fromkeys(self.securities[i].get_underlying() for i in self.securities))
+
+    def get_universe_symbol(self, ticker):
+        return parse_symbol(ticker)[0]
+
+    def get_expired_tickers(self):
+        return [i for i in self.securities if self.securities[i].get_expiry() <= str(self.date)]
+
+    def get_chains(self, underlyings):
+        """
+        This method returns today's chains, loading the ones not seen
+        yet today with a single call to the data source. Data sources
+        without option chains give no chain, the flat volatility is used.
+        """
+        if self.chains_date != self.date:
+            self.chains = dict()
+            self.chains_date = self.date
+        _to_load = [i for i in underlyings if i not in self.chains]
+        if len(_to_load) != 0 and self.data_source.has_option_chains():
+            self.chains.update(self.data_source.get_option_chains(_to_load, self.date))
+        return self.chains
+
+    def get_greeks(self):
+        """
+        Position-weighted Greeks of the whole portfolio.
+        """
+        _greeks = {'delta': 0, 'gamma': 0, 'vega': 0, 'theta': 0, 'rho': 0}
+        for security in self.securities:
+            _option = self.securities[security]
+            _size = _option.get_position_type() * _option.get_number_of_shares() * _option.get_multiplier()
+            for greek in _greeks:
+                _greeks[greek] += _size * _option.get_greeks().get(greek, 0)
+        return _greeks
+
+    def get_open_prices(self, tickers):
+        # Contracts at or past their expiry are never opened
+        _live = [ticker for ticker in tickers if parse_symbol(ticker)[1] > str(self.date)]
+        _prices = self.reprice(_live)
+        return {ticker: _prices['price'][i] for i, ticker in enumerate(_prices['tickers'])}
+
+    # --------------------------------------------
+    #               UPDATE METHODS
+    # --------------------------------------------
+    def update_relevant(self):
+        """
+        This method reprices every held contract and its Greeks in one
+        vectorized pass. A contract whose underlying has no price keeps
+        its last price.
+        """
+        if len(self.securities) == 0:
+            return
+        _prices = self.reprice(list(self.securities))
+        for i, ticker in enumerate(_prices['tickers']):
+            self.securities[ticker].set_current_price(_prices['price'][i])
+            self.securities[ticker].set_greeks({
+                greek: _prices[greek][i] for greek in ('delta', 'gamma', 'vega', 'theta', 'rho')
+            })
+
+    # --------------------------------------------
+    #                OTHER METHODS
+    # --------------------------------------------
+    def compare_security(self, security, security_info):
+        # Signals on expired contracts that are not held are ignored
+        if security not in self.securities and parse_symbol(security)[1] <= str(self.date):
+            return (False, False)
+        return super().compare_security(security, security_info)
+
+    def create_security(self, ticker):
+        _option = Option()
+        _option.set_multiplier(self.multiplier)
+        return _option
+
+    def reprice(self, tickers):
+        """
+        This method prices a set of contracts in one Black-Scholes call.
+
+        Return
+        ------
+        { 'tickers': priced tickers, 'price': array, 'delta': array, ... }
+        contracts whose underlying has no price are left out
+        """
+        _terms = [parse_symbol(ticker) for ticker in tickers]
+        _underlyings = list(dict.fromkeys(term[0] for term in _terms))
+        _spots = super().get_open_prices(_underlyings)
+
+        _priced = [i for i, term in enumerate(_terms) if term[0] in _spots]
+        _tickers = [tickers[i] for i in _priced]
+        _terms = [_terms[i] for i in _priced]
+        if len(_terms) == 0:
+            return {'tickers': list(), 'price': np.zeros(0), 'delta': np.zeros(0), 'gamma': np.zeros(0),
+                    'vega': np.zeros(0), 'theta': np.zeros(0), 'rho': np.zeros(0)}
+
+        _underlying = np.array([term[0] for term in _terms])
+        _expiries = np.array([term[1] for term in _terms], dtype='S10')
+        _rights = np.array([CALL if term[2] == 'C' else PUT for term in _terms])
+        _strikes = np.array([term[3] for term in _terms], dtype=float)
+        _spot = np.array([_spots[term[0]] for term in _terms], dtype=float)
+
+        # Implied volatility from each underlying's chain arrays
+        _volatility = np.full(len(_terms), np.nan)
+        _chains = self.get_chains(_underlyings)
+        for underlying in _chains:
+            _mask = _underlying == underlying
+            _volatility[_mask] = _chains[underlying].get_implied_volatility(
+                _expiries[_mask], _strikes[_mask], _rights[_mask]
+            )
+        _volatility = np.where(np.isnan(_volatility), self.volatility, _volatility)
+
+        _result = black_scholes(
+            _spot,
+            _strikes,
+            year_fractions(_expiries, self.date),
+            self.risk_free_rate,
+            _volatility,
+            _rights == CALL,
+            self.dividend_yield
+        )
+        _result['tickers'] = _tickers
+        return _result
@@ -0,0 +1,177 @@
+import numpy as np
+
+
+class OrderQueue:
+    """
+    This class is the object representation of the pending orders.
+    Orders are stored flat, one row per order, in growable NumPy
+    columns instead of nested {security_type: {model: ...}} dicts.
+    Models and tickers are interned to integer ids so grouping the
+    day's orders per model portfolio is a single stable sort.
+
+    Columns:
+    - action (CLOSE, OPEN or CANCELLED)
+    - book id (one per (security_type, model) pair)
+    - ticker id
+    - position_type (1 or -1 for opens, 0 for closes)
+    - weight (custom weight of an open, NaN for the equal weight)
+    """
+    CANCELLED = -1
+    CLOSE = 0
+    OPEN = 1
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.actions = np.empty(capacity, dtype=np.int8)
+        self.book_ids = np.empty(capacity, dtype=np.int32)
+        self.ticker_ids = np.empty(capacity, dtype=np.int32)
+        self.position_types = np.empty(capacity, dtype=np.int8)
+        self.weights = np.empty(capacity, dtype=float)
+
+        # Interned books and tickers
+        self.books = list()
+        self.book_index = dict()
+        self.tickers = list()
+        self.ticker_index = dict()
+
+        # { (action, book_id, ticker_id) : row } for live orders
+        self.rows = dict()
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_size(self):
+        return self.size
+
+    def get_orders(self, action, security_type, model):
+        """
+        This methods returns the live orders of one model portfolio.
+
+        Return
+        ------
+        { 'ticker' : position_type, ... }
+        """
+        _book = self.book_index.get((security_type, model))
+        _orders = dict()
+        if _book is None:
+            return _orders
+        for row in self.select(action, _book):
+            _orders[self.tickers[self.ticker_ids[row]]] = int(self.position_types[row])
+        return _orders
+
+    def get_tickers(self, action):
+        """
+        This methods returns the tickers with a live order, once each.
+        """
+        _ticker_ids = np.unique(self.ticker_ids[self.select(action)])
+        return [self.tickers[i] for i in _ticker_ids]
+
+    def contains(self, action, security_type, model, ticker):
+        _key = (action, self.book_index.get((security_type, model)), self.ticker_index.get(ticker))
+        return _key in self.rows
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def intern_book(self, security_type, model):
+        _key = (security_type, model)
+        if _key not in self.book_index:
+            self.book_index[_key] = len(self.books)
+            self.books.append(_key)
+        return self.book_index[_key]
+
+    def intern_ticker(self, ticker):
+        if ticker not in self.ticker_index:
+            self.ticker_index[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+        return self.ticker_index[ticker]
+
+    def add(self, action, security_type, model, ticker, position_type=0, weight=np.nan):
+        """
+        This method appends an order. An order for the same action,
+        model and ticker replaces the previous one.
+        """
+        _book = self.intern_book(security_type, model)
+        _ticker = self.intern_ticker(ticker)
+        _key = (action, _book, _ticker)
+        if _key in self.rows:
+            self.position_types[self.rows[_key]] = position_type
+            self.weights[self.rows[_key]] = weight
+            return
+
+        if self.size == self.actions.shape[0]:
+            self.grow()
+        self.actions[self.size] = action
+        self.book_ids[self.size] = _book
+        self.ticker_ids[self.size] = _ticker
+        self.position_types[self.size] = position_type
+        self.weights[self.size] = weight
+        self.rows[_key] = self.size
+        self.size += 1
+
+    def cancel(self, action, security_type, model, ticker):
+        _key = (action, self.book_index.get((security_type, model)), self.ticker_index.get(ticker))
+        _row = self.rows.pop(_key, None)
+        if _row is not None:
+            self.actions[_row] = self.CANCELLED
+
+    def grow(self):
+        _capacity = 2 * self.actions.shape[0]
+        for column in ('actions', 'book_ids', 'ticker_ids', 'position_types', 'weights'):
+            _new = np.empty(_capacity, dtype=getattr(self, column).dtype)
+            _new[:self.size] = getattr(self, column)[:self.size]
+            setattr(self, column, _new)
+
+    def select(self, action, book=None):
+        _mask = self.actions[:self.size] == action
+        if book is not None:
+            _mask &= self.book_ids[:self.size] == book
+        return np.flatnonzero(_mask)
+
+    def batches(self, action):
+        """
+        This method groups the live orders of an action per model
+        portfolio, keeping the order they were added in.
+
+        Return
+        ------
+        [ (security_type, model, [tickers], [position_types], [weights]), ... ]
+        """
+        _rows = self.select(action)
+        if _rows.shape[0] == 0:
+            return list()
+        _rows = _rows[np.argsort(self.book_ids[_rows], kind='stable')]
+        _books = self.book_ids[_rows]
+        _splits = np.flatnonzero(np.diff(_books)) + 1
+
+        _batches = list()
+        for _group in np.split(_rows, _splits):
+            security_type, model = self.books[self.book_ids[_group[0]]]
+            _tickers = [self.tickers[i] for i in self.ticker_ids[_group]]
+            _batches.append((
+                security_type,
+                model,
+                _tickers,
+                self.position_types[_group].tolist(),
+                self.weights[_group].tolist()
+            ))
+        return _batches
+
+    def clear(self, action=None):
+        """
+        This method drops executed orders. Without an action the whole
+        queue is emptied.
+        """
+        if action is None:
+            self.size = 0
+            self.rows = dict()
+            return
+        _keep = np.flatnonzero(
+            (self.actions[:self.size] != action) & (self.actions[:self.size] != self.CANCELLED)
+        )
+        for column in ('actions', 'book_ids', 'ticker_ids', 'position_types', 'weights'):
+            getattr(self, column)[:_keep.shape[0]] = getattr(self, column)[_keep]
+        self.size = _keep.shape[0]
+        self.rows = dict()
+        for row in range(self.size):
+            self.rows[(int(self.actions[row]), int(self.book_ids[row]), int(self.ticker_ids[row]))] = row
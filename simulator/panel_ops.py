@@ -0,0 +1,220 @@
+"""
+Cross-sectional and time-series operators over dates x tickers arrays,
+e.g. the fields returned by Model.pull_panel(). Rows are dates (oldest
+first), columns are tickers. NaN means no data and propagates: a ticker
+with NaN is left out of the cross-sectional statistics of its row.
+
+A 1-D array is treated as a single cross-section (one row).
+
+Long the top decile of 12-1 momentum:
+
+    _close = self.pull_panel(253)['close']
+    _momentum = lag(_close, 21)[-1] / _close[0] - 1
+    _buckets = quantile_buckets(_momentum, 10)
+    return make_signals(self.security_universe, long=_buckets == 9, valid=~np.isnan(_momentum))
+"""
+import numpy as np
+
+
+# --------------------------------------------
+#           CROSS-SECTIONAL OPERATORS
+# --------------------------------------------
+def rank(values, pct=False):
+    """
+    Rank of every ticker within its row, 1 for the smallest value. Ties
+    get the average of their ranks.
+
+    Arguments:
+    ----------
+        values - array
+        pct - boolean, ranks divided by the number of tickers with data
+
+    Return
+    ------
+    array of ranks, NaN where values is NaN
+    """
+    _values = np.atleast_2d(np.asarray(values, dtype=float))
+    _shape = _values.shape
+    # NaNs are sorted last
+    _order = np.argsort(_values, axis=1, kind='stable')
+    _sorted = np.take_along_axis(_values, _order, axis=1)
+    _positions = np.broadcast_to(np.arange(_shape[1]), _shape)
+
+    # First and last position of every run of equal values
+    _starts_run = np.ones(_shape, dtype=bool)
+    _starts_run[:, 1:] = _sorted[:, 1:] != _sorted[:, :-1]
+    _ends_run = np.ones(_shape, dtype=bool)
+    _ends_run[:, :-1] = _starts_run[:, 1:]
+    _run_start = np.maximum.accumulate(np.where(_starts_run, _positions, 0), axis=1)
+    _run_end = np.minimum.accumulate(np.where(_ends_run, _positions, _shape[1] - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    _ranks = np.empty(_shape)
+    np.put_along_axis(_ranks, _order, (_run_start + _run_end) / 2 + 1, axis=1)
+    _ranks[np.isnan(_values)] = np.nan
+    if pct:
+        _counts = (~np.isnan(_values)).sum(axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _ranks = _ranks / _counts
+    return _ranks.reshape(np.shape(values))
+
+
+def zscore(values):
+    """
+    (value - mean) / standard deviation of the row (population, ddof=0).
+
+    Return
+    ------
+    array, NaN where values is NaN or the row has no dispersion
+    """
+    _values = np.atleast_2d(np.asarray(values, dtype=float))
+    _mean = _nanmean(_values, axis=1)[:, np.newaxis]
+    _std = np.sqrt(_nanmean((_values - _mean) ** 2, axis=1))[:, np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        _scores = np.where(_std > 0, (_values - _mean) / _std, np.nan)
+    return _scores.reshape(np.shape(values))
+
+
+def quantile_buckets(values, buckets=10):
+    """
+    Bucket of every ticker within its row, 0 for the lowest values and
+    buckets - 1 for the highest (e.g. deciles with buckets=10).
+
+    Return
+    ------
+    float array of buckets, NaN where values is NaN
+    """
+    _pct = rank(values, pct=True)
+    return np.ceil(_pct * buckets) - 1
+
+
+def demean(values):
+    """
+    value - mean of the row, e.g. for market neutral scores.
+    """
+    _values = np.atleast_2d(np.asarray(values, dtype=float))
+    return (_values - _nanmean(_values, axis=1)[:, np.newaxis]).reshape(np.shape(values))
+
+
+# --------------------------------------------
+#           TIME-SERIES OPERATORS
+# --------------------------------------------
+def lag(values, periods=1):
+    """
+    values shifted down periods rows (up for negative periods), the rows
+    shifted in are NaN.
+    """
+    _values = np.asarray(values, dtype=float)
+    _lagged = np.full(_values.shape, np.nan)
+    if periods == 0:
+        _lagged[...] = _values
+    elif abs(periods) < _values.shape[0]:
+        if periods > 0:
+            _lagged[periods:] = _values[:-periods]
+        else:
+            _lagged[:periods] = _values[-periods:]
+    return _lagged
+
+
+def pct_change(values, periods=1):
+    """
+    values / lag(values, periods) - 1, NaN where either side is missing
+    or the lagged value is 0.
+    """
+    _values = np.asarray(values, dtype=float)
+    _lagged = lag(_values, periods)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        _changes = _values / _lagged - 1
+    _changes[~np.isfinite(_changes)] = np.nan
+    return _changes
+
+
+def rolling_mean(values, window, min_periods=None):
+    """
+    Mean of the last window rows (the current one included), computed
+    from cumulative sums so the cost does not depend on window.
+
+    Arguments:
+    ----------
+        values - (dates, tickers) array
+        window - integer, number of rows
+        min_periods - integer, values needed in the window (window if None)
+
+    Return
+    ------
+    array, NaN where the window has less than min_periods values
+    """
+    _sums, _counts = _rolling_sums(values, window)
+    _min_periods = window if min_periods is None else min_periods
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(_counts >= max(_min_periods, 1), _sums[0] / _counts, np.nan)
+
+
+def rolling_std(values, window, min_periods=None):
+    """
+    Sample standard deviation (ddof=1) of the last window rows, see
+    rolling_mean().
+    """
+    _sums, _counts = _rolling_sums(values, window, squares=True)
+    _min_periods = window if min_periods is None else min_periods
+    with np.errstate(divide='ignore', invalid='ignore'):
+        _variance = (_sums[1] - _sums[0] ** 2 / _counts) / (_counts - 1)
+    # Cumulative sums can leave tiny negative variances
+    _variance = np.maximum(_variance, 0)
+    return np.where(_counts >= max(_min_periods, 2), np.sqrt(_variance), np.nan)
+
+
+# --------------------------------------------
+#                 SIGNALS
+# --------------------------------------------
+def make_signals(tickers, long=None, short=None, valid=None, default=0):
+    """
+    This method turns boolean masks over the tickers into the signal
+    dictionary a Model.run() returns.
+
+    Arguments:
+    ----------
+        tickers - list of tickers, the columns of the masks
+        long - bool array, tickers to hold long (1)
+        short - bool array, tickers to hold short (-1)
+        valid - bool array, tickers with data. The others get 404 so
+                a missing bar never closes a position
+        default - signal of the other tickers, 0 closes and 404 keeps
+
+    Return
+    ------
+    { 'ticker' : 1, -1, 0 or 404 }
+    """
+    _signals = np.full(len(tickers), default)
+    if long is not None:
+        _signals[np.asarray(long, dtype=bool)] = 1
+    if short is not None:
+        _signals[np.asarray(short, dtype=bool)] = -1
+    if valid is not None:
+        _signals[~np.asarray(valid, dtype=bool)] = 404
+    return dict(zip(tickers, _signals.tolist()))
+
+
+def _nanmean(values, axis=0):
+    # np.nanmean without the warning on all-NaN slices
+    _valid = ~np.isnan(values)
+    _counts = _valid.sum(axis=axis)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(_counts > 0, np.where(_valid, values, 0).sum(axis=axis) / _counts, np.nan)
+
+
+def _rolling_sums(values, window, squares=False):
+    """
+    Return
+    ------
+    ([sum of the window, sum of squares of the window], count of values in the window)
+    """
+    _values = np.asarray(values, dtype=float)
+    _valid = ~np.isnan(_values)
+    _filled = np.where(_valid, _values, 0)
+    _series = [_filled, _filled ** 2] if squares else [_filled]
+    _sums = list()
+    for series in _series + [_valid.astype(float)]:
+        _cumulative = np.cumsum(series, axis=0)
+        _shifted = lag(_cumulative, window)
+        _sums.append(_cumulative - np.where(np.isnan(_shifted), 0, _shifted))
+    return _sums[:-1], _sums[-1]
@@ -1,4 +1,6 @@
 from custom_exceptions import CUSTOM_EXCEPTIONS
+from price_service import PriceService
+from memory import make_history
 
 class ParentPortfolio:
     def __init__(self):
@@ -13,7 +15,8 @@ class ParentPortfolio:
         #               'model_name:
         #                   {
         #                       'model': obj,
-        #                       'portfolio': obj
+        #                       'portfolio': obj,
+        #                       'universe': DynamicUniverse obj
         #                   },
         #               'model_name_2' : {...},
     #               },
@@ -25,6 +28,15 @@ class ParentPortfolio:
             'oof': dict()
         }
         self.broker = ""
+        self.data_source = None
+        # Daily prices shared by all the model portfolios
+        self.price_service = PriceService()
+        # None keeps the full history, see set_history_limit()
+        self.history_limit = None
+        # Covariance of the equity universe behind the risk limits (opt-in)
+        self.risk_engine = None
+        # Commissions and slippage of the account (opt-in, see costs.py)
+        self.cost_engine = None
 
     # --------------------------------------------
     #                SET METHODS
@@ -34,6 +46,7 @@ class ParentPortfolio:
 
     def set_date(self, date):
         self.date = date
+        self.price_service.set_date(date)
 
     def set_minimum_cash_percentage(self, minimum_cash_percentage):
         self.minimum_cash_percentage = minimum_cash_percentage
@@ -44,6 +57,36 @@ class ParentPortfolio:
             for model in self.models[security_type]:
                 self.models[security_type][model]['portfolio'].set_broker(self.broker)
 
+    def set_history_limit(self, history_limit):
+        self.history_limit = history_limit
+        _pnl = make_history(history_limit)
+        _pnl.extend(self.pnl)
+        self.pnl = _pnl
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                self.models[security_type][model]['portfolio'].set_history_limit(self.history_limit)
+
+    def set_risk_engine(self, risk_engine):
+        self.risk_engine = risk_engine
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                self.models[security_type][model]['portfolio'].set_risk_engine(self.risk_engine)
+
+    def set_cost_engine(self, cost_engine):
+        self.cost_engine = cost_engine
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                self.models[security_type][model]['portfolio'].set_cost_engine(self.cost_engine)
+
+    def set_data_source(self, data_source):
+        self.data_source = data_source
+        self.price_service.set_data_source(self.data_source)
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                self.models[security_type][model]['model'].set_data_source(self.data_source)
+                self.models[security_type][model]['portfolio'].set_data_source(self.data_source)
+                self.models[security_type][model]['portfolio'].set_price_service(self.price_service)
+
     # --------------------------------------------
     #                GET METHODS
     # --------------------------------------------
@@ -68,14 +111,40 @@ class ParentPortfolio:
         return held_securities
 
     def get_security_universe(self):
+        """
+        This method returns the union of the model universes, each
+        ticker listed once per security type.
+        """
         held_securities = dict()
         for security_type in self.models:
             held_securities[security_type] = list()
             for model in self.models[security_type]:
                 held_securities[security_type] += self.models[security_type][model]['portfolio'].get_security_universe()
+            held_securities[security_type] = list(dict.fromkeys(held_securities[security_type]))
 
         return held_securities
 
+    def get_price_service(self):
+        return self.price_service
+
+    def get_risk_engine(self):
+        return self.risk_engine
+
+    def get_cost_engine(self):
+        return self.cost_engine
+
+    def get_price_symbols(self):
+        """
+        Symbols whose price is needed to mark every portfolio to market
+        (held equities, underlyings of held options), once each. Futures
+        are priced from their roll index and add nothing.
+        """
+        _symbols = list()
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                _symbols += self.models[security_type][model]['portfolio'].get_price_symbols()
+        return list(dict.fromkeys(_symbols))
+
     def set_model_start_date(self, start_date):
         for security_type in self.models:
             for model in self.models[security_type]:
@@ -112,11 +181,122 @@ class ParentPortfolio:
 
         self.pnl.append(_models_pnl + self.cash_balance + self.allocated_balance)
 
+    def prefetch_prices(self, tickers):
+        self.price_service.prefetch(tickers)
+
+    def prefetch_open_prices(self, batches):
+        """
+            This method fetches, in one call, the prices needed by the
+            openings of every model.
+
+            Arguments:
+            ----------
+                batches - [(security_type, model, [tickers], ...), ...]
+        """
+        _symbols = list()
+        for batch in batches:
+            _portfolio = self.models[batch[0]][batch[1]]['portfolio']
+            _symbols += _portfolio.get_open_price_symbols(batch[2])
+        self.prefetch_prices(_symbols)
+
+    def get_expired_positions(self):
+        """
+            Return
+            ------
+            [(security_type, model, ticker), ...] held positions that
+            reached their expiry and should be closed
+        """
+        _expired = list()
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                for ticker in self.models[security_type][model]['portfolio'].get_expired_tickers():
+                    _expired.append((security_type, model, ticker))
+        return _expired
+
+    def compile_schedules(self, trading_schedule):
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                self.models[security_type][model]['model'].get_schedule().compile(trading_schedule)
+
+    def get_active_models(self, date_index):
+        """
+            This method returns the models that rebalance on the day.
+
+            Return
+            ------
+            { 'security_type' : [model_name, ...] }
+        """
+        _active = dict()
+        for security_type in self.models:
+            _active[security_type] = list()
+            for model in self.models[security_type]:
+                if self.models[security_type][model]['model'].get_schedule().is_active(date_index):
+                    _active[security_type].append(model)
+        return _active
+
+    def compile_risk_engine(self):
+        # The covariance covers the universe of the equity models
+        if self.risk_engine is None:
+            return
+        self.risk_engine.set_symbols(self.get_security_universe().get('equity', list()))
+        self.set_risk_engine(self.risk_engine)
+
+    def compile_cost_engine(self):
+        # Models added after set_broker() get the broker and the engine
+        self.set_broker(self.broker)
+        if self.cost_engine is not None:
+            self.set_cost_engine(self.cost_engine)
+
+    def compile_portfolios(self, trading_schedule):
+        # e.g. the roll index of the futures portfolios
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                self.models[security_type][model]['portfolio'].compile(trading_schedule)
+
+    def compile_security_universes(self, trading_schedule):
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                self.models[security_type][model]['universe'].compile(trading_schedule)
+
+    def update_security_universes(self, date_index):
+        """
+            This method hands every model and model portfolio the symbols
+            that are live on the trading day. Lists are only rebuilt on
+            days where membership changes.
+
+            Return
+            ------
+            [(security_type, model, ticker), ...] held tickers that
+            dropped out of their universe and should be closed
+        """
+        _dropped = list()
+        for security_type in self.models:
+            for model in self.models[security_type]:
+                _universe = self.models[security_type][model]['universe']
+                if not _universe.has_changed(date_index):
+                    continue
+                _members = _universe.get_members(date_index)
+                self.models[security_type][model]['model'].set_security_universe(_members)
+                self.models[security_type][model]['portfolio'].set_security_universe(_members)
+                _portfolio = self.models[security_type][model]['portfolio']
+                for ticker in _portfolio.get_all_tickers():
+                    if not _universe.is_member(_portfolio.get_universe_symbol(ticker), date_index):
+                        _dropped.append((security_type, model, ticker))
+        return _dropped
+
     def update_relevant(self):
         """
             This method updates the relevant information on market open.
-            For example, the current price for an equity.
+            For example, the current price for an equity. The tickers
+            held by all models are fetched once before the portfolios
+            read them from the price service.
         """
+        _symbols = self.get_price_symbols()
+        if self.risk_engine is not None:
+            _symbols = list(dict.fromkeys(_symbols + self.risk_engine.get_symbols()))
+        self.prefetch_prices(_symbols)
+        if self.risk_engine is not None:
+            self.risk_engine.update(self.price_service.get_open_prices(self.risk_engine.get_symbols()))
         for security_type in self.models:
             for model in self.models[security_type]:
                 self.models[security_type][model]['portfolio'].update_relevant()
@@ -126,15 +306,16 @@ class ParentPortfolio:
     # --------------------------------------------
 
     def close_position(self, security_type, model, ticker):
-        error = True
-        _securities = self.models[security_type][model]['portfolio'].get_all_tickers()
-        if ticker in _securities:
-            _pnl_from_position = self.models[security_type][model]['portfolio'].close_position(ticker)
-            self.allocated_balance += _pnl_from_position
-            error = False
+        self.close_positions(security_type, model, [ticker])
 
-        if error:
-            raise CUSTOM_EXCEPTIONS['closing_security_issue'](ticker)
+    def close_positions(self, security_type, model, tickers):
+        # Grabs the portfolio once and hands it the whole batch of closes
+        _portfolio = self.models[security_type][model]['portfolio']
+        for ticker in tickers:
+            if not _portfolio.has_security(ticker):
+                raise CUSTOM_EXCEPTIONS['closing_security_issue'](ticker)
+        _pnl_from_positions = _portfolio.close_positions(tickers)
+        self.allocated_balance += _pnl_from_positions
 
     def open_position(self, security_type, model, ticker, security_info):
         # Grabs the correct model using the security_type and model parameters
@@ -142,6 +323,11 @@ class ParentPortfolio:
         # The overhead of opening is led by the Model Portfolio
         self.models[security_type][model]['portfolio'].open_position(ticker, security_info)
 
+    def open_positions(self, security_type, model, positions):
+        # Same as open_position but hands the whole batch of the model
+        # to its portfolio in one call
+        self.models[security_type][model]['portfolio'].open_positions(positions)
+
     def allocate_all_cash(self, max_percentage):
         _portfolio_cash_balance = self.cash_balance
         _to_distribute = int(_portfolio_cash_balance*(1-self.minimum_cash_percentage))
@@ -162,7 +348,9 @@ class ParentPortfolio:
                 self.models[security_type][model]['portfolio'].set_cash_balance(_to_allocate)
                 self.models[security_type][model]['portfolio'].set_maximum_percentage_single_security(_max_allowed_single_security)
 
-    def compute_position_distribution(self):
-        for security_type in self.models:
-            for model in self.models[security_type]:
+    def compute_position_distribution(self, active_models=None):
+        if active_models is None:
+            active_models = self.models
+        for security_type in active_models:
+            for model in active_models[security_type]:
                 self.models[security_type][model]['portfolio'].compute_position_distribution()
\ No newline at end of file
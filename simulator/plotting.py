@@ -0,0 +1,162 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def lttb(values, threshold, x=None):
+    """
+    Largest-Triangle-Three-Buckets downsampling (Steinarsson, 2013).
+    Keeps the first and last points and, in each bucket, the point
+    making the largest triangle with the previous kept point and the
+    average of the next bucket, so peaks and drawdowns survive.
+
+    Arguments:
+    ----------
+        values - array of y values
+        threshold - number of points to keep
+        x - array of x values (0..n-1 if None)
+
+    Return
+    ------
+    indices of the kept points (sorted)
+    """
+    _y = np.asarray(values, dtype=float)
+    _number_of_points = _y.shape[0]
+    if threshold >= _number_of_points or threshold < 3:
+        return np.arange(_number_of_points)
+    _x = np.arange(_number_of_points, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    # Buckets of the points between the first and the last one
+    _edges = np.floor(np.linspace(1, _number_of_points - 1, threshold - 1)).astype(int)
+    _kept = np.zeros(threshold, dtype=int)
+    _kept[-1] = _number_of_points - 1
+    _previous = 0
+    for i in range(threshold - 2):
+        _start, _end = _edges[i], _edges[i + 1]
+        _next_start = _end
+        _next_end = _edges[i + 2] if i + 2 < threshold - 1 else _number_of_points
+        _average_x = _x[_next_start:_next_end].mean()
+        _average_y = _y[_next_start:_next_end].mean()
+        # Twice the triangle areas of every candidate in the bucket
+        _areas = np.abs(
+            (_x[_previous] - _average_x) * (_y[_start:_end] - _y[_previous])
+            - (_x[_previous] - _x[_start:_end]) * (_average_y - _y[_previous])
+        )
+        _previous = _start + int(np.nanargmax(_areas)) if not np.isnan(_areas).all() else _start
+        _kept[i + 1] = _previous
+    return _kept
+
+
+def get_result_curves(simulator, models=True):
+    """
+    This method collects the value curves of a finished simulation.
+
+    Return
+    ------
+    { 'dates' : array of datetime64, 'curves' : { 'parent' : array, 'model_name' : array, ... } }
+    """
+    _curves = {'parent': np.asarray(list(simulator.portfolio.pnl), dtype=float)}
+    if models:
+        for security_type in simulator.portfolio.models:
+            for model in simulator.portfolio.models[security_type]:
+                _values = simulator.portfolio.models[security_type][model]['portfolio'].get_value_historical()
+                _curves[model] = np.asarray(list(_values), dtype=float)
+    _dates = np.array(simulator.trading_schedule, dtype='datetime64[D]')
+    return {'dates': _dates, 'curves': _curves}
+
+
+def downsample_curves(result, max_points=2000):
+    """
+    This method downsamples every curve of a result (see
+    get_result_curves) with LTTB. Curves shorter than the calendar,
+    e.g. in bounded-history mode, are aligned on its last dates.
+    """
+    _dates = result['dates']
+    _curves = dict()
+    for name in result['curves']:
+        _values = result['curves'][name]
+        if _values.shape[0] == 0:
+            continue
+        _curve_dates = _dates[-_values.shape[0]:] if _dates.shape[0] >= _values.shape[0] else None
+        _x = _curve_dates.astype(float) if _curve_dates is not None else None
+        _kept = lttb(_values, max_points, _x)
+        _curves[name] = (
+            _curve_dates[_kept] if _curve_dates is not None else _kept,
+            _values[_kept]
+        )
+    return _curves
+
+
+def render_curves(curves, path, title=None, width=12, height=6, dpi=100):
+    """
+    This method draws already downsampled curves and writes the file
+    at path (.png, .svg, .pdf, ...) without going through pyplot, so
+    it works on headless machines and in worker processes.
+
+    Arguments:
+    ----------
+        curves - { 'name' : (x, y) }, 'parent' is drawn on top
+        path - string
+
+    Return
+    ------
+    path
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    _figure = Figure(figsize=(width, height), dpi=dpi)
+    FigureCanvasAgg(_figure)
+    _axes = _figure.add_subplot(1, 1, 1)
+    for name in curves:
+        if name == 'parent':
+            continue
+        _axes.plot(curves[name][0], curves[name][1], linewidth=0.8, alpha=0.8, label=name)
+    if 'parent' in curves:
+        _axes.plot(curves['parent'][0], curves['parent'][1], linewidth=1.6, color='black', label='parent')
+    if title is not None:
+        _axes.set_title(title)
+    _axes.set_ylabel('value')
+    _axes.grid(True, alpha=0.3)
+    if len(curves) > 1:
+        _axes.legend(loc='best', fontsize='small')
+    _figure.autofmt_xdate()
+    _figure.savefig(path)
+    return path
+
+
+def _render_job(job):
+    return render_curves(**job)
+
+
+def render_sweep(results, directory, file_format='png', max_points=2000, processes=None, **kwargs):
+    """
+    This method renders the results of a whole sweep, one file per
+    run, across a process pool. Curves are downsampled before being
+    handed to the workers so only a few thousand points are pickled.
+
+    Arguments:
+    ----------
+        results - { 'run_name' : result of get_result_curves() }
+        directory - string, folder the files are written to
+        file_format - 'png', 'svg', ...
+        processes - integer, number of workers (os.cpu_count() if None)
+
+    Return
+    ------
+    { 'run_name' : path }
+    """
+    os.makedirs(directory, exist_ok=True)
+    _jobs = dict()
+    for name in results:
+        _jobs[name] = dict(
+            curves=downsample_curves(results[name], max_points),
+            path=os.path.join(directory, f"{name}.{file_format}"),
+            title=str(name),
+            **kwargs
+        )
+    if processes == 1 or len(_jobs) <= 1:
+        return {name: _render_job(_jobs[name]) for name in _jobs}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        _paths = executor.map(_render_job, list(_jobs.values()))
+        return dict(zip(_jobs, _paths))
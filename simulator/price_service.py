@@ -0,0 +1,93 @@
+class PriceService:
+    """
+    This class is the object representation of the daily price cache
+    shared by every model portfolio. The ParentPortfolio owns one
+    service, all portfolios ask it for prices and every symbol is
+    fetched from the data source at most once a day, however many
+    models hold or trade it.
+
+    Functionalities:
+    - Deduplicate the symbols needed by all models
+    - Fetch the missing ones in a single batch call
+    - Share the prices of the day with every portfolio
+    """
+    def __init__(self):
+        self.data_source = None
+        self.date = None
+        # { 'ticker' : open_price } for self.date
+        self.prices = dict()
+        # Symbols the data source had no price for on self.date
+        self.missing = set()
+        # Number of calls made to the data source and symbols asked for
+        self.requests = 0
+        self.symbols_requested = 0
+
+    # --------------------------------------------
+    #               SET METHODS
+    # --------------------------------------------
+    def set_data_source(self, data_source):
+        self.data_source = data_source
+        self.prices = dict()
+        self.missing = set()
+
+    def set_date(self, date):
+        # Prices are only valid for one day
+        if date != self.date:
+            self.prices = dict()
+            self.missing = set()
+        self.date = date
+
+    def set_prices(self, prices):
+        """
+        This method stores prices that came from somewhere else (for
+        example the current bar in intraday mode) for the current date.
+        """
+        self.prices.update(prices)
+        self.missing.difference_update(prices)
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_open_prices(self, symbols):
+        """
+        This method returns the open price of the symbols for the
+        current date, fetching the ones not seen yet today in one call.
+
+        Return
+        ------
+        { 'ticker' : open_price } (symbols without data are omitted)
+        """
+        self.prefetch(symbols)
+        _open_prices = dict()
+        for symbol in symbols:
+            if symbol in self.prices:
+                _open_prices[symbol] = self.prices[symbol]
+        return _open_prices
+
+    def get_open_price(self, symbol):
+        return self.get_open_prices([symbol]).get(symbol)
+
+    def get_requests(self):
+        return self.requests
+
+    def get_symbols_requested(self):
+        return self.symbols_requested
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def prefetch(self, symbols):
+        _to_fetch = list()
+        for symbol in dict.fromkeys(symbols):
+            if symbol not in self.prices and symbol not in self.missing:
+                _to_fetch.append(symbol)
+        if len(_to_fetch) == 0:
+            return
+
+        _open_prices = self.data_source.get_open_prices(_to_fetch, self.date)
+        self.requests += 1
+        self.symbols_requested += len(_to_fetch)
+        self.prices.update(_open_prices)
+        for symbol in _to_fetch:
+            if symbol not in _open_prices:
+                self.missing.add(symbol)
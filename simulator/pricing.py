@@ -0,0 +1,90 @@
+import numpy as np
+
+try:
+    from scipy.special import ndtr as _normal_cdf
+except ImportError:
+    _normal_cdf = None
+
+
+def normal_cdf(x):
+    """
+    Standard normal CDF, elementwise. Uses scipy when installed and a
+    rational approximation (Abramowitz & Stegun 26.2.17, error < 7.5e-8)
+    otherwise.
+    """
+    if _normal_cdf is not None:
+        return _normal_cdf(x)
+    _x = np.asarray(x, dtype=float)
+    _t = 1 / (1 + 0.2316419 * np.abs(_x))
+    _poly = _t * (0.319381530 + _t * (-0.356563782 + _t * (1.781477937 + _t * (-1.821255978 + _t * 1.330274429))))
+    _upper = 1 - normal_pdf(_x) * _poly
+    return np.where(_x >= 0, _upper, 1 - _upper)
+
+
+def normal_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / np.sqrt(2 * np.pi)
+
+
+def black_scholes(spot, strike, time, rate, volatility, is_call, dividend_yield=0.0):
+    """
+    Black-Scholes price and Greeks of European options. Every argument
+    can be an array, they are broadcast together so a whole chain (or
+    every held contract) is priced in one pass.
+
+    Arguments:
+    ----------
+        spot - underlying price
+        strike - strike price
+        time - time to expiry in years (0 or less means expired)
+        rate - continuously compounded risk free rate
+        volatility - annualized volatility
+        is_call - boolean, True for calls and False for puts
+        dividend_yield - continuous dividend yield
+
+    Return
+    ------
+    { 'price', 'delta', 'gamma', 'vega', 'theta', 'rho' }
+    vega and rho are per 1.00 change, theta is per year
+    """
+    _spot, _strike, _time, _rate, _volatility, _is_call, _dividend = np.broadcast_arrays(
+        *[np.asarray(i, dtype=float) for i in (spot, strike, time, rate, volatility, is_call, dividend_yield)]
+    )
+    _is_call = _is_call.astype(bool)
+    _live = (_time > 0) & (_volatility > 0)
+
+    # Dummy values where expired so nothing divides by zero
+    _safe_time = np.where(_live, _time, 1.0)
+    _safe_volatility = np.where(_live, _volatility, 1.0)
+    _sqrt_time = np.sqrt(_safe_time)
+    _d1 = (np.log(_spot / _strike) + (_rate - _dividend + 0.5 * _safe_volatility ** 2) * _safe_time) / (_safe_volatility * _sqrt_time)
+    _d2 = _d1 - _safe_volatility * _sqrt_time
+
+    _spot_discount = np.exp(-_dividend * _safe_time)
+    _strike_discount = np.exp(-_rate * _safe_time)
+    _sign = np.where(_is_call, 1.0, -1.0)
+    _n_d1 = normal_cdf(_sign * _d1)
+    _n_d2 = normal_cdf(_sign * _d2)
+    _pdf_d1 = normal_pdf(_d1)
+
+    _price = _sign * (_spot * _spot_discount * _n_d1 - _strike * _strike_discount * _n_d2)
+    _delta = _sign * _spot_discount * _n_d1
+    _gamma = _spot_discount * _pdf_d1 / (_spot * _safe_volatility * _sqrt_time)
+    _vega = _spot * _spot_discount * _pdf_d1 * _sqrt_time
+    _theta = (
+        -_spot * _spot_discount * _pdf_d1 * _safe_volatility / (2 * _sqrt_time)
+        - _sign * _rate * _strike * _strike_discount * _n_d2
+        + _sign * _dividend * _spot * _spot_discount * _n_d1
+    )
+    _rho = _sign * _strike * _safe_time * _strike_discount * _n_d2
+
+    # Expired (or zero volatility) contracts are worth their intrinsic value
+    _intrinsic = np.maximum(_sign * (_spot - _strike), 0)
+    _in_the_money = (_sign * (_spot - _strike)) > 0
+    return {
+        'price': np.where(_live, _price, _intrinsic),
+        'delta': np.where(_live, _delta, np.where(_in_the_money, _sign, 0.0)),
+        'gamma': np.where(_live, _gamma, 0.0),
+        'vega': np.where(_live, _vega, 0.0),
+        'theta': np.where(_live, _theta, 0.0),
+        'rho': np.where(_live, _rho, 0.0)
+    }
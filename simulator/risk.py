@@ -0,0 +1,235 @@
+import numpy as np
+from custom_exceptions import CUSTOM_EXCEPTIONS
+
+
+class RiskEngine:
+    """
+    This class is the object representation of the risk model used by
+    the position limits. It keeps the covariance of the daily returns
+    of the universe up to date with one rank-1 update per day, so the
+    cost of a day is O(n^2) instead of rebuilding the matrix from the
+    whole window.
+
+    Methods:
+    - 'ewma'     exponentially weighted (RiskMetrics, zero mean)
+                 cov = decay * cov + (1 - decay) * r r'
+    - 'window'   sample covariance of the last window returns, the
+                 oldest return is removed as the new one is added
+
+    Limits (None disables them), checked when positions are opened:
+    - max_volatility         annualized volatility of the model portfolio
+    - max_risk_contribution  share of the portfolio variance coming from
+                             a single position
+    """
+    METHODS = ('ewma', 'window')
+
+    def __init__(self, method='ewma', decay=0.94, window=60, periods_per_year=252):
+        if method not in self.METHODS:
+            raise CUSTOM_EXCEPTIONS['unknown_choice']('covariance method', method, self.METHODS)
+        self.method = method
+        self.decay = decay
+        self.window = window
+        self.periods_per_year = periods_per_year
+        # Checks are skipped until the covariance has this many returns
+        self.minimum_observations = 20
+        self.max_volatility = None
+        self.max_risk_contribution = None
+        self.set_symbols(list())
+
+    # --------------------------------------------
+    #               SET METHODS
+    # --------------------------------------------
+    def set_symbols(self, symbols):
+        """
+        This method (re)starts the engine on a list of symbols.
+        """
+        self.symbols = list(dict.fromkeys(symbols))
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        _number_of_symbols = len(self.symbols)
+        self.covariance = np.zeros((_number_of_symbols, _number_of_symbols))
+        self.last_prices = np.full(_number_of_symbols, np.nan)
+        self.observations = 0
+        # Buffer reused by the rank-1 updates
+        self.outer = np.zeros((_number_of_symbols, _number_of_symbols))
+        if self.method == 'window':
+            self.returns = np.zeros((self.window, _number_of_symbols))
+            self.sum_returns = np.zeros(_number_of_symbols)
+            self.sum_outer = np.zeros((_number_of_symbols, _number_of_symbols))
+
+    def set_limits(self, max_volatility=None, max_risk_contribution=None):
+        self.max_volatility = max_volatility
+        self.max_risk_contribution = max_risk_contribution
+
+    def set_minimum_observations(self, minimum_observations):
+        self.minimum_observations = minimum_observations
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_symbols(self):
+        return self.symbols
+
+    def get_covariance(self):
+        return self.covariance
+
+    def get_ids(self, tickers):
+        """
+        Return
+        ------
+        (ids, known) ids in the covariance and the mask of the tickers
+        the engine knows
+        """
+        _ids = np.array([self.symbol_ids.get(ticker, -1) for ticker in tickers], dtype=int)
+        return np.maximum(_ids, 0), _ids >= 0
+
+    def get_portfolio_variance(self, weights):
+        """
+        Arguments:
+        ----------
+            weights - { 'ticker' : weight }, signed (short is negative)
+
+        Return
+        ------
+        daily variance of the portfolio (tickers not known are ignored)
+        """
+        _ids, _weights = self.get_weights(weights)
+        return float(_weights @ self.covariance[np.ix_(_ids, _ids)] @ _weights)
+
+    def get_marginal_contributions(self, weights):
+        """
+        Return
+        ------
+        { 'ticker' : d(volatility)/d(weight) }, daily, for the known tickers
+        """
+        _ids, _weights = self.get_weights(weights)
+        _known = [ticker for ticker in weights if ticker in self.symbol_ids]
+        _covariance_weights = self.covariance[np.ix_(_ids, _ids)] @ _weights
+        _volatility = np.sqrt(max(float(_weights @ _covariance_weights), 0))
+        if _volatility == 0:
+            return {ticker: 0.0 for ticker in _known}
+        return {ticker: _covariance_weights[i] / _volatility for i, ticker in enumerate(_known)}
+
+    def get_weights(self, weights):
+        _known = [ticker for ticker in weights if ticker in self.symbol_ids]
+        _ids = np.array([self.symbol_ids[ticker] for ticker in _known], dtype=int)
+        return _ids, np.array([weights[ticker] for ticker in _known], dtype=float)
+
+    def is_ready(self):
+        return self.observations >= self.minimum_observations
+
+    # --------------------------------------------
+    #               UPDATE METHODS
+    # --------------------------------------------
+    def update(self, prices):
+        """
+        This method adds the day's returns to the covariance with a
+        rank-1 update. Symbols without a price today (or yesterday)
+        count as a zero return.
+
+        Arguments:
+        ----------
+            prices - { 'symbol' : price }
+        """
+        _prices = np.full(len(self.symbols), np.nan)
+        for symbol in prices:
+            if symbol in self.symbol_ids:
+                _prices[self.symbol_ids[symbol]] = prices[symbol]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _returns = _prices / self.last_prices - 1
+        _returns[~np.isfinite(_returns)] = 0
+        _first_day = np.isnan(self.last_prices).all()
+        self.last_prices = np.where(np.isnan(_prices), self.last_prices, _prices)
+        if _first_day:
+            # Nothing to compute a return against yet
+            return
+
+        np.multiply.outer(_returns, _returns, out=self.outer)
+        if self.method == 'ewma':
+            self.covariance *= self.decay
+            self.outer *= 1 - self.decay
+            self.covariance += self.outer
+            self.observations += 1
+            return
+
+        # Window: add the new return, drop the one leaving the window
+        _slot = self.observations % self.window
+        self.sum_outer += self.outer
+        self.sum_returns += _returns
+        if self.observations >= self.window:
+            _old = self.returns[_slot]
+            np.multiply.outer(_old, _old, out=self.outer)
+            self.sum_outer -= self.outer
+            self.sum_returns -= _old
+        self.returns[_slot] = _returns
+        self.observations += 1
+
+        _count = min(self.observations, self.window)
+        if _count > 1:
+            _mean = self.sum_returns / _count
+            np.multiply.outer(_mean, _mean, out=self.outer)
+            self.outer *= _count
+            np.subtract(self.sum_outer, self.outer, out=self.covariance)
+            self.covariance /= _count - 1
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def check_openings(self, held_weights, tickers, weights):
+        """
+        This method checks the positions a portfolio is about to open
+        against the limits, the whole batch at once. The limits are
+        checked on the portfolio after the batch (holdings + candidates)
+        and, while one is broken, the worst candidate is dropped:
+
+        - a candidate over max_risk_contribution, the largest share first
+        - then, over max_volatility, the candidate adding the most
+          variance, w_c * (cov w)_c
+
+        cov w is computed once and updated as candidates are dropped.
+        A portfolio of a single position is only held to max_volatility.
+
+        Arguments:
+        ----------
+            held_weights - { 'ticker' : weight } of the current holdings
+            tickers - list of the tickers to open
+            weights - array of their signed weights
+
+        Return
+        ------
+        bool array, False for the candidates dropped
+        """
+        _allowed = np.ones(len(tickers), dtype=bool)
+        if not self.is_ready() or (self.max_volatility is None and self.max_risk_contribution is None):
+            return _allowed
+
+        _candidate_ids, _known = self.get_ids(tickers)
+        _candidate_weights = np.where(_known, np.asarray(weights, dtype=float), 0)
+        _held_ids, _held_weights = self.get_weights(held_weights)
+
+        # Weights of the portfolio after the batch
+        _weights = np.zeros(len(self.symbols))
+        np.add.at(_weights, _held_ids, _held_weights)
+        np.add.at(_weights, _candidate_ids, _candidate_weights)
+        _covariance_weights = self.covariance @ _weights
+        _active = _known & (_candidate_weights != 0)
+
+        while _active.any():
+            _variance = float(_weights @ _covariance_weights)
+            _contribution = np.where(_active, _candidate_weights * _covariance_weights[_candidate_ids], -np.inf)
+            _worst = None
+            if self.max_risk_contribution is not None and _variance > 0 and np.count_nonzero(_weights) > 1:
+                _share = _contribution / _variance
+                if _share.max() > self.max_risk_contribution:
+                    _worst = int(np.argmax(_share))
+            if _worst is None and self.max_volatility is not None:
+                if np.sqrt(max(_variance, 0) * self.periods_per_year) > self.max_volatility:
+                    _worst = int(np.argmax(_contribution))
+            if _worst is None:
+                break
+            # Drop the candidate: rank-1 update of cov w
+            _id = _candidate_ids[_worst]
+            _covariance_weights -= self.covariance[:, _id] * _candidate_weights[_worst]
+            _weights[_id] -= _candidate_weights[_worst]
+            _active[_worst] = False
+            _allowed[_worst] = False
+        return _allowed
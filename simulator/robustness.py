@@ -0,0 +1,166 @@
+import numpy as np
+from custom_exceptions import CUSTOM_EXCEPTIONS
+
+
+METRICS = ('sharpe', 'max_drawdown', 'total_return', 'volatility')
+
+
+class RobustnessEngine:
+    """
+    This class is the object representation of the Monte Carlo /
+    bootstrap analysis run on the daily returns of a finished
+    simulation. Resampled paths are generated as one 2-D array
+    (paths x days) and every metric is computed across all paths at
+    once, chunk by chunk so memory stays bounded.
+
+    Methods:
+    - 'stationary' stationary bootstrap, geometric block lengths (Politis-Romano)
+    - 'block'      circular block bootstrap, fixed block length
+    - 'iid'        day by day bootstrap
+    - 'shuffle'    random permutation of the days (no replacement)
+    """
+    METHODS = ('stationary', 'block', 'iid', 'shuffle')
+
+    def __init__(self, returns, periods_per_year=252):
+        self.returns = np.asarray(returns, dtype=float)
+        self.returns = self.returns[~np.isnan(self.returns)]
+        self.periods_per_year = periods_per_year
+        self.method = 'stationary'
+        self.block_size = 20
+        self.chunk_size = 1000
+        self.seed = None
+
+    # --------------------------------------------
+    #               SET METHODS
+    # --------------------------------------------
+    def set_method(self, method):
+        if method not in self.METHODS:
+            raise CUSTOM_EXCEPTIONS['unknown_choice']('resampling method', method, self.METHODS)
+        self.method = method
+
+    def set_block_size(self, block_size):
+        self.block_size = block_size
+
+    def set_chunk_size(self, chunk_size):
+        self.chunk_size = chunk_size
+
+    def set_seed(self, seed):
+        self.seed = seed
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def resample_indices(self, rng, number_of_paths):
+        """
+        Returns a (number_of_paths x days) array of day indices.
+        """
+        _days = self.returns.shape[0]
+        if self.method == 'iid':
+            return rng.integers(0, _days, size=(number_of_paths, _days), dtype=np.int32)
+        if self.method == 'shuffle':
+            return np.argsort(rng.random((number_of_paths, _days)), axis=1)
+        if self.method == 'block':
+            _blocks = -(-_days // self.block_size)
+            _starts = rng.integers(0, _days, size=(number_of_paths, _blocks, 1), dtype=np.int32)
+            _indices = (_starts + np.arange(self.block_size)) % _days
+            return _indices.reshape(number_of_paths, -1)[:, :_days]
+
+        # stationary: a new block starts on each day with probability 1/block_size
+        _new_block = rng.random((number_of_paths, _days)) < 1 / self.block_size
+        _new_block[:, 0] = True
+        _steps = np.arange(_days, dtype=np.int32)
+        _block_start = np.maximum.accumulate(np.where(_new_block, _steps, 0), axis=1)
+        _random_starts = rng.integers(0, _days, size=(number_of_paths, _days), dtype=np.int32)
+        _first_index = np.take_along_axis(_random_starts, _block_start, axis=1)
+        return (_first_index + _steps - _block_start) % _days
+
+    def generate_paths(self, number_of_paths):
+        """
+        This method yields the resampled return paths, chunk_size
+        paths at a time.
+        """
+        _rng = np.random.default_rng(self.seed)
+        _done = 0
+        while _done < number_of_paths:
+            _size = min(self.chunk_size, number_of_paths - _done)
+            yield self.returns[self.resample_indices(_rng, _size)]
+            _done += _size
+
+    def compute_metrics(self, paths, metrics=METRICS):
+        """
+        This method computes the metrics of every path (rows of paths).
+
+        Return
+        ------
+        { 'metric' : array of one value per path }
+        """
+        _results = dict()
+        _mean = paths.mean(axis=1)
+        _std = paths.std(axis=1, ddof=1)
+        _wealth = None
+        if 'max_drawdown' in metrics or 'total_return' in metrics:
+            _wealth = np.cumprod(1 + paths, axis=1)
+        for metric in metrics:
+            if metric == 'sharpe':
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    _results[metric] = np.where(_std > 0, _mean / _std, np.nan) * np.sqrt(self.periods_per_year)
+            elif metric == 'volatility':
+                _results[metric] = _std * np.sqrt(self.periods_per_year)
+            elif metric == 'total_return':
+                _results[metric] = _wealth[:, -1] - 1
+            elif metric == 'max_drawdown':
+                _peak = np.maximum(np.maximum.accumulate(_wealth, axis=1), 1)
+                _results[metric] = (_wealth / _peak - 1).min(axis=1)
+            else:
+                raise CUSTOM_EXCEPTIONS['unknown_choice']('metric', metric, METRICS)
+        return _results
+
+    def run(self, number_of_paths=10000, metrics=METRICS, confidence=0.95):
+        """
+        This method resamples number_of_paths paths and summarizes the
+        distribution of every metric.
+
+        Return
+        ------
+        { 'metric' : {'observed', 'mean', 'lower', 'upper', 'values'} }
+        lower/upper bound the two-sided confidence interval, NaN (and
+        no values) when there are less than 2 returns
+        """
+        if self.returns.shape[0] < 2:
+            # Nothing to resample, e.g. a run of a single day
+            return {
+                metric: {'observed': np.nan, 'mean': np.nan, 'lower': np.nan, 'upper': np.nan, 'values': np.zeros(0)}
+                for metric in metrics
+            }
+        _values = {metric: list() for metric in metrics}
+        for paths in self.generate_paths(number_of_paths):
+            _chunk = self.compute_metrics(paths, metrics)
+            for metric in metrics:
+                _values[metric].append(_chunk[metric])
+
+        _observed = self.compute_metrics(self.returns[np.newaxis, :], metrics)
+        _alpha = (1 - confidence) / 2
+        _summary = dict()
+        for metric in metrics:
+            _all = np.concatenate(_values[metric])
+            _summary[metric] = {
+                'observed': _observed[metric][0],
+                'mean': np.nanmean(_all),
+                'lower': np.nanquantile(_all, _alpha),
+                'upper': np.nanquantile(_all, 1 - _alpha),
+                'values': _all
+            }
+        return _summary
+
+
+def returns_from_values(values):
+    """
+    Daily simple returns of an equity curve (e.g. ParentPortfolio.pnl).
+    """
+    _values = np.asarray(list(values), dtype=float)
+    if _values.shape[0] < 2:
+        return np.zeros(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        _returns = np.diff(_values) / _values[:-1]
+    _returns[~np.isfinite(_returns)] = np.nan
+    return _returns
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+
+class RollIndex:
+    """
+    This class is the object representation of the continuous
+    contracts of a set of futures roots. Everything is compiled once
+    against the trading schedule so that, during the simulation, the
+    front contract, its price and the roll adjustments of any day are
+    array lookups:
+
+        contract_ids  (n_dates, n_roots) int32, index in contracts (-1: none)
+        prices        (n_dates, n_roots) open of the front contract
+        roll_gaps     (n_dates, n_roots) new - old contract open on roll days, 0 otherwise
+        adjustments   (n_dates, n_roots) back-adjustment, sum of the later roll gaps
+
+    The front contract is rolled roll_days trading days before its
+    expiry. prices + adjustments is the back-adjusted continuous series.
+    """
+    def __init__(self, roll_days=5):
+        self.roll_days = roll_days
+        self.roots = list()
+        self.root_ids = dict()
+        self.dates = np.zeros(0, dtype='S10')
+        self.date_ids = dict()
+        self.contracts = list()
+        self.contract_ids = None
+        self.prices = None
+        self.roll_gaps = None
+        self.adjustments = None
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_roots(self):
+        return self.roots
+
+    def get_root_ids(self, roots):
+        return np.array([self.root_ids[i] for i in roots], dtype=int)
+
+    def get_date_index(self, date):
+        # None for dates outside of the compiled schedule
+        return self.date_ids.get(str(date).split()[0])
+
+    def get_contract(self, root, date_index):
+        _id = self.contract_ids[date_index, self.root_ids[root]]
+        return self.contracts[_id] if _id >= 0 else None
+
+    def get_prices(self, roots, date_index):
+        return self.prices[date_index, self.get_root_ids(roots)]
+
+    def get_roll_gaps(self, roots, date_index):
+        return self.roll_gaps[date_index, self.get_root_ids(roots)]
+
+    def get_continuous_prices(self, root):
+        """
+        Return
+        ------
+        Series of the back-adjusted open prices of the root, by date
+        """
+        _id = self.root_ids[root]
+        return pd.Series(
+            self.prices[:, _id] + self.adjustments[:, _id],
+            index=[i.decode() for i in self.dates]
+        )
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def compile(self, trading_schedule, contracts, data_source):
+        """
+        Arguments:
+        ----------
+            trading_schedule - list of 'YYYY-MM-DD' strings
+            contracts - { 'root' : DataFrame with the columns symbol and expiry }
+            data_source - DataSource the contract bars are pulled from
+        """
+        self.roots = list(contracts)
+        self.root_ids = {root: i for i, root in enumerate(self.roots)}
+        self.dates = np.array(trading_schedule, dtype='S10')
+        self.date_ids = {date: i for i, date in enumerate(trading_schedule)}
+        _number_of_dates = self.dates.shape[0]
+
+        self.contracts = list()
+        self.contract_ids = np.full((_number_of_dates, len(self.roots)), -1, dtype=np.int32)
+        _steps = np.arange(_number_of_dates)
+        for root in self.roots:
+            _frame = contracts[root].copy()
+            _frame['expiry'] = [str(i).split()[0] for i in _frame['expiry']]
+            _frame = _frame.sort_values('expiry').reset_index(drop=True)
+            # Trading day the front contract is rolled out of
+            _expiries = np.array(_frame['expiry'].values, dtype='S10')
+            _expiry_index = np.searchsorted(self.dates, _expiries)
+            if _number_of_dates != 0:
+                # Expiries after the schedule are counted in business days past its end
+                _after = _expiries > self.dates[-1]
+                _expiry_index[_after] = _number_of_dates - 1 + np.busday_count(
+                    self.dates[-1].decode(), _expiries[_after].astype(str).astype('datetime64[D]')
+                )
+            _roll_index = _expiry_index - self.roll_days
+            # Front contract: the first one not rolled yet
+            _front = np.searchsorted(_roll_index, _steps, side='right')
+            _live = _front < _frame.shape[0]
+            self.contract_ids[_live, self.root_ids[root]] = _front[_live] + len(self.contracts)
+            self.contracts += list(_frame['symbol'].values)
+
+        self.compile_prices(data_source)
+
+    def compile_prices(self, data_source):
+        """
+        This method pulls the bars of every contract in one batch call
+        and builds the front contract prices and the roll adjustments.
+        """
+        _number_of_dates = self.dates.shape[0]
+        _shape = (_number_of_dates, len(self.roots))
+        self.prices = np.full(_shape, np.nan)
+        self.roll_gaps = np.zeros(_shape)
+        self.adjustments = np.zeros(_shape)
+        if _number_of_dates == 0 or len(self.contracts) == 0:
+            return
+
+        # opens[date_index, contract_id]
+        _opens = np.full((_number_of_dates, len(self.contracts)), np.nan)
+        _data = data_source.get_batch_price_time_bars(
+            list(dict.fromkeys(self.contracts)),
+            'Daily',
+            self.dates[0].decode(),
+            str(pd.Timestamp(self.dates[-1].decode()) + pd.Timedelta(days=1)).split()[0]
+        )
+        for contract_id, symbol in enumerate(self.contracts):
+            if symbol not in _data:
+                continue
+            _frame_dates = np.array([str(i).split()[0] for i in _data[symbol]['date']], dtype='S10')
+            _index = np.minimum(np.searchsorted(self.dates, _frame_dates), _number_of_dates - 1)
+            _found = self.dates[_index] == _frame_dates
+            _opens[_index[_found], contract_id] = _data[symbol]['open'].values[_found]
+
+        _dates = np.arange(_number_of_dates)[:, np.newaxis]
+        _live = self.contract_ids >= 0
+        _ids = np.where(_live, self.contract_ids, 0)
+        self.prices = np.where(_live, _opens[_dates, _ids], np.nan)
+
+        # On a roll day the old contract is sold and the new one bought at the open
+        _previous = np.vstack([np.full((1, len(self.roots)), -1, dtype=np.int32), self.contract_ids[:-1]])
+        _rolled = _live & (_previous >= 0) & (_previous != self.contract_ids)
+        _old_prices = _opens[_dates, np.where(_previous >= 0, _previous, 0)]
+        self.roll_gaps = np.where(_rolled, self.prices - _old_prices, 0.0)
+        self.roll_gaps[np.isnan(self.roll_gaps)] = 0.0
+
+        # Back-adjustment: every price is shifted by the gaps of the later rolls
+        _cumulative = np.cumsum(self.roll_gaps[::-1], axis=0)[::-1]
+        self.adjustments = _cumulative - self.roll_gaps
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from custom_exceptions import CUSTOM_EXCEPTIONS
+
+
+class RebalanceSchedule:
+    """
+    This class is the object representation of how often a model
+    rebalances. It is compiled once against the trading schedule into
+    the trading-day indices where the model actually runs; on every
+    other day its portfolio is only marked to market.
+
+    Frequencies:
+    - 'daily'     every trading day
+    - 'weekly'    last trading day of each week
+    - 'month_end' last trading day of each month
+    - 'every_n'   every n-th trading day, starting on the first one
+    - 'custom'    first trading day on or after each of the given dates
+    """
+    FREQUENCIES = ('daily', 'weekly', 'month_end', 'every_n', 'custom')
+
+    def __init__(self, frequency='daily', every=1, dates=None):
+        if frequency not in self.FREQUENCIES:
+            raise CUSTOM_EXCEPTIONS['bad_rebalance_frequency'](frequency, self.FREQUENCIES)
+        self.frequency = frequency
+        self.every = every
+        self.dates = [str(i) for i in dates] if dates is not None else list()
+        # active[date_index] is True on the days the model runs
+        self.active = None
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_frequency(self):
+        return self.frequency
+
+    def get_indices(self):
+        return np.flatnonzero(self.active)
+
+    def is_active(self, date_index):
+        return bool(self.active[date_index])
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def compile(self, trading_schedule):
+        """
+        Arguments:
+        ----------
+            trading_schedule - list of 'YYYY-MM-DD' strings
+        """
+        _number_of_dates = len(trading_schedule)
+        self.active = np.zeros(_number_of_dates, dtype=bool)
+        if _number_of_dates == 0:
+            return
+
+        if self.frequency == 'daily':
+            self.active[:] = True
+        elif self.frequency == 'every_n':
+            self.active[::max(int(self.every), 1)] = True
+        elif self.frequency == 'custom':
+            _indices = np.searchsorted(np.array(trading_schedule, dtype=str), np.array(self.dates, dtype=str))
+            self.active[_indices[_indices < _number_of_dates]] = True
+        else:
+            _dates = pd.DatetimeIndex(trading_schedule)
+            if self.frequency == 'weekly':
+                _periods = _dates.to_period('W').asi8
+            else:
+                _periods = _dates.to_period('M').asi8
+            # last trading day of each period
+            self.active[:-1] = _periods[1:] != _periods[:-1]
+            self.active[-1] = True
@@ -0,0 +1,205 @@
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class PricePanel:
+    """
+    This class is the object representation of the loaded price
+    history. Every field is a dates x symbols array (NaN where there is
+    no bar) and the panel also carries the trading calendar.
+
+    The panel can be published through multiprocessing.shared_memory or
+    a memory mapped file. Workers attach to it with PricePanel.attach()
+    and get read-only NumPy views over the same memory, nothing is copied
+    or pickled apart from a small handle.
+
+    Functionalities:
+    - Store the OHLCV panel, its dates, symbols and the calendar
+    - Publish the panel to shared memory or a memory mapped file
+    - Attach read-only views to a published panel
+    """
+    def __init__(self, dates, symbols, values, fields=FIELDS, calendar=None):
+        # dates and calendar are stored as 'YYYY-MM-DD' bytes so they can
+        # live in shared memory and be searched with np.searchsorted
+        self.dates = np.asarray(dates, dtype='S10')
+        self.calendar = np.asarray(calendar if calendar is not None else list(), dtype='S10')
+        self.symbols = [i.decode() if isinstance(i, bytes) else i for i in symbols]
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.fields = tuple(fields)
+        # values[field, date, symbol]
+        self.values = values
+        self.shared_memory = None
+        self.owner = False
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_field(self, field):
+        return self.values[self.fields.index(field)]
+
+    def get_dates(self):
+        return [i.decode() for i in self.dates]
+
+    def get_calendar(self):
+        return [i.decode() for i in self.calendar]
+
+    def get_symbols(self):
+        return self.symbols
+
+    def get_nbytes(self):
+        return self.values.nbytes + self.dates.nbytes + self.calendar.nbytes
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    @staticmethod
+    def from_frames(frames, fields=FIELDS, calendar=None):
+        """
+        This method builds a panel from { 'symbol' : DataFrame } as
+        returned by DataSource.get_batch_price_time_bars.
+        """
+        _symbols = list(frames)
+        _dates = set()
+        for symbol in _symbols:
+            _dates.update(str(i).split()[0] for i in frames[symbol]['date'])
+        _dates = sorted(_dates)
+        _date_index = pd.Index(_dates)
+
+        _values = np.full((len(fields), len(_dates), len(_symbols)), np.nan)
+        for j, symbol in enumerate(_symbols):
+            _frame = frames[symbol]
+            _rows = _date_index.get_indexer([str(i).split()[0] for i in _frame['date']])
+            for f, field in enumerate(fields):
+                if field in _frame.columns:
+                    _values[f, _rows, j] = _frame[field].values
+        return PricePanel(_dates, _symbols, _values, fields, calendar)
+
+    def layout(self):
+        """
+        Byte layout of a published panel. Values come first so they are
+        aligned for float64 views.
+        """
+        _symbol_width = max([len(i.encode()) for i in self.symbols] + [1])
+        return {
+            'fields': self.fields,
+            'shape': self.values.shape,
+            'dates': self.dates.shape[0],
+            'calendar': self.calendar.shape[0],
+            'symbols': len(self.symbols),
+            'symbol_width': _symbol_width
+        }
+
+    def publish(self, path=None):
+        """
+        This method copies the panel once into shared memory (or into
+        the file at path) and returns the handle workers attach with.
+        The panel itself is switched over to the published memory.
+
+        Return
+        ------
+        handle - small picklable dict
+        """
+        _handle = self.layout()
+        _symbols = np.asarray([i.encode() for i in self.symbols], dtype=f"S{_handle['symbol_width']}")
+        _nbytes = self.values.nbytes + self.dates.nbytes + self.calendar.nbytes + _symbols.nbytes
+
+        if path is None:
+            self.shared_memory = shared_memory.SharedMemory(create=True, size=max(_nbytes, 1))
+            _buffer = self.shared_memory.buf
+            _handle['name'] = self.shared_memory.name
+        else:
+            _buffer = np.memmap(path, dtype=np.uint8, mode='w+', shape=(max(_nbytes, 1),))
+            _handle['path'] = path
+
+        _views = _panel_views(_buffer, _handle)
+        _views['values'][...] = self.values
+        _views['dates'][...] = self.dates
+        _views['calendar'][...] = self.calendar
+        _views['symbols'][...] = _symbols
+        if path is not None:
+            _buffer.flush()
+
+        self.values = _views['values']
+        self.dates = _views['dates']
+        self.calendar = _views['calendar']
+        self.owner = True
+        return _handle
+
+    @staticmethod
+    def attach(handle):
+        """
+        This method attaches read-only views to a published panel.
+
+        Arguments:
+        ----------
+            handle - dict returned by publish()
+        """
+        _shared_memory = None
+        if 'name' in handle:
+            _shared_memory = _attach_shared_memory(handle['name'])
+            _buffer = _shared_memory.buf
+        else:
+            _buffer = np.memmap(handle['path'], dtype=np.uint8, mode='r')
+
+        _views = _panel_views(_buffer, handle)
+        for view in _views.values():
+            view.flags.writeable = False
+        _panel = PricePanel(
+            _views['dates'],
+            _views['symbols'].tolist(),
+            _views['values'],
+            handle['fields'],
+            _views['calendar']
+        )
+        _panel.shared_memory = _shared_memory
+        return _panel
+
+    def close(self):
+        """
+        This method releases the shared memory. The process that
+        published the panel also removes it. The panel (and any data
+        source built on it) can not be used afterwards.
+        """
+        if self.shared_memory is None:
+            return
+        self.values = None
+        self.dates = None
+        self.calendar = None
+        self.shared_memory.close()
+        if self.owner:
+            self.shared_memory.unlink()
+        self.shared_memory = None
+
+
+def _panel_views(buffer, handle):
+    _values_count = int(np.prod(handle['shape']))
+    _offset = 0
+    _views = dict()
+    _views['values'] = np.frombuffer(buffer, dtype=np.float64, count=_values_count, offset=_offset).reshape(handle['shape'])
+    _offset += _values_count * 8
+    _views['dates'] = np.frombuffer(buffer, dtype='S10', count=handle['dates'], offset=_offset)
+    _offset += handle['dates'] * 10
+    _views['calendar'] = np.frombuffer(buffer, dtype='S10', count=handle['calendar'], offset=_offset)
+    _offset += handle['calendar'] * 10
+    _views['symbols'] = np.frombuffer(buffer, dtype=f"S{handle['symbol_width']}", count=handle['symbols'], offset=_offset)
+    return _views
+
+
+def _attach_shared_memory(name):
+    # Attaching processes must not unlink the block when they exit,
+    # only the publisher does. Python < 3.13 has no track argument so
+    # the block is kept off the resource tracker while attaching.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+        _register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = _register
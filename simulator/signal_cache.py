@@ -0,0 +1,200 @@
+import hashlib
+import inspect
+import os
+import re
+import warnings
+import numpy as np
+from model import Model
+
+
+# Default repr of an object, e.g. <Indicator object at 0x7f...>, which
+# changes from run to run
+_ID_REPR = re.compile(r' at 0x[0-9a-fA-F]+')
+
+
+class SignalCache:
+    """
+    This class is the object representation of the on-disk cache of
+    model signals. Most models only depend on their universe and the
+    date, so a sweep over portfolio settings (e.g. maximum single
+    percent allocation) keeps producing the same signals. The first
+    run records the signals of every cacheable model, later runs with
+    the same key replay them instead of calling Model.run().
+
+    Key (sha256) of a model:
+    - module, name and source code of the class and of its bases up to Model
+    - parameters (Model.get_parameters())
+    - rebalance schedule and compiled universe membership
+    - trading schedule
+    - data_version, to tell apart runs on different data
+
+    One stream is stored per key as <directory>/<key>.npz:
+        tickers     (n_tickers,)  every ticker signalled
+        date_ids    (n_signals,)  int32, index in the trading schedule
+        ticker_ids  (n_signals,)  int32, index in tickers
+        signals     (n_signals,)  int16, e.g. 1, -1, 0 or 404
+
+    Models with a parameter whose repr holds an object id are neither
+    replayed nor recorded (with a warning), their key would change from
+    run to run. They can override Model.get_parameters().
+    """
+    def __init__(self, directory, data_version=None):
+        self.directory = directory
+        self.data_version = data_version
+        # { (security_type, model) : { date_index : signals } } being replayed
+        self.replays = dict()
+        # { (security_type, model) : (key, [(date_index, signals), ...]) } being recorded
+        self.recordings = dict()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get_key(self, model, universe, trading_schedule):
+        """
+        Arguments:
+        ----------
+            model - Model object
+            universe - compiled DynamicUniverse of the model
+            trading_schedule - list of 'YYYY-MM-DD' strings
+        """
+        _mro = type(model).__mro__
+        # Classes the signals are made by, Model itself included
+        _classes = _mro[:_mro.index(Model) + 1] if Model in _mro else _mro[:1]
+        _schedule = model.get_schedule()
+
+        _hash = hashlib.sha256()
+        for _class in _classes:
+            try:
+                _source = inspect.getsource(_class)
+            except (OSError, TypeError):
+                _source = ''
+            for part in (_class.__module__, _class.__qualname__, _source):
+                _hash.update(part.encode())
+                _hash.update(b'\0')
+        for part in (
+            repr(sorted(model.get_parameters().items())),
+            repr((_schedule.frequency, _schedule.every, _schedule.dates)),
+            repr(universe.get_all_symbols()),
+            repr(self.data_version)
+        ):
+            _hash.update(part.encode())
+            _hash.update(b'\0')
+        _hash.update(np.ascontiguousarray(universe.membership).tobytes())
+        _hash.update('\0'.join(trading_schedule).encode())
+        return _hash.hexdigest()
+
+    def get_unstable_parameters(self, model):
+        """
+        Return
+        ------
+        [parameters whose repr holds an object id, e.g. <X object at 0x...>]
+        """
+        _parameters = model.get_parameters()
+        return sorted(key for key in _parameters if _ID_REPR.search(repr(_parameters[key])))
+
+    def has_signals(self, security_type, model):
+        return (security_type, model) in self.replays
+
+    def get_signals(self, security_type, model, date_index):
+        return dict(self.replays[(security_type, model)].get(date_index, dict()))
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def start(self, models, trading_schedule):
+        """
+        This method looks up the stream of every cacheable model: the
+        ones found are replayed, the others recorded during the run.
+
+        Arguments:
+        ----------
+            models - ParentPortfolio.models
+            trading_schedule - list of 'YYYY-MM-DD' strings
+        """
+        self.replays = dict()
+        self.recordings = dict()
+        for security_type in models:
+            for model in models[security_type]:
+                _model = models[security_type][model]['model']
+                if not _model.is_cacheable():
+                    continue
+                _unstable = self.get_unstable_parameters(_model)
+                if len(_unstable) > 0:
+                    warnings.warn(
+                        f"Signals of model {model} are not cached, the repr of parameters {_unstable} "
+                        f"changes from run to run (override get_parameters())"
+                    )
+                    continue
+                _key = self.get_key(_model, models[security_type][model]['universe'], trading_schedule)
+                if os.path.exists(self.get_path(_key)):
+                    self.replays[(security_type, model)] = self.load(_key)
+                    self.hits += 1
+                else:
+                    self.recordings[(security_type, model)] = (_key, list())
+                    self.misses += 1
+
+    def record(self, security_type, model, date_index, signals):
+        if (security_type, model) in self.recordings:
+            self.recordings[(security_type, model)][1].append((date_index, signals))
+
+    def save(self):
+        """
+        This method writes the recorded streams. A stream with signals
+        that are not integers (e.g. dictionaries) is not cached.
+        """
+        for security_type, model in self.recordings:
+            _key, _stream = self.recordings[(security_type, model)]
+            _tickers = dict()
+            _date_ids, _ticker_ids, _signals = (list(), list(), list())
+            _cacheable = True
+            for date_index, signals in _stream:
+                for ticker in signals:
+                    if not isinstance(signals[ticker], (int, np.integer)) or isinstance(signals[ticker], bool):
+                        _cacheable = False
+                        break
+                    _date_ids.append(date_index)
+                    _ticker_ids.append(_tickers.setdefault(ticker, len(_tickers)))
+                    _signals.append(signals[ticker])
+                if not _cacheable:
+                    break
+            if not _cacheable:
+                continue
+
+            # Written next to the final file and moved, so a stream is never half written
+            _temporary = self.get_path(f"{_key}.{os.getpid()}.tmp")
+            with open(_temporary, 'wb') as stream_file:
+                np.savez_compressed(
+                    stream_file,
+                    tickers=np.array(list(_tickers), dtype=str),
+                    date_ids=np.array(_date_ids, dtype=np.int32),
+                    ticker_ids=np.array(_ticker_ids, dtype=np.int32),
+                    signals=np.array(_signals, dtype=np.int16)
+                )
+            os.replace(_temporary, self.get_path(_key))
+        self.recordings = dict()
+
+    def load(self, key):
+        """
+        Return
+        ------
+        { date_index : { 'ticker' : signal } }
+        """
+        _stream = dict()
+        with np.load(self.get_path(key), allow_pickle=False) as data:
+            _tickers = [str(i) for i in data['tickers']]
+            for date_index, ticker_index, signal in zip(
+                data['date_ids'].tolist(), data['ticker_ids'].tolist(), data['signals'].tolist()
+            ):
+                _stream.setdefault(date_index, dict())[_tickers[ticker_index]] = signal
+        return _stream
+
+    def clear(self):
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith('.npz'):
+                os.remove(os.path.join(self.directory, file_name))
@@ -2,20 +2,31 @@
 from calendar import calendar
 from parent_portfolio import ParentPortfolio
 from equity_portfolio import EquityPortfolio
+from options_portfolio import OptionsPortfolio
+from futures_portfolio import FuturesPortfolio
 from trade_manager import TradeManager
 import datetime
 from pandas.tseries.holiday import USFederalHolidayCalendar
 from pandas.tseries.offsets import CustomBusinessDay
 import pandas as pd
 from custom_exceptions import CUSTOM_EXCEPTIONS
-import matplotlib.pyplot as plt
+from data_source import DatabaseExtractorSource, PanelDataSource
+from shared_panel import PricePanel
+from memory import MemoryReport
+from robustness import RobustnessEngine, returns_from_values
+from universe import DynamicUniverse
+from signal_cache import SignalCache
+from risk import RiskEngine
+from costs import CostEngine
+from plotting import get_result_curves, downsample_curves, render_curves
+from intraday import IntradayBarSource
 
 
 class Simulator:
     """
     Main simulator object.
     """
-    def __init__(self):
+    def __init__(self, data_source=None):
         self.start_date = datetime.date(2000, 1, 1)
         self.end_date = datetime.date.today()
 
@@ -37,6 +48,20 @@ class Simulator:
         # Stores Broker
         self.broker = ""
 
+        # Where prices come from (see data_source.py). If none is set
+        # before run() the original database_extractor is used.
+        self.data_source = data_source
+
+        # Loaded price history, see load_price_panel()
+        self.price_panel = None
+
+        # Bounded-history mode and memory accounting (both opt-in)
+        self.history_limit = None
+        self.memory_report = None
+
+        # Replays model signals recorded by earlier runs (opt-in)
+        self.signal_cache = None
+
     # --------------------------------------------
     #                SET METHODS
     # -------------------------------------------
@@ -84,8 +109,138 @@ class Simulator:
         self.portfolio.set_model_start_date(self.start_date)
 
     def set_broker(self, broker):
+        """
+            This method sets the broker of the account. The commissions
+            of the broker (see COMMISSION_SCHEDULES in costs.py) are
+            charged on the fills, brokers without a schedule charge
+            none. Slippage stays off until set_slippage() is called.
+        """
         self.broker = broker
         self.portfolio.set_broker(self.broker)
+        if self.portfolio.get_cost_engine() is None:
+            self.portfolio.set_cost_engine(CostEngine(self.broker))
+        else:
+            self.portfolio.get_cost_engine().set_broker(self.broker)
+
+    def set_slippage(self, default_spread=0.0005, impact=0.1, window=20):
+        """
+            This method turns on the slippage model of the cost engine
+            (see CostEngine.set_slippage()), without commissions if no
+            broker was set.
+        """
+        if self.portfolio.get_cost_engine() is None:
+            self.portfolio.set_cost_engine(CostEngine(self.broker))
+        self.portfolio.get_cost_engine().set_slippage(default_spread, impact, window)
+
+    def set_data_source(self, data_source):
+        """
+            This method sets the data source used by the models,
+            portfolios and securities.
+
+            Arguments:
+            ----------
+                data_source - DataSource object
+        """
+        _security_types = [i for i in self.portfolio.models if len(self.portfolio.models[i]) != 0]
+        self.check_data_source(data_source, _security_types)
+        self.data_source = data_source
+        self.portfolio.set_data_source(self.data_source)
+
+    def set_history_limit(self, history_limit):
+        """
+            This method turns on bounded-history mode: every pnl list
+            and position_distribution_historical only keeps its last
+            history_limit entries (ring buffers), which bounds the
+            memory of long runs.
+
+            Arguments:
+            ----------
+                history_limit - integer, or None to keep everything
+        """
+        self.history_limit = history_limit
+        self.portfolio.set_history_limit(self.history_limit)
+
+    def set_memory_report(self, interval=20, trace=True, budget=None):
+        """
+            This method turns on memory accounting during run().
+
+            Arguments:
+            ----------
+                interval - integer, sample every interval trading days
+                trace - boolean, also sample tracemalloc (slower)
+                budget - bytes, warn when the RSS goes over it
+        """
+        self.memory_report = MemoryReport(interval, trace, budget)
+
+    def set_risk_limits(self, max_volatility=None, max_risk_contribution=None,
+                        method='ewma', decay=0.94, window=60):
+        """
+            This method turns on the volatility and correlation aware
+            limits on top of maximum_single_percent_allocation. The
+            covariance of the equity universe is updated every day and
+            positions breaking a limit are not opened (see risk.py).
+
+            Arguments:
+            ----------
+                max_volatility - annualized volatility of a model portfolio
+                max_risk_contribution - share of a model portfolio variance
+                                        allowed for a single position
+                method - 'ewma' or 'window'
+                decay - float, used by 'ewma'
+                window - integer (trading days), used by 'window'
+        """
+        _risk_engine = RiskEngine(method, decay, window)
+        _risk_engine.set_limits(max_volatility, max_risk_contribution)
+        self.portfolio.set_risk_engine(_risk_engine)
+
+    def set_signal_cache(self, directory, data_version=None):
+        """
+            This method turns on the signal cache. Signals of cacheable
+            models are recorded to directory, and replayed instead of
+            running the model when a later run has the same key (see
+            signal_cache.py).
+
+            Arguments:
+            ----------
+                directory - string, folder of the cached streams
+                data_version - any value identifying the data, cached
+                               streams are only replayed on the same one
+        """
+        self.signal_cache = SignalCache(directory, data_version)
+
+    # --------------------------------------------
+    #                GET METHODS
+    # --------------------------------------------
+    def get_memory_report(self):
+        return self.memory_report
+
+    def get_signal_cache(self):
+        return self.signal_cache
+
+    def get_data_source(self):
+        # Falls back on the original database_extractor module
+        if self.data_source is None:
+            self.set_data_source(DatabaseExtractorSource())
+        return self.data_source
+
+    def get_price_panel(self):
+        return self.price_panel
+
+    def get_daily_returns(self):
+        """
+        This method returns the daily returns of the parent portfolio
+        and of every model, computed from their daily values.
+
+        Return
+        ------
+        { 'parent' : array, 'model_name' : array, ... }
+        """
+        _returns = {'parent': returns_from_values(self.portfolio.pnl)}
+        for security_type in self.portfolio.models:
+            for model in self.portfolio.models[security_type]:
+                _values = self.portfolio.models[security_type][model]['portfolio'].get_value_historical()
+                _returns[model] = returns_from_values(_values)
+        return _returns
 
     # --------------------------------------------
     #                UPDATE METHODS
@@ -119,11 +274,45 @@ class Simulator:
     def update_security_universe(self):
         self.security_universe = self.portfolio.get_security_universe()
 
+    def update_security_universes(self, date_index):
+        """
+            This method moves every model onto the symbols that are live
+            on the trading day and queues a close for held symbols that
+            dropped out of their universe.
+
+            Arguments:
+            ----------
+                date_index - integer (position in the trading schedule)
+        """
+        self.add_positions_to_close(self.portfolio.update_security_universes(date_index))
+
+        # Openings queued yesterday for symbols that are no longer live are dropped
+        for security_type in self.portfolio.models:
+            for model in self.portfolio.models[security_type]:
+                _universe = self.portfolio.models[security_type][model]['universe']
+                if not _universe.has_changed(date_index):
+                    continue
+                _portfolio = self.portfolio.models[security_type][model]['portfolio']
+                for ticker in self.trade_manager.get_positions_to_open(security_type, model):
+                    if not _universe.is_member(_portfolio.get_universe_symbol(ticker), date_index):
+                        self.trade_manager.remove_position_to_open(security_type, model, ticker)
+
+    def add_positions_to_close(self, positions):
+        """
+            This method queues closes that do not come from the models
+            (dropped out of the universe, expired), skipping the ones
+            already queued.
+
+            Arguments:
+            ----------
+                positions - [(security_type, model, ticker), ...]
+        """
+        for security_type, model, ticker in positions:
+            if not self.trade_manager.is_position_to_close(security_type, model, ticker):
+                self.trade_manager.add_new_position_to_close(security_type, model, ticker)
+
     def build_trading_schedule(self):
-        holidays = CustomBusinessDay(calendar=USFederalHolidayCalendar())
-        _dates = pd.date_range(str(self.start_date), str(self.end_date), freq=holidays)
-        _dates = [str(i).split()[0] for i in _dates]
-        self.trading_schedule = _dates
+        self.trading_schedule = make_trading_schedule(self.start_date, self.end_date)
 
     # --------------------------------------------
     #                OTHER METHODS
@@ -136,31 +325,136 @@ class Simulator:
         Arguments:
             model - class object
             security_type - string
+            security_universe - list of tickers or DynamicUniverse object
+                                for universes that change through time
         """
         if model_name in self.portfolio.models.keys():
             raise CUSTOM_EXCEPTIONS['duplicate_model_name']
 
+        # The default data source is only checked once the run sets it
+        if self.data_source is not None:
+            self.check_data_source(self.data_source, [security_type])
+
+        if not isinstance(security_universe, DynamicUniverse):
+            security_universe = DynamicUniverse(security_universe)
+
         portfolio_obj = None
         _model = model()
         if security_type == 'equity':
             portfolio_obj = EquityPortfolio()
             portfolio_obj.allocation_percentage = allocation_percentage
-            portfolio_obj.set_security_universe(security_universe)
-            _model.set_security_universe(security_universe)
+            portfolio_obj.set_security_universe(security_universe.get_all_symbols())
+            _model.set_security_universe(security_universe.get_all_symbols())
         elif security_type == 'options':
-            pass
+            # The universe of an options model holds the underlyings
+            portfolio_obj = OptionsPortfolio()
+            portfolio_obj.allocation_percentage = allocation_percentage
+            portfolio_obj.set_security_universe(security_universe.get_all_symbols())
+            _model.set_security_universe(security_universe.get_all_symbols())
         elif security_type == 'futures':
-            pass
+            # The universe of a futures model holds the roots
+            portfolio_obj = FuturesPortfolio()
+            portfolio_obj.allocation_percentage = allocation_percentage
+            portfolio_obj.set_security_universe(security_universe.get_all_symbols())
+            _model.set_security_universe(security_universe.get_all_symbols())
         elif security_type == 'oof':
             pass
-        self.portfolio.models[security_type][model_name] = {'model': _model, 'portfolio': portfolio_obj}
+        self.portfolio.models[security_type][model_name] = {
+            'model': _model,
+            'portfolio': portfolio_obj,
+            'universe': security_universe
+        }
+
+    def check_data_source(self, data_source, security_types):
+        """
+        This method raises when the data source cannot serve a type of
+        security, instead of failing in the middle of the run. Options
+        only need prices: without chains they are priced with the flat
+        volatility of the portfolio.
+
+        Arguments:
+        ----------
+            data_source - DataSource object
+            security_types - list of security types with models
+        """
+        if 'futures' in security_types and not data_source.has_futures_contracts():
+            raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+                f"Futures with {type(data_source).__name__}",
+                "the data source has no futures contracts (get_futures_contracts)"
+            )
+
+    def load_price_panel(self, look_back=0):
+        """
+        This method loads the daily bars of the whole security universe
+        over the simulation dates in one batch call and from then on
+        serves prices from the in-memory panel.
+
+        Arguments:
+        ----------
+            look_back - integer, extra calendar days loaded before the
+                        start date for the models
+        """
+        self.update_security_universe()
+        self.build_trading_schedule()
+        _data_source = self.get_data_source()
+
+        _symbols = list()
+        for security_type in self.security_universe:
+            _symbols += self.security_universe[security_type]
+        # Futures are priced from the bars of their contracts
+        if len(self.security_universe.get('futures', list())) != 0:
+            _contracts = _data_source.get_futures_contracts(self.security_universe['futures'])
+            for root in _contracts:
+                _symbols += list(_contracts[root]['symbol'].values)
+        _symbols = list(dict.fromkeys(_symbols))
+
+        _start_date = self.start_date - datetime.timedelta(days=look_back + _data_source.open_price_look_back)
+        _end_date = self.end_date + datetime.timedelta(days=1)
+        _frames = _data_source.get_batch_price_time_bars(_symbols, 'Daily', str(_start_date), str(_end_date))
+
+        self.price_panel = PricePanel.from_frames(_frames, calendar=self.trading_schedule)
+        self.set_data_source(PanelDataSource(self.price_panel, _data_source))
+
+    def publish_price_panel(self, path=None):
+        """
+        This method publishes the loaded panel and calendar so worker
+        processes can attach to them without copying.
+
+        Arguments:
+        ----------
+            path - None for multiprocessing.shared_memory, or a file
+                   path to publish a memory mapped file instead
+
+        Return
+        ------
+        handle - pass it to attach_price_panel() in the workers
+        """
+        if self.price_panel is None:
+            self.load_price_panel()
+        return self.price_panel.publish(path)
+
+    def attach_price_panel(self, handle):
+        """
+        This method points the simulator at a panel published by
+        another process. Nothing is copied, the arrays are read-only
+        views over the shared memory.
+        """
+        self.price_panel = PricePanel.attach(handle)
+        self.set_data_source(PanelDataSource(self.price_panel, self.data_source))
+
+    def close_price_panel(self):
+        if self.price_panel is not None:
+            self.price_panel.close()
 
     def remove_first_pnl_index(self):
-        self.portfolio.pnl = self.portfolio.pnl[1:]
+        # pnl is a list, or a deque in bounded-history mode
+        if len(self.portfolio.pnl) != 0:
+            del self.portfolio.pnl[0]
         for security_type in self.portfolio.models:
             for model in self.portfolio.models[security_type]:
                 _pnl = self.portfolio.models[security_type][model]['portfolio'].pnl
-                self.portfolio.models[security_type][model]['portfolio'].pnl = _pnl[1:]
+                if len(_pnl) != 0:
+                    del _pnl[0]
 
     def run(self):
         """
@@ -181,13 +475,102 @@ class Simulator:
         9) Run models and store their output
         10) Pass signals to Trade Manager for opening/closing
 
+        Steps 8 to 10 only happen for the models whose rebalance
+        schedule is active on the day, the others are only marked
+        to market (steps 3 to 5).
+
         """
 
 
         #                   STEP 1
         # --------------------------------------------
-        self.update_security_universe()
         self.build_trading_schedule()
+        self.prepare_run()
+
+        # Finds the models whose signals are replayed from the cache
+        if self.signal_cache is not None:
+            self.signal_cache.start(self.portfolio.models, self.trading_schedule)
+
+        #                   STEP 2
+        # --------------------------------------------
+        self.portfolio.allocate_all_cash(self.maximum_single_percent_allocation)
+
+        # --------------------------------------------
+        #          ACTUALLY START SIMULATION
+        # --------------------------------------------
+
+        for date_index, date in enumerate(self.trading_schedule):
+            self.run_step(date_index, date)
+
+            if self.memory_report is not None:
+                self.memory_report.update(self, date_index, date)
+
+        self.finish_run()
+
+    def run_intraday(self, bar_store, batch_size=512):
+        """
+        This method runs the simulation on intraday bars. Sessions of
+        the store between the start and end dates are the trading
+        schedule (rebalance schedules and universes work per session)
+        and steps 3 to 10 run on every bar of a session, with signals
+        executed at the open of the next bar.
+
+        Bars are streamed from the memory-mapped store batch_size bars
+        at a time (see intraday.py), so memory does not grow with the
+        length of the history. Long runs record one pnl entry per bar,
+        set_history_limit() keeps those bounded. The signal cache is
+        bypassed in this mode: models run on every bar and nothing is
+        recorded.
+
+        Risk limits and slippage are estimated from daily bars, they
+        raise UnsupportedConfiguration here. Commissions are charged.
+
+        Arguments:
+        ----------
+            bar_store - IntradayBarStore
+            batch_size - integer, bars read from the store at once
+        """
+        if self.portfolio.get_risk_engine() is not None:
+            raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+                "Risk limits", "intraday runs would annualize minute bars as trading days"
+            )
+        _cost_engine = self.portfolio.get_cost_engine()
+        if _cost_engine is not None and _cost_engine.has_slippage():
+            raise CUSTOM_EXCEPTIONS['unsupported_configuration'](
+                "Slippage", "intraday runs would size the impact against the volume of minute bars"
+            )
+        _source = IntradayBarSource(bar_store, batch_size)
+        self.set_data_source(_source)
+
+        #                   STEP 1
+        # --------------------------------------------
+        self.trading_schedule = bar_store.get_sessions(
+            self.start_date, self.end_date + datetime.timedelta(days=1)
+        )
+        self.prepare_run()
+
+        #                   STEP 2
+        # --------------------------------------------
+        self.portfolio.allocate_all_cash(self.maximum_single_percent_allocation)
+
+        for date_index, date in enumerate(self.trading_schedule):
+            _new_day = True
+            for timestamp in _source.iterate_bars(date):
+                self.run_step(date_index, timestamp, _new_day, use_signal_cache=False)
+                _new_day = False
+
+            if self.memory_report is not None:
+                self.memory_report.update(self, date_index, date)
+
+        self.finish_run(use_signal_cache=False)
+
+    def prepare_run(self):
+        """
+        Preliminary steps of a run (STEP 1), once the trading schedule
+        is built.
+        """
+        self.portfolio.set_data_source(self.get_data_source())
+        self.update_security_universe()
         self.set_model_start_date()
 
         # Delete the elements of the models dictionary to avoid
@@ -204,100 +587,184 @@ class Simulator:
         for security_type in _to_delete:
             del self.portfolio.models[security_type]
 
-        # Makes sure only traded security types are account for across everything
-        _to_close_structure = dict()
-        _to_open_structure = dict()
-        for security_type in self.portfolio.models:
-            _to_close_structure[security_type] = dict()
-            _to_open_structure[security_type] = dict()
-            for model in self.portfolio.models[security_type]:
-                _to_close_structure[security_type][model] = list()
-                _to_open_structure[security_type][model] = dict()
+        # Compiles the per-date membership of every model universe
+        self.portfolio.compile_security_universes(self.trading_schedule)
 
-        # Sets base dictionary structure
-        self.trade_manager.set_base_structure_positions_to_close(_to_close_structure)
-        self.trade_manager.set_base_structure_positions_to_open(_to_open_structure)
+        # Compiles what the portfolios need ahead of the run (e.g. futures rolls)
+        self.portfolio.compile_portfolios(self.trading_schedule)
+        self.portfolio.compile_risk_engine()
+        self.portfolio.compile_cost_engine()
 
-        #                   STEP 2
-        # --------------------------------------------
-        self.portfolio.allocate_all_cash(self.maximum_single_percent_allocation)
+        # Compiles the trading days each model rebalances on
+        self.portfolio.compile_schedules(self.trading_schedule)
 
-        # --------------------------------------------
-        #          ACTUALLY START SIMULATION
-        # --------------------------------------------
+        # Applies bounded-history mode to models added after it was set
+        if self.history_limit is not None:
+            self.portfolio.set_history_limit(self.history_limit)
+
+        if self.memory_report is not None:
+            self.memory_report.start()
+
+    def run_step(self, date_index, date, new_day=True, use_signal_cache=True):
+        """
+        This method runs steps 3 to 10 for one point in time: a trading
+        day, or a bar of an intraday session (see run_intraday()).
 
-        for date in self.trading_schedule:
-            #                   STEP 3
-            # ----------------------------------------------
-            self.update_all_dates(date)
-            #                   STEP 4
-            # ----------------------------------------------
-            self.update_relevant()
-            #                   STEP 5
-            # ----------------------------------------------
-            self.update_pnl()
-            #                   STEP 6
-            # ----------------------------------------------
-            self.trade_manager.close_all_positions(self.portfolio.close_position)
-            #                   STEP 7
-            # ----------------------------------------------
-            self.trade_manager.open_all_positions(self.portfolio.open_position)
-            #                   STEP 8
-            # ----------------------------------------------
-            self.portfolio.compute_position_distribution()
-            #                   STEP 9
-            # ----------------------------------------------
-            # _all_model_signals structure:
-            # {
-            #     'equity:
-            #     {
-            #       'model_name:
-            #            {
-            #                'ticker': {ticker_info}
-            #            },
-            #     },
-            # }
-            _all_model_signals = dict()
-            for security_type in self.portfolio.models:
-                _all_model_signals[security_type] = dict()
-                for model in self.portfolio.models[security_type]:
+        Arguments:
+        ----------
+            date_index - integer, position of the day in the trading schedule
+            date - 'YYYY-MM-DD' (or 'YYYY-MM-DD HH:MM' intraday)
+            new_day - boolean, False for the bars after the first one of
+                      a session, the universes only change between days
+            use_signal_cache - boolean, False to run every model instead
+                               of replaying or recording its signals
+        """
+        _signal_cache = self.signal_cache if use_signal_cache else None
+        #                   STEP 3
+        # ----------------------------------------------
+        self.update_all_dates(date)
+        if new_day:
+            self.update_security_universes(date_index)
+        #                   STEP 4
+        # ----------------------------------------------
+        self.update_relevant()
+        #                   STEP 5
+        # ----------------------------------------------
+        self.update_pnl()
+        self.add_positions_to_close(self.portfolio.get_expired_positions())
+        #                   STEP 6 & 7
+        # ----------------------------------------------
+        self.trade_manager.execute(
+            self.portfolio.close_positions,
+            self.portfolio.open_positions,
+            self.portfolio.prefetch_open_prices
+        )
+        #                   STEP 8
+        # ----------------------------------------------
+        _active_models = self.portfolio.get_active_models(date_index)
+        self.portfolio.compute_position_distribution(_active_models)
+        #                   STEP 9
+        # ----------------------------------------------
+        # _all_model_signals structure:
+        # {
+        #     'equity:
+        #     {
+        #       'model_name:
+        #            {
+        #                'ticker': {ticker_info}
+        #            },
+        #     },
+        # }
+        _all_model_signals = dict()
+        for security_type in _active_models:
+            _all_model_signals[security_type] = dict()
+            for model in _active_models[security_type]:
+                if _signal_cache is not None and _signal_cache.has_signals(security_type, model):
+                    _model_signals = _signal_cache.get_signals(security_type, model, date_index)
+                else:
                     _model_signals = self.portfolio.models[security_type][model]['model'].run()
-                    _all_model_signals[security_type][model] = _model_signals
-
-
-            #                   STEP 10
-            # ----------------------------------------------
-            # Here we compare the model-dictated portfolio and the current holdings
-            # Based on the difference we send signals to the Trade Manager of what
-            # we should buy/sell.
-            for security_type in _all_model_signals:
-                for model in _all_model_signals[security_type]:
-                    for ticker in _all_model_signals[security_type][model]:
-                        signal_close, signal_open = self.portfolio.models[security_type][model]['portfolio'].compare_security(
-                            ticker, _all_model_signals[security_type][model][ticker]
+                    if _signal_cache is not None:
+                        _signal_cache.record(security_type, model, date_index, _model_signals)
+                _all_model_signals[security_type][model] = _model_signals
+
+
+        #                   STEP 10
+        # ----------------------------------------------
+        # Here we compare the model-dictated portfolio and the current holdings
+        # Based on the difference we send signals to the Trade Manager of what
+        # we should buy/sell.
+        for security_type in _all_model_signals:
+            for model in _all_model_signals[security_type]:
+                _universe = self.portfolio.models[security_type][model]['universe']
+                _portfolio = self.portfolio.models[security_type][model]['portfolio']
+                for ticker in _all_model_signals[security_type][model]:
+                    # Signals on symbols that are not live are ignored
+                    if not _universe.is_member(_portfolio.get_universe_symbol(ticker), date_index):
+                        continue
+                    signal_close, signal_open = self.portfolio.models[security_type][model]['portfolio'].compare_security(
+                        ticker, _all_model_signals[security_type][model][ticker]
+                    )
+                    # If we received a signal to close something
+                    if signal_close:
+                        self.trade_manager.add_new_position_to_close(
+                            security_type,
+                            model,
+                            ticker
                         )
-                        # If we received a signal to close something
-                        if signal_close:
-                            self.trade_manager.add_new_position_to_close(
-                                security_type,
-                                model,
-                                ticker
-                            )
-                        # If we received a signal to open something
-                        if signal_open:
-                            self.trade_manager.add_new_position_to_open(
-                                security_type,
-                                model, 
-                                ticker,
-                                _all_model_signals[security_type][model][ticker]
-                            )
-
-
-    def graph_simulation_results(self):
-        plt.plot(self.portfolio.pnl)
+                    # If we received a signal to open something
+                    if signal_open:
+                        self.trade_manager.add_new_position_to_open(
+                            security_type,
+                            model, 
+                            ticker,
+                            _all_model_signals[security_type][model][ticker]
+                        )
+
+    def finish_run(self, use_signal_cache=True):
+        if self.signal_cache is not None and use_signal_cache:
+            self.signal_cache.save()
+
+        if self.memory_report is not None:
+            self.memory_report.sample(self, self.trading_schedule[-1] if self.trading_schedule else None)
+            self.memory_report.stop()
+
+    def robustness(self, number_of_paths=10000, method='stationary', block_size=20,
+                   confidence=0.95, chunk_size=1000, seed=None):
+        """
+        This method runs the bootstrap analysis (see robustness.py) on
+        the returns of the parent portfolio and of every model.
+
+        Return
+        ------
+        { 'parent' : {metric: summary}, 'model_name' : {...}, ... }
+        """
+        _results = dict()
+        _daily_returns = self.get_daily_returns()
+        for name in _daily_returns:
+            _engine = RobustnessEngine(_daily_returns[name])
+            _engine.set_method(method)
+            _engine.set_block_size(block_size)
+            _engine.set_chunk_size(chunk_size)
+            _engine.set_seed(seed)
+            _results[name] = _engine.run(number_of_paths, confidence=confidence)
+        return _results
+
+    def graph_simulation_results(self, path=None, models=True, max_points=2000, **kwargs):
+        """
+            This method plots the value of the parent portfolio and,
+            on top, the value of every model. Curves are downsampled
+            with LTTB to max_points (see plotting.py).
+
+            Arguments:
+            ----------
+                path - string, the figure is written to the file (.png,
+                       .svg, ...) without a display. If None it is shown.
+                models - boolean, overlay the models
+                max_points - integer, points kept per curve
+        """
+        _curves = downsample_curves(get_result_curves(self, models), max_points)
+        if path is not None:
+            return render_curves(_curves, path, **kwargs)
+
+        import matplotlib.pyplot as plt
+        for name in _curves:
+            plt.plot(_curves[name][0], _curves[name][1], label=name)
+        plt.legend()
         plt.show()
 
     def simulation_results(self, graph=False):
         # TODO: add compute
         if graph:
             self.graph_simulation_results()
+
+
+def make_trading_schedule(start_date, end_date):
+    """
+    Return
+    ------
+    'YYYY-MM-DD' of the US business days (federal holidays excluded)
+    from start_date to end_date
+    """
+    holidays = CustomBusinessDay(calendar=USFederalHolidayCalendar())
+    _dates = pd.date_range(str(start_date), str(end_date), freq=holidays)
+    return [str(i).split()[0] for i in _dates]
@@ -16,6 +16,8 @@ class DummyModel(Model):
 
         portfolio = dict()
         for security in self.security_universe:
+            # Securities that joined the universe after the first run
+            self.last_position.setdefault(security, -1)
             if self.last_position[security] == 1:
                 portfolio[security] = -1
                 self.last_position[security] = -1
@@ -1,3 +1,7 @@
+import numpy as np
+from order_queue import OrderQueue
+
+
 class TradeManager:
     """
         This class is the object representation of a trade manager.
@@ -11,92 +15,109 @@ class TradeManager:
         - makes decision about IF opening and closing should happen
     """
     def __init__(self):
-        # positions_to_close have structure
-        # {'security_type': {'model_name': list(tickers), ...}
-        self.positions_to_close = dict()
-        # positions_to_open have structure
-        # {'security_type': {'model_name': {'ticker':{__information__}, ...}
-        self.positions_to_open = dict()
+        # Flat queue of pending orders, see order_queue.py
+        self.orders = OrderQueue()
 
 
     # --------------------------------------------
     #               GET METHODS
     # --------------------------------------------
-    def get_positions_to_close(self):
-        return self.positions_to_close
-
-    def get_positions_to_open(self):
-        return self.positions_to_open
+    def get_positions_to_close(self, security_type, model):
+        return list(self.orders.get_orders(OrderQueue.CLOSE, security_type, model))
 
-    # --------------------------------------------
-    #               SET METHODS
-    # --------------------------------------------
-    def set_base_structure_positions_to_close(self, structure):
-        self.positions_to_close = structure
+    def get_positions_to_open(self, security_type, model):
+        return self.orders.get_orders(OrderQueue.OPEN, security_type, model)
 
-    def set_base_structure_positions_to_open(self, structure):
-        self.positions_to_open = structure
+    def get_tickers_to_open(self):
+        return self.orders.get_tickers(OrderQueue.OPEN)
 
+    def get_batches_to_open(self):
+        return self.orders.batches(OrderQueue.OPEN)
 
-    # --------------------------------------------
-    #               UPDATE METHODS
-    # --------------------------------------------
+    def get_orders(self):
+        return self.orders
 
     # --------------------------------------------
     #               OTHER METHODS
-    # ----------------------
-    # ----------------------
-
+    # --------------------------------------------
+    def is_position_to_close(self, security_type, model, ticker):
+        return self.orders.contains(OrderQueue.CLOSE, security_type, model, ticker)
 
     def add_new_position_to_close(self, security_type, model, ticker):
-        self.positions_to_close[security_type][model].append(ticker)
+        self.orders.add(OrderQueue.CLOSE, security_type, model, ticker)
 
     def add_new_position_to_open(self, security_type, model, ticker, ticker_info):
-        self.positions_to_open[security_type][model][ticker] = ticker_info
-
-    def close_all_positions(self, close_position):
         """
-            This method closes all positions that are to be close.
-            It is a bit sophisticated in the sense that it uses some what
-            of a pointer through the parameter
+            Arguments:
+            ----------
+                ticker_info - signal of the model, 1 or -1, or a dictionary
+                              {'position_type': 1 or -1, 'weight': float}
+                              to open the position with a custom weight
+        """
+        if isinstance(ticker_info, dict):
+            self.orders.add(
+                OrderQueue.OPEN,
+                security_type,
+                model,
+                ticker,
+                ticker_info['position_type'],
+                ticker_info.get('weight', np.nan)
+            )
+        else:
+            self.orders.add(OrderQueue.OPEN, security_type, model, ticker, ticker_info)
+
+    def remove_position_to_open(self, security_type, model, ticker):
+        self.orders.cancel(OrderQueue.OPEN, security_type, model, ticker)
+
+    def close_all_positions(self, close_positions):
+        """
+            This method closes all positions that are to be closed.
+            The closes of each model portfolio are handed over in one
+            call through the parameter.
 
             Arguments:
             ----------
-                close_position - pointer (to parent_portfolio)
+                close_positions - pointer (to parent_portfolio)
         """
-        for security_type in self.positions_to_close:
-            for model in self.positions_to_close[security_type]:
-                if len(self.positions_to_close[security_type][model]) != 0:
-                    for security in self.positions_to_close[security_type][model]:
-                        close_position(security_type, model, security)
-                    # make list empty since all positions were closed
-                    self.positions_to_close[security_type][model] = list()
-
-    def open_all_positions(self, open_position):
+        for security_type, model, tickers, _, _ in self.orders.batches(OrderQueue.CLOSE):
+            close_positions(security_type, model, tickers)
+        # drop the closes since all positions were closed
+        self.orders.clear(OrderQueue.CLOSE)
+
+    def open_all_positions(self, open_positions):
         """
             This method opens all positions that are to be opened.
-            It is a bit sophisticated in the sense that it uses somewhat
-            of a pointer through the parameter
+            All the positions of a model are handed over as one batch
+            so they can be sized together by the model portfolio.
+
+            Arguments:
+            ----------
+                open_positions - pointer (to parent_portfolio)
+        """
+        for security_type, model, tickers, position_types, weights in self.orders.batches(OrderQueue.OPEN):
+            # Positions without a custom weight are equally weighted by the model portfolio
+            _positions = dict()
+            for security, position_type, weight in zip(tickers, position_types, weights):
+                _positions[security] = {'position_type': position_type}
+                if not np.isnan(weight):
+                    _positions[security]['allocation_percentage'] = weight
+            # Runs the open_positions method from ParentPortfolio
+            open_positions(security_type, model, _positions)
+        # drop the openings since all positions were opened
+        self.orders.clear(OrderQueue.OPEN)
+
+    def execute(self, close_positions, open_positions, prefetch_open_prices):
+        """
+            This method runs all the closes and then all the opens,
+            one call per model portfolio each. The open prices of all
+            the openings are fetched in one call in between.
 
             Arguments:
             ----------
-                open_position - pointer (to parent_portfolio)
+                close_positions - pointer (to parent_portfolio)
+                open_positions - pointer (to parent_portfolio)
+                prefetch_open_prices - pointer (to parent_portfolio)
         """
-        for security_type in self.positions_to_open:
-            for model in self.positions_to_open[security_type]:
-                _number_of_securities = len(self.positions_to_open[security_type][model])
-
-                # Only runs opening if there are positions to close
-                if _number_of_securities != 0:
-                    _allocation_percentage = int((1/_number_of_securities)*100)/100
-
-                    for security in self.positions_to_open[security_type][model]:
-                        _security_info = dict()
-                        # Grab information about the new position
-                        _security_info['position_type'] = self.positions_to_open[security_type][model][security]
-                        # Sets the allocation_percentage
-                        _security_info['allocation_percentage'] = _allocation_percentage
-                        # Runs the open_position method from ParentPortfolio
-                        open_position(security_type, model, security, _security_info)
-                    # make list empty since all positions were opened
-                    self.positions_to_open[security_type][model] = dict()
\ No newline at end of file
+        self.close_all_positions(close_positions)
+        prefetch_open_prices(self.get_batches_to_open())
+        self.open_all_positions(open_positions)
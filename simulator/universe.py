@@ -0,0 +1,126 @@
+import numpy as np
+from custom_exceptions import CUSTOM_EXCEPTIONS
+
+
+class DynamicUniverse:
+    """
+    This class is the object representation of a security universe
+    that changes through time. Symbols are added and removed on given
+    dates (listings, delistings, index reconstitutions) and the universe
+    is compiled against the trading schedule into a dates x symbols
+    membership index, so asking who is live on a date is an array lookup.
+
+    Functionalities:
+    - Store add/remove events
+    - Compile events into a per-date membership index over symbol ids
+    - Return the live members of any trading day
+
+    A plain list of tickers is a universe where every symbol is added
+    before the simulation starts.
+    """
+    def __init__(self, symbols=None):
+        # events have structure [(date, 'add' | 'remove', symbol), ...]
+        # a date of None means "before the simulation starts"
+        self.events = list()
+        self.symbols = list()
+        self.symbol_ids = dict()
+        # membership[date_index, symbol_id] is True if live on that date
+        self.membership = None
+        # changed[date_index] is True if the members differ from the day before
+        self.changed = None
+        self.trading_schedule = list()
+
+        if symbols is not None:
+            for symbol in symbols:
+                self.add(symbol)
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_all_symbols(self):
+        return list(self.symbols)
+
+    def get_symbol_id(self, symbol):
+        return self.symbol_ids[symbol]
+
+    def get_member_ids(self, date_index):
+        return np.flatnonzero(self.membership[date_index])
+
+    def get_members(self, date_index):
+        """
+        This methods returns the live symbols on a trading day.
+
+        Arguments:
+        ----------
+            date_index - integer (position in the trading schedule)
+        """
+        return [self.symbols[i] for i in self.get_member_ids(date_index)]
+
+    def has_changed(self, date_index):
+        return bool(self.changed[date_index])
+
+    def is_member(self, symbol, date_index):
+        if symbol not in self.symbol_ids:
+            return False
+        return bool(self.membership[date_index, self.symbol_ids[symbol]])
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def add(self, symbol, date=None):
+        self.add_event(date, 'add', symbol)
+
+    def remove(self, symbol, date):
+        self.add_event(date, 'remove', symbol)
+
+    def add_event(self, date, action, symbol):
+        if action not in ('add', 'remove'):
+            raise CUSTOM_EXCEPTIONS['bad_universe_event'](action)
+        if symbol not in self.symbol_ids:
+            self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        self.events.append((None if date is None else str(date), action, symbol))
+
+    def add_events(self, events):
+        for date, action, symbol in events:
+            self.add_event(date, action, symbol)
+
+    def compile(self, trading_schedule):
+        """
+        This method turns the add/remove events into the membership
+        index for the given trading schedule. An event takes effect on
+        the first trading day on or after its date.
+
+        Arguments:
+        ----------
+            trading_schedule - list of 'YYYY-MM-DD' strings
+        """
+        self.trading_schedule = trading_schedule
+        _number_of_dates = len(trading_schedule)
+        _schedule = np.array(trading_schedule, dtype=str)
+
+        # Events are applied in date order, ties keep insertion order
+        _events = sorted(
+            enumerate(self.events),
+            key=lambda event: ('' if event[1][0] is None else event[1][0], event[0])
+        )
+
+        # +1/-1 at the date index where a symbol goes live/dead
+        _delta = np.zeros((_number_of_dates + 1, len(self.symbols)), dtype=np.int8)
+        _live = np.zeros(len(self.symbols), dtype=bool)
+        for _, (date, action, symbol) in _events:
+            _id = self.symbol_ids[symbol]
+            _date_index = 0 if date is None else int(np.searchsorted(_schedule, date))
+            if action == 'add' and not _live[_id]:
+                _delta[_date_index, _id] += 1
+                _live[_id] = True
+            elif action == 'remove' and _live[_id]:
+                _delta[_date_index, _id] -= 1
+                _live[_id] = False
+
+        self.membership = np.cumsum(_delta[:-1], axis=0, dtype=np.int8) > 0
+
+        self.changed = np.zeros(_number_of_dates, dtype=bool)
+        if _number_of_dates != 0:
+            self.changed[0] = True
+            self.changed[1:] = np.any(self.membership[1:] != self.membership[:-1], axis=1)
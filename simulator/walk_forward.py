@@ -0,0 +1,287 @@
+import datetime
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from simulator import Simulator
+from shared_panel import PricePanel
+from robustness import RobustnessEngine, METRICS, returns_from_values
+from custom_exceptions import CUSTOM_EXCEPTIONS
+
+
+class WalkForward:
+    """
+    This class is the object representation of a walk-forward
+    optimization: the parameter grid of one model is evaluated on a
+    training window, the best parameters are run on the following test
+    window and the windows roll forward over the trading calendar.
+
+    For every fold the prices of the fold (training and test windows)
+    are loaded once with a single batch call and published to shared
+    memory (see shared_panel.py). The grid is evaluated across a pool
+    of worker processes that attach to the panel instead of loading or
+    copying it, and the panel is released before the next fold, so
+    memory stays bounded by one fold.
+
+    The out-of-sample equity curve is stitched from the returns of the
+    test windows, starting from the starting capital.
+    """
+    # Metrics where a lower value is better, the others are maximized
+    MINIMIZED = ('volatility',)
+
+    def __init__(self, model, security_universe, parameter_grid, data_source):
+        """
+        Arguments:
+        ----------
+            model - class object (Model subclass), must be importable
+                    by the worker processes
+            security_universe - list of tickers
+            parameter_grid - { 'parameter' : [values] } or list of
+                             parameter dictionaries
+            data_source - DataSource object
+        """
+        self.model = model
+        self.security_universe = list(security_universe)
+        self.parameters = make_parameter_grid(parameter_grid)
+        self.data_source = data_source
+
+        self.start_date = datetime.date(2000, 1, 1)
+        self.end_date = datetime.date.today()
+        self.train_days = 252
+        self.test_days = 63
+        # Expanding training windows when True, rolling otherwise
+        self.anchored = False
+        self.metric = 'sharpe'
+        self.processes = None
+        # Calendar days loaded before each fold for the model look back
+        self.look_back = 0
+
+        self.starting_capital = 1000000
+        self.minimum_cash_percentage = 0
+        self.maximum_single_percent_allocation = 0.05
+
+        self.trading_schedule = list()
+        self.folds = list()
+
+    # --------------------------------------------
+    #               SET METHODS
+    # --------------------------------------------
+    def set_start_date(self, start_date):
+        self.start_date = start_date
+
+    def set_end_date(self, end_date):
+        self.end_date = end_date
+
+    def set_windows(self, train_days, test_days, anchored=False):
+        """
+        Arguments:
+        ----------
+            train_days - integer, trading days of a training window
+            test_days - integer, trading days of a test window (and step)
+            anchored - boolean, training windows all start on the start date
+        """
+        self.train_days = train_days
+        self.test_days = test_days
+        self.anchored = anchored
+
+    def set_metric(self, metric):
+        if metric not in METRICS:
+            raise CUSTOM_EXCEPTIONS['unknown_choice']('metric', metric, METRICS)
+        self.metric = metric
+
+    def set_processes(self, processes):
+        self.processes = processes
+
+    def set_look_back(self, look_back):
+        self.look_back = look_back
+
+    def set_starting_capital(self, value):
+        self.starting_capital = value
+
+    def set_minimum_cash_percentage(self, minimum_cash_percentage):
+        self.minimum_cash_percentage = minimum_cash_percentage
+
+    def set_maximum_single_percent_allocation(self, max_percent):
+        self.maximum_single_percent_allocation = max_percent
+
+    # --------------------------------------------
+    #               GET METHODS
+    # --------------------------------------------
+    def get_folds(self):
+        return self.folds
+
+    def get_out_of_sample_curve(self):
+        """
+        Return
+        ------
+        Series of the stitched out-of-sample value, by date, from the
+        returns of the test windows
+        """
+        _dates = list()
+        _returns = list()
+        for fold in self.folds:
+            if 'test_returns' not in fold:
+                continue
+            # Every test window starts in cash, its first day is flat
+            _dates += fold['test_dates']
+            _returns += [np.zeros(1), fold['test_returns']]
+        if len(_returns) == 0:
+            return pd.Series(dtype=float)
+        _values = self.starting_capital * np.cumprod(1 + np.nan_to_num(np.concatenate(_returns)))
+        return pd.Series(_values, index=_dates)
+
+    # --------------------------------------------
+    #               OTHER METHODS
+    # --------------------------------------------
+    def build_folds(self):
+        """
+        This method splits the trading calendar into folds.
+
+        Return
+        ------
+        [{'train': (start, end), 'test': (start, end)}, ...] with end
+        dates inclusive
+        """
+        _simulator = Simulator()
+        _simulator.set_start_date(self.start_date)
+        _simulator.set_end_date(self.end_date)
+        _simulator.build_trading_schedule()
+        self.trading_schedule = _simulator.trading_schedule
+
+        self.folds = list()
+        _test_start = self.train_days
+        while _test_start < len(self.trading_schedule):
+            _train_start = 0 if self.anchored else _test_start - self.train_days
+            _test_end = min(_test_start + self.test_days, len(self.trading_schedule)) - 1
+            self.folds.append({
+                'train': (self.trading_schedule[_train_start], self.trading_schedule[_test_start - 1]),
+                'test': (self.trading_schedule[_test_start], self.trading_schedule[_test_end])
+            })
+            _test_start += self.test_days
+        return self.folds
+
+    def load_fold(self, fold):
+        """
+        This method loads the prices of a fold in one batch call and
+        publishes them to shared memory.
+
+        Return
+        ------
+        (PricePanel, handle), the caller closes the panel
+        """
+        _start_date = (
+            datetime.date.fromisoformat(fold['train'][0])
+            - datetime.timedelta(days=self.look_back + self.data_source.open_price_look_back)
+        )
+        _end_date = datetime.date.fromisoformat(fold['test'][1]) + datetime.timedelta(days=1)
+        _frames = self.data_source.get_batch_price_time_bars(
+            self.security_universe, 'Daily', str(_start_date), str(_end_date)
+        )
+        _calendar = [i for i in self.trading_schedule if fold['train'][0] <= i <= fold['test'][1]]
+        _panel = PricePanel.from_frames(_frames, calendar=_calendar)
+        return _panel, _panel.publish()
+
+    def make_task(self, handle, parameters, window):
+        return {
+            'handle': handle,
+            'model': self.model,
+            'parameters': parameters,
+            'security_universe': self.security_universe,
+            'start_date': window[0],
+            'end_date': window[1],
+            'starting_capital': self.starting_capital,
+            'minimum_cash_percentage': self.minimum_cash_percentage,
+            'maximum_single_percent_allocation': self.maximum_single_percent_allocation
+        }
+
+    def score(self, returns):
+        if returns.shape[0] < 2:
+            return np.nan
+        _engine = RobustnessEngine(returns)
+        return _engine.compute_metrics(_engine.returns[np.newaxis, :], (self.metric,))[self.metric][0]
+
+    def select(self, scores):
+        """
+        Index of the best parameters (NaN scores are never picked).
+        """
+        _scores = np.asarray(scores, dtype=float)
+        if np.isnan(_scores).all():
+            return 0
+        if self.metric in self.MINIMIZED:
+            return int(np.nanargmin(_scores))
+        return int(np.nanargmax(_scores))
+
+    def run(self):
+        """
+        This method runs every fold: the grid on the training window,
+        then the winner on the test window.
+
+        Return
+        ------
+        Series of the stitched out-of-sample value (see get_out_of_sample_curve())
+        """
+        self.build_folds()
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            for fold in self.folds:
+                _panel, _handle = self.load_fold(fold)
+                try:
+                    _tasks = [self.make_task(_handle, parameters, fold['train']) for parameters in self.parameters]
+                    _train_returns = list(executor.map(_evaluate, _tasks))
+                    fold['train_scores'] = [self.score(i['returns']) for i in _train_returns]
+                    _best = self.select(fold['train_scores'])
+                    fold['parameters'] = self.parameters[_best]
+
+                    _test = executor.submit(_evaluate, self.make_task(_handle, fold['parameters'], fold['test'])).result()
+                    fold['test_returns'] = _test['returns']
+                    fold['test_dates'] = _test['dates']
+                    fold['test_score'] = self.score(_test['returns'])
+                finally:
+                    _panel.close()
+        return self.get_out_of_sample_curve()
+
+
+def make_parameter_grid(parameter_grid):
+    """
+    Return
+    ------
+    list of parameter dictionaries, the cartesian product of a
+    { 'parameter' : [values] } grid
+    """
+    if isinstance(parameter_grid, dict):
+        _keys = list(parameter_grid)
+        return [dict(zip(_keys, values)) for values in itertools.product(*[parameter_grid[i] for i in _keys])]
+    return list(parameter_grid)
+
+
+def _evaluate(task):
+    """
+    Runs one parameter set on one window in a worker process, on the
+    shared panel of the fold.
+
+    Return
+    ------
+    { 'returns' : daily returns of the parent portfolio, 'dates' : trading days }
+    """
+    _simulator = Simulator()
+    _simulator.set_start_date(datetime.date.fromisoformat(task['start_date']))
+    _simulator.set_end_date(datetime.date.fromisoformat(task['end_date']))
+    _simulator.set_starting_capital(task['starting_capital'])
+    _simulator.set_minimum_cash_percentage(task['minimum_cash_percentage'])
+    _simulator.set_maximum_single_percent_allocation(task['maximum_single_percent_allocation'])
+    _simulator.attach_price_panel(task['handle'])
+    try:
+        _simulator.add_model(
+            model_name='walk_forward',
+            model=task['model'],
+            security_type='equity',
+            security_universe=task['security_universe'],
+            allocation_percentage=1
+        )
+        _simulator.portfolio.models['equity']['walk_forward']['model'].set_parameters(task['parameters'])
+        _simulator.run()
+        return {
+            'returns': returns_from_values(_simulator.portfolio.pnl),
+            'dates': list(_simulator.trading_schedule)
+        }
+    finally:
+        _simulator.close_price_panel()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The simulator modules are imported flat, as when running from simulator/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'simulator'))
@@ -0,0 +1,42 @@
+import datetime
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+from pandas.tseries.offsets import CustomBusinessDay
+from data_source import InMemoryDataSource
+from simulator import Simulator
+
+
+def make_frame(dates, seed=0, volume=1e6):
+    _rng = np.random.default_rng(seed)
+    _prices = 100 * np.exp(np.cumsum(_rng.normal(0, 0.01, len(dates))))
+    return pd.DataFrame({
+        'date': dates,
+        'open': _prices,
+        'high': _prices * 1.01,
+        'low': _prices * 0.99,
+        'close': _prices,
+        'volume': volume
+    })
+
+
+def make_source(tickers, start='2021-12-01', end='2022-09-01', holidays=False):
+    """
+    InMemoryDataSource of random walks, on business days or on the US
+    federal holiday calendar the simulator trades on.
+    """
+    if holidays:
+        _dates = pd.date_range(start, end, freq=CustomBusinessDay(calendar=USFederalHolidayCalendar()))
+    else:
+        _dates = pd.bdate_range(start, end)
+    return InMemoryDataSource({ticker: make_frame(_dates, seed=i) for i, ticker in enumerate(tickers)})
+
+
+def make_simulator(data_source, start=datetime.date(2022, 1, 1), end=datetime.date(2022, 4, 1)):
+    _simulator = Simulator(data_source=data_source)
+    _simulator.set_starting_capital(1e6)
+    _simulator.set_minimum_cash_percentage(0.03)
+    _simulator.set_maximum_single_percent_allocation(0.5)
+    _simulator.set_start_date(start)
+    _simulator.set_end_date(end)
+    return _simulator
@@ -0,0 +1,32 @@
+import numpy as np
+from allocator import Allocator
+
+
+def test_allocation_does_not_depend_on_the_order():
+    _allocator = Allocator()
+    _prices = np.array([10.0, 250.0, 3000.0, 45.0])
+    _weights = np.array([0.1, 0.4, 0.2, 0.3])
+    _order = np.array([2, 0, 3, 1])
+    _opened, _amounts, _shares = _allocator.allocate(_prices, 1e5, 0, 0.25, _weights)
+    _opened_2, _amounts_2, _shares_2 = _allocator.allocate(_prices[_order], 1e5, 0, 0.25, _weights[_order])
+    assert (_opened[_order] == _opened_2).all()
+    assert (_amounts[_order] == _amounts_2).all()
+    assert (_shares[_order] == _shares_2).all()
+
+
+def test_allocation_caps_and_minimum_lot():
+    _allocator = Allocator()
+    _opened, _amounts, _shares = _allocator.allocate(np.array([10.0, 5000.0]), 10000, 0, 0.1)
+    # 1000 dollars cap: the 5000 dollar share cannot be bought
+    assert _opened.tolist() == [True, False]
+    assert _amounts.tolist() == [1000, 0]
+    assert _shares.tolist() == [100, 0]
+    assert _amounts.sum() <= 10000
+
+
+def test_allocation_rows_are_variants():
+    _allocator = Allocator()
+    _prices = np.array([10.0, 20.0])
+    _weights = np.array([[0.5, 0.5], [1.0, 0.0]])
+    _opened, _amounts, _shares = _allocator.allocate(_prices, np.array([[1000.0], [2000.0]]), np.zeros((2, 1)), 1, _weights)
+    assert _amounts.tolist() == [[500, 500], [2000, 0]]
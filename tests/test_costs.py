@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from helpers import make_frame
+from costs import COMMISSION_SCHEDULES, CostEngine
+from data_source import InMemoryDataSource
+from equity_portfolio import EquityPortfolio
+from simulator import Simulator
+
+
+def test_ib_fixed_schedule_minimum_and_maximum():
+    _commissions = COMMISSION_SCHEDULES['IB'].compute(np.array([0, 10, 1000, 100000]), np.array([0, 50, 1e5, 1e5]))
+    # 0 shares: nothing, 10 shares of 5 dollars: 1% cap, then per share
+    assert np.allclose(_commissions, [0, 0.5, 5, 500])
+
+
+def test_ib_tiered_schedule_uses_the_month_to_date_volume():
+    _commissions = COMMISSION_SCHEDULES['IB_TIERED'].compute(np.array([100000, 250000, 100000]), np.full(3, 1e7), 0)
+    assert np.allclose(_commissions, [350, 875, 200])
+
+
+def test_tiered_volume_resets_every_month():
+    _engine = CostEngine('IB_TIERED')
+    _engine.compute_commissions(np.array([400000]), np.array([1e7]), '2022-01-31')
+    assert _engine.get_month_volume() == 400000
+    _commissions = _engine.compute_commissions(np.array([1000]), np.array([1e5]), '2022-02-01')
+    assert _engine.get_month_volume() == 1000
+    assert np.isclose(_commissions[0], 3.5)
+
+
+def make_portfolio(broker, price=10.0, slippage=False):
+    _dates = pd.bdate_range('2022-01-01', '2022-03-01')
+    _frame = make_frame(_dates)
+    _frame['open'] = price
+    _portfolio = EquityPortfolio()
+    _portfolio.set_data_source(InMemoryDataSource({'A': _frame}))
+    _portfolio.set_date('2022-02-01')
+    _portfolio.set_cash_balance(1000)
+    _portfolio.set_maximum_percentage_single_security(1)
+    _engine = CostEngine(broker)
+    if slippage:
+        _engine.set_slippage()
+    _portfolio.set_cost_engine(_engine)
+    return _portfolio
+
+
+def test_broker_alone_does_not_slip_the_fills():
+    _portfolio = make_portfolio('IB')
+    _portfolio.open_positions({'A': {'position_type': 1}})
+    assert _portfolio.securities['A'].get_open_price() == 10.0
+    assert _portfolio.securities['A'].open_price == 10.0
+
+
+def test_simulator_broker_leaves_slippage_off():
+    _simulator = Simulator()
+    _simulator.set_broker('IB')
+    assert not _simulator.portfolio.get_cost_engine().has_slippage()
+    _simulator.set_slippage()
+    assert _simulator.portfolio.get_cost_engine().has_slippage()
+
+
+def test_unknown_broker_charges_no_commission():
+    with pytest.warns(UserWarning):
+        _engine = CostEngine('SOME_BROKER')
+    assert _engine.compute_commissions(np.array([100]), np.array([1e4]), '2022-01-03').tolist() == [0]
+
+
+def test_commission_is_covered_by_the_amount():
+    # 1000 dollars buy exactly 100 shares of 10 dollars, the commission
+    # has to come out of the shares
+    for slippage in (False, True):
+        _portfolio = make_portfolio('IB', slippage=slippage)
+        _portfolio.open_positions({'A': {'position_type': 1}})
+        _security = _portfolio.securities['A']
+        assert _security.get_number_of_shares() == 99
+        assert _security.get_cash_balance() >= 0
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+from data_source import PanelDataSource, SQLiteDataSource
+from shared_panel import PricePanel
+from helpers import make_source, make_simulator
+from custom_exceptions import UnsupportedConfiguration
+from test_model import DummyModel
+
+
+def test_in_memory_batch_bars_are_end_exclusive():
+    _source = make_source(['A', 'B'])
+    _data = _source.get_batch_price_time_bars(['A', 'B', 'Z'], 'Daily', '2022-01-03', '2022-01-07')
+    assert sorted(_data) == ['A', 'B']
+    assert list(_data['A']['date']) == ['2022-01-03', '2022-01-04', '2022-01-05', '2022-01-06']
+
+
+def test_in_memory_open_prices_pass_forward_the_last_open():
+    _source = make_source(['A'])
+    _frame = _source.data['Daily']['A']
+    # Saturday, the open of Friday is passed forward
+    _open_prices = _source.get_open_prices(['A', 'Z'], '2022-01-08')
+    assert _open_prices == {'A': _frame.loc[_frame['date'] == '2022-01-07', 'open'].values[0]}
+
+
+def test_in_memory_accepts_a_datetime_index():
+    _source = make_source(['A'])
+    _frame = _source.data['Daily']['A'].copy()
+    _frame.index = pd.to_datetime(_frame.pop('date'))
+    _source.add_data('B', _frame)
+    assert _source.get_price_time_bars('B', 'Daily', '2022-01-03', '2022-01-04')['date'].tolist() == ['2022-01-03']
+
+
+def test_panel_open_prices_before_the_first_date():
+    _source = make_source(['A', 'B'], start='2022-01-03')
+    _panel = PricePanel.from_frames(_source.get_batch_price_time_bars(['A', 'B'], 'Daily', '2022-01-01', '2022-02-01'))
+    _panel_source = PanelDataSource(_panel)
+    assert _panel_source.get_open_prices(['A', 'B'], '2022-01-01') == {}
+    assert _panel_source.get_open_prices(['A', 'B'], '2022-01-01') == _source.get_open_prices(['A', 'B'], '2022-01-01')
+    assert _panel_source.get_open_prices(['A'], '2022-01-04') == _source.get_open_prices(['A'], '2022-01-04')
+
+
+def test_data_sources_tell_what_they_serve(tmp_path):
+    _sqlite = SQLiteDataSource(str(tmp_path / 'bars.db'))
+    assert not _sqlite.has_futures_contracts() and not _sqlite.has_option_chains()
+    assert make_source(['A']).has_futures_contracts()
+    assert not PanelDataSource(None).has_futures_contracts()
+    assert PanelDataSource(None, make_source(['A'])).has_futures_contracts()
+    assert not PanelDataSource(None, _sqlite).has_option_chains()
+
+
+def test_futures_models_need_futures_contracts(tmp_path):
+    _sqlite = SQLiteDataSource(str(tmp_path / 'bars.db'))
+    _simulator = make_simulator(_sqlite)
+    with pytest.raises(UnsupportedConfiguration, match='SQLiteDataSource'):
+        _simulator.add_model(model_name='F', model=DummyModel, security_type='futures', security_universe=['ES'],
+                             allocation_percentage=1)
+    # Equities are fine
+    _simulator.add_model(model_name='E', model=DummyModel, security_type='equity', security_universe=['A'],
+                         allocation_percentage=1)
+
+    _simulator = make_simulator(make_source(['A']))
+    _simulator.add_model(model_name='F', model=DummyModel, security_type='futures', security_universe=['ES'],
+                         allocation_percentage=1)
+    with pytest.raises(UnsupportedConfiguration, match='futures contracts'):
+        _simulator.set_data_source(_sqlite)
+
+
+def test_sqlite_batch_matches_in_memory(tmp_path):
+    _source = make_source(['A', 'B'])
+    _frames = _source.get_batch_price_time_bars(['A', 'B'], 'Daily', '2022-01-01', '2022-03-01')
+    _rows = list()
+    for symbol in _frames:
+        _frame = _frames[symbol].assign(symbol=symbol, timespan='Daily')
+        _frame['date'] = _frame['date'].astype(str).str[:10]
+        _rows.append(_frame)
+    _sqlite = SQLiteDataSource(str(tmp_path / 'bars.db'), pool_size=2)
+    with _sqlite.connection() as _connection:
+        pd.concat(_rows).to_sql('price_bars', _connection, index=False)
+    # Chunks of one symbol, so the batch takes two queries
+    _sqlite.max_variables = 1
+
+    _data = _sqlite.get_batch_price_time_bars(['A', 'B', 'C'], 'Daily', '2022-01-10', '2022-02-01')
+    assert sorted(_data) == ['A', 'B']
+    assert _sqlite.get_open_prices(['A', 'B'], '2022-01-17') == _source.get_open_prices(['A', 'B'], '2022-01-17')
+    assert _sqlite.connections_created == 1
+    _sqlite.close()
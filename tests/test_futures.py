@@ -0,0 +1,122 @@
+import datetime
+import numpy as np
+import pandas as pd
+from helpers import make_simulator
+from data_source import InMemoryDataSource
+from model import Model
+from roll_index import RollIndex
+from future import Future
+from simulator import make_trading_schedule
+
+CONTRACTS = pd.DataFrame({'symbol': ['ESH22', 'ESM22'], 'expiry': ['2022-03-18', '2022-06-17'], 'multiplier': 50})
+SCHEDULE = make_trading_schedule(datetime.date(2022, 1, 1), datetime.date(2022, 7, 15))
+
+
+class LongES(Model):
+    def __init__(self):
+        Model.__init__(self)
+
+    def run(self):
+        return {'ES': 1}
+
+
+def make_futures_source():
+    # ESM22 trades 10 points above ESH22
+    _dates = pd.bdate_range('2021-12-01', '2022-09-01')
+    _prices = 4000 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(_dates))))
+    _source = InMemoryDataSource()
+    for symbol, premium in (('ESH22', 0), ('ESM22', 10)):
+        _open = _prices + premium
+        _source.add_data(symbol, pd.DataFrame({'date': _dates, 'open': _open, 'high': _open, 'low': _open,
+                                               'close': _open, 'volume': 1e6}))
+    _source.add_futures_contracts('ES', CONTRACTS)
+    return _source
+
+
+def get_opens(source, symbol):
+    _frame = source.get_price_time_bars(symbol, 'Daily', SCHEDULE[0], '2022-07-16')
+    return pd.Series(_frame['open'].values, index=[str(i).split()[0] for i in _frame['date']]).reindex(SCHEDULE)
+
+
+def test_roll_index_selects_the_front_contract():
+    _source = make_futures_source()
+    _index = RollIndex(roll_days=5)
+    _index.compile(SCHEDULE, {'ES': CONTRACTS}, _source)
+
+    # Rolled 5 trading days before the expiry, nothing left after the last roll
+    _roll = SCHEDULE.index('2022-03-18') - 5
+    _end = SCHEDULE.index('2022-06-17') - 5
+    assert _index.get_contract('ES', _roll - 1) == 'ESH22'
+    assert _index.get_contract('ES', _roll) == 'ESM22'
+    assert _index.get_contract('ES', _end - 1) == 'ESM22'
+    assert _index.get_contract('ES', _end) is None
+
+    _front = np.where(np.arange(len(SCHEDULE)) < _roll, get_opens(_source, 'ESH22'), get_opens(_source, 'ESM22'))
+    _front[_end:] = np.nan
+    assert np.allclose(_index.prices[:, 0], _front, equal_nan=True)
+    _gaps = np.zeros(len(SCHEDULE))
+    _gaps[_roll] = 10
+    assert np.allclose(_index.roll_gaps[:, 0], _gaps)
+
+
+def test_back_adjusted_prices_have_no_roll_gap():
+    _source = make_futures_source()
+    _index = RollIndex(roll_days=5)
+    _index.compile(SCHEDULE, {'ES': CONTRACTS}, _source)
+    _continuous = _index.get_continuous_prices('ES')
+    _roll = SCHEDULE.index('2022-03-18') - 5
+    # Before the roll the old contract is shifted up by the gap
+    assert np.allclose(_continuous.values[:_roll], get_opens(_source, 'ESH22').values[:_roll] + 10)
+    assert np.allclose(_continuous.values[_roll:_roll + 5], get_opens(_source, 'ESM22').values[_roll:_roll + 5])
+
+
+def test_future_roll_carries_the_pnl_over():
+    _future = Future()
+    _future.set_contract('ESH22')
+    _future.set_open_price(4000)
+    _future.set_commission(2.5)
+    _future.set_cash_balance(100)
+    _future.roll('ESM22', 10)
+    assert _future.get_contract() == 'ESM22'
+    assert _future.open_price == 4010
+    assert _future.get_number_of_rolls() == 1
+    assert _future.get_cash_balance() == 97.5
+
+
+def test_pnl_is_continuous_across_the_roll_and_the_root_closes_at_the_end():
+    _source = make_futures_source()
+    _simulator = make_simulator(_source, end=datetime.date(2022, 7, 15))
+    _simulator.add_model(model_name='F', model=LongES, security_type='futures', security_universe=['ES'],
+                         allocation_percentage=1)
+    _portfolio = _simulator.portfolio.models['futures']['F']['portfolio']
+    _held = list()
+    _update_pnl = _portfolio.update_pnl
+
+    def update_pnl():
+        _update_pnl()
+        if 'ES' in _portfolio.securities:
+            _held.append((_portfolio.securities['ES'].get_number_of_shares(),
+                          _portfolio.securities['ES'].get_number_of_rolls()))
+        else:
+            _held.append((0, 0))
+    _portfolio.update_pnl = update_pnl
+    _simulator.run()
+
+    # Holdings are recorded when marked to market, before the day's opens
+    _contracts = np.array([i[0] for i in _held])
+    _rolls = np.array([i[1] for i in _held])
+    _first = SCHEDULE.index('2022-01-04') + 1
+    _roll = SCHEDULE.index('2022-03-18') - 5
+    _end = SCHEDULE.index('2022-06-17') - 5
+    assert _contracts[_first] > 0
+    assert np.all(_contracts[_first:_end + 1] == _contracts[_first]) and np.all(_contracts[_end + 1:] == 0)
+    assert _rolls[_roll - 1] == 0 and _rolls[_roll] == 1
+    # The root is closed once its contracts run out
+    assert len(_portfolio.securities) == 0
+
+    # Day to day the value moves with the back-adjusted series, the roll day included
+    _values = np.array(_portfolio.get_value_historical(), dtype=float)
+    _continuous = _portfolio.get_roll_index().get_continuous_prices('ES').values
+    _moves = _contracts[_first] * 50 * np.diff(_continuous)
+    assert np.allclose(np.diff(_values)[_first:_end - 1], _moves[_first:_end - 1])
+    assert np.all(_values[_end:] == _values[-1])
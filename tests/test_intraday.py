@@ -0,0 +1,136 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from helpers import make_simulator
+from model import Model
+from intraday import IntradayBarStore, IntradayBarSource
+from custom_exceptions import UnsupportedConfiguration
+
+BARS_PER_SESSION = 30
+
+
+class Counting(Model):
+    def __init__(self):
+        Model.__init__(self)
+        self.runs = 0
+
+    def run(self):
+        self.runs += 1
+        return {ticker: 1 for ticker in self.security_universe}
+
+
+def fail(*args):
+    raise AssertionError("the signal cache is used")
+
+
+def make_frame(seed, keep=None):
+    _timestamps = list()
+    for day in pd.bdate_range('2022-01-03', '2022-01-05'):
+        _timestamps += list(pd.date_range(day + pd.Timedelta('9h30m'), periods=BARS_PER_SESSION, freq='min'))
+    _prices = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.0005, len(_timestamps))))
+    _frame = pd.DataFrame({'datetime': _timestamps, 'open': _prices, 'high': _prices, 'low': _prices,
+                           'close': _prices, 'volume': 1.0})
+    return _frame if keep is None else _frame[keep].reset_index(drop=True)
+
+
+def make_store(directory):
+    # B misses the first bar of every session and a few bars within them
+    _minutes = np.arange(3 * BARS_PER_SESSION) % BARS_PER_SESSION
+    _keep = (_minutes != 0) & (_minutes % 7 != 3)
+    return IntradayBarStore.write(str(directory), {'A': make_frame(0), 'B': make_frame(1, _keep)})
+
+
+def get_filled_opens(session):
+    # Opens of every bar of the session, forward-filled within the session only
+    _frames = {'A': make_frame(0), 'B': make_frame(1)}
+    _minutes = np.arange(3 * BARS_PER_SESSION) % BARS_PER_SESSION
+    _frames['B'].loc[(_minutes == 0) | (_minutes % 7 == 3), 'open'] = np.nan
+    _opens = pd.DataFrame({i: _frames[i]['open'].values for i in _frames}, index=_frames['A']['datetime'])
+    return _opens[_opens.index.strftime('%Y-%m-%d') == session].ffill()
+
+
+def test_intraday_runs_bypass_the_signal_cache(tmp_path, monkeypatch):
+    _store = make_store(tmp_path / 'store')
+    _simulator = make_simulator(None, start=datetime.date(2022, 1, 3), end=datetime.date(2022, 1, 5))
+    _simulator.add_model(model_name='M', model=Counting, security_type='equity', security_universe=['A', 'B'],
+                         allocation_percentage=1)
+    _simulator.set_signal_cache(str(tmp_path / 'cache'))
+    _cache = _simulator.get_signal_cache()
+    for method in ('has_signals', 'get_signals', 'record', 'save'):
+        monkeypatch.setattr(_cache, method, fail)
+
+    _simulator.run_intraday(_store)
+    assert _simulator.portfolio.models['equity']['M']['model'].runs == 3 * BARS_PER_SESSION
+    assert list((tmp_path / 'cache').iterdir()) == list()
+
+
+def test_iterate_bars_forward_fills_the_opens(tmp_path):
+    _source = IntradayBarSource(make_store(tmp_path / 'store'), batch_size=4)
+    for session in ('2022-01-03', '2022-01-04'):
+        _expected = get_filled_opens(session)
+        _timestamps = list()
+        for i, timestamp in enumerate(_source.iterate_bars(session)):
+            _timestamps.append(timestamp)
+            _opens = _source.get_open_prices(['A', 'B', 'C'], timestamp)
+            assert _opens['A'] == _expected['A'].iloc[i]
+            if np.isnan(_expected['B'].iloc[i]):
+                # No bar of B yet in the session, nothing carried over from the day before
+                assert 'B' not in _opens
+            else:
+                assert _opens['B'] == _expected['B'].iloc[i]
+        assert _timestamps == list(_expected.index.strftime('%Y-%m-%d %H:%M'))
+
+
+def test_bars_are_capped_at_the_current_bar(tmp_path):
+    _source = IntradayBarSource(make_store(tmp_path / 'store'))
+    _bars = _source.iterate_bars('2022-01-04')
+    for _ in range(5):
+        _timestamp = next(_bars)
+    assert _timestamp == '2022-01-04 09:34'
+    _data = _source.get_batch_price_time_bars(['A', 'B'], 'Daily', '2022-01-04', '2022-01-06')
+    assert list(_data['A']['date'])[-1] == '2022-01-04T09:34'
+    assert _data['A'].shape[0] == 5
+    # B has no bar at 09:30 and 09:33
+    assert _data['B'].shape[0] == 3
+    _data = _source.get_batch_price_time_bars(['A'], 'Daily', '2022-01-03', '2022-01-06')
+    assert _data['A'].shape[0] == BARS_PER_SESSION + 5
+
+
+def test_pnl_is_recorded_per_bar(tmp_path):
+    _store = make_store(tmp_path / 'store')
+    _simulator = make_simulator(None, start=datetime.date(2022, 1, 3), end=datetime.date(2022, 1, 5))
+    _simulator.add_model(model_name='M', model=Counting, security_type='equity', security_universe=['A', 'B'],
+                         allocation_percentage=1)
+    _simulator.run_intraday(_store)
+    _pnl = np.array(_simulator.portfolio.pnl, dtype=float)
+    assert _pnl.shape[0] == 3 * BARS_PER_SESSION
+
+    # Held from the second bar on: every bar moves the value by shares x change of the open
+    _portfolio = _simulator.portfolio.models['equity']['M']['portfolio']
+    _opens = pd.concat([get_filled_opens(i) for i in ('2022-01-03', '2022-01-04', '2022-01-05')])
+    _moves = np.zeros(_pnl.shape[0])
+    for ticker in ('A', 'B'):
+        _shares = _portfolio.securities[ticker].get_number_of_shares()
+        assert _shares > 0
+        _changes = np.diff(_opens[ticker].ffill().values, prepend=np.nan)
+        _moves += _shares * np.where(np.isnan(_changes), 0, _changes)
+    assert np.allclose(np.diff(_pnl)[1:], _moves[2:], rtol=0, atol=1e-6)
+
+
+def test_intraday_rejects_daily_estimates(tmp_path):
+    _store = make_store(tmp_path / 'store')
+    for configure in (lambda simulator: simulator.set_risk_limits(max_volatility=0.1),
+                      lambda simulator: simulator.set_slippage()):
+        _simulator = make_simulator(None, start=datetime.date(2022, 1, 3), end=datetime.date(2022, 1, 5))
+        _simulator.add_model(model_name='M', model=Counting, security_type='equity', security_universe=['A'],
+                             allocation_percentage=1)
+        configure(_simulator)
+        with pytest.raises(UnsupportedConfiguration):
+            _simulator.run_intraday(_store)
+    # Commissions alone are fine
+    _simulator = make_simulator(None, start=datetime.date(2022, 1, 3), end=datetime.date(2022, 1, 5))
+    _simulator.add_model(model_name='M', model=Counting, security_type='equity', security_universe=['A'],
+                         allocation_percentage=1)
+    _simulator.set_broker('IB')
+    _simulator.run_intraday(_store)
@@ -0,0 +1,90 @@
+import datetime
+import numpy as np
+import pytest
+from helpers import make_source, make_simulator
+from model import Model
+from lockstep import LockstepSimulator
+from test_trade_manager import Weighted
+from custom_exceptions import UnsupportedConfiguration
+
+TICKERS = ['SPY', 'QQQ', 'GLD']
+VARIANTS = [{'look_back': look_back, 'flip': flip} for look_back in (5, 20) for flip in (1, -1)]
+START = datetime.date(2022, 1, 1)
+END = datetime.date(2022, 5, 1)
+
+
+class Threshold(Model):
+    def __init__(self):
+        Model.__init__(self)
+        self.look_back = 10
+        self.flip = 1
+
+    def run(self):
+        _signals = dict()
+        _data = self.pull_data(self.security_universe, look_back=self.look_back, columns=['open'])
+        for ticker in _data:
+            _opens = _data[ticker]['open'].values
+            _signals[ticker] = self.flip if _opens[-1] > _opens.mean() else -self.flip
+        return _signals
+
+
+def make_lockstep(source):
+    _lockstep = LockstepSimulator(source)
+    _lockstep.set_starting_capital(1e6)
+    _lockstep.set_minimum_cash_percentage(0.03)
+    _lockstep.set_maximum_single_percent_allocation(0.5)
+    _lockstep.set_start_date(START)
+    _lockstep.set_end_date(END)
+    return _lockstep
+
+
+def test_lockstep_matches_separate_simulator_runs():
+    _source = make_source(TICKERS)
+    _lockstep = make_lockstep(_source)
+    _lockstep.set_model(Threshold, TICKERS, VARIANTS)
+    _lockstep.run()
+    _pnl = _lockstep.get_pnl()
+    assert _pnl.shape[1] == len(VARIANTS)
+
+    for k, parameters in enumerate(VARIANTS):
+        _simulator = make_simulator(_source, START, END)
+        _simulator.add_model(model_name='M', model=Threshold, security_type='equity', security_universe=TICKERS,
+                             allocation_percentage=1)
+        _simulator.portfolio.models['equity']['M']['model'].set_parameters(parameters)
+        _simulator.run()
+        assert np.allclose(_pnl[:, k], list(_simulator.portfolio.pnl), rtol=0, atol=1e-6)
+        assert np.allclose(_lockstep.get_value_historical()[:, k],
+                           list(_simulator.portfolio.models['equity']['M']['portfolio'].value_historical),
+                           rtol=0, atol=1e-6)
+
+
+def test_lockstep_uses_the_simulator_calendar():
+    _lockstep = make_lockstep(make_source(TICKERS))
+    _simulator = make_simulator(None, START, END)
+    _lockstep.build_trading_schedule()
+    _simulator.build_trading_schedule()
+    assert _lockstep.trading_schedule == _simulator.trading_schedule
+
+
+def test_lockstep_rejects_what_it_cannot_reproduce():
+    _lockstep = make_lockstep(make_source(TICKERS))
+    _lockstep.set_broker('')
+    _lockstep.set_history_limit(None)
+    with pytest.raises(UnsupportedConfiguration):
+        _lockstep.set_broker('IB')
+    with pytest.raises(UnsupportedConfiguration):
+        _lockstep.set_slippage()
+    with pytest.raises(UnsupportedConfiguration):
+        _lockstep.set_risk_limits(max_volatility=0.1)
+    with pytest.raises(UnsupportedConfiguration):
+        _lockstep.set_history_limit(20)
+    with pytest.raises(UnsupportedConfiguration):
+        _lockstep.set_model(Threshold, TICKERS, VARIANTS, security_type='futures')
+
+
+def test_lockstep_rejects_weighted_signals():
+    _lockstep = make_lockstep(make_source(['A', 'B']))
+    _lockstep.set_end_date(datetime.date(2022, 1, 10))
+    _lockstep.set_model(Weighted, ['A', 'B'], [dict(), dict()])
+    with pytest.raises(UnsupportedConfiguration):
+        _lockstep.run()
@@ -0,0 +1,61 @@
+import datetime
+import pytest
+from helpers import make_source, make_simulator
+from memory import BoundedDict, make_history, sizeof
+from test_model import DummyModel2
+
+LIMIT = 10
+
+
+def run(history_limit=None, memory_report=None):
+    _simulator = make_simulator(make_source(['A', 'B']), end=datetime.date(2022, 3, 1))
+    _simulator.add_model(model_name='M', model=DummyModel2, security_type='equity', security_universe=['A', 'B'],
+                         allocation_percentage=1)
+    if history_limit is not None:
+        _simulator.set_history_limit(history_limit)
+    if memory_report is not None:
+        _simulator.set_memory_report(**memory_report)
+    _simulator.run()
+    return _simulator
+
+
+def test_bounded_containers():
+    _history = make_history(3)
+    _history.extend(range(5))
+    assert list(_history) == [2, 3, 4]
+    assert isinstance(make_history(None), list)
+    _dated = BoundedDict(2)
+    for key in ('a', 'b', 'a', 'c'):
+        _dated[key] = key
+    assert list(_dated) == ['a', 'c']
+    assert sizeof(list(range(1000))) > sizeof(list(range(10)))
+
+
+def test_history_limit_bounds_every_history_and_keeps_the_results():
+    _full = run()
+    _bounded = run(history_limit=LIMIT)
+    assert len(_full.portfolio.pnl) > LIMIT
+    assert list(_bounded.portfolio.pnl) == list(_full.portfolio.pnl)[-LIMIT:]
+
+    _portfolio = _bounded.portfolio.models['equity']['M']['portfolio']
+    _full_portfolio = _full.portfolio.models['equity']['M']['portfolio']
+    assert list(_portfolio.pnl) == list(_full_portfolio.pnl)[-LIMIT:]
+    assert list(_portfolio.value_historical) == list(_full_portfolio.value_historical)[-LIMIT:]
+    assert len(_portfolio.position_distribution_historical) == LIMIT
+    assert len(_portfolio.securities) != 0
+    for security in _portfolio.securities:
+        assert len(_portfolio.securities[security].pnl) <= LIMIT
+
+
+def test_memory_report_samples_the_containers():
+    _simulator = run(memory_report={'interval': 10, 'trace': False})
+    _report = _simulator.get_memory_report()
+    _samples = _report.get_samples()
+    # One sample every interval trading days and one at the end
+    assert len(_samples) == (len(_simulator.trading_schedule) - 1) // 10 + 2
+    assert {'parent.pnl', 'M.pnl', 'M.value_historical', 'M.securities.pnl'} <= set(_samples[-1]['containers'])
+    assert _report.get_report().shape[0] == len(_samples)
+    assert len(_report.get_largest_containers(2)) == 2
+
+    with pytest.warns(UserWarning, match='budget'):
+        run(memory_report={'interval': 10, 'trace': False, 'budget': 1})
@@ -0,0 +1,131 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from helpers import make_source, make_simulator
+from data_source import PanelDataSource, SQLiteDataSource
+from shared_panel import PricePanel
+from model import Model
+from options_portfolio import OptionsPortfolio
+from option_chain import year_fractions
+from pricing import black_scholes
+
+CONTRACT = 'SPY220218C00100000'
+EXPIRY = '2022-02-18'
+
+
+class HoldContract(Model):
+    # Signals the same call every day, also after it expired
+    def __init__(self):
+        Model.__init__(self)
+
+    def run(self):
+        return {CONTRACT: 1}
+
+
+def make_portfolio(source, date):
+    _portfolio = OptionsPortfolio()
+    _portfolio.set_data_source(source)
+    _portfolio.set_date(date)
+    return _portfolio
+
+
+def run_options(source, end=datetime.date(2022, 3, 15)):
+    _simulator = make_simulator(source, end=end)
+    _simulator.set_maximum_single_percent_allocation(0.05)
+    _simulator.add_model(model_name='O', model=HoldContract, security_type='options', security_universe=['SPY'],
+                         allocation_percentage=1)
+    _portfolio = _simulator.portfolio.models['options']['O']['portfolio']
+    _opened = list()
+    _create_security = _portfolio.create_security
+
+    def create_security(ticker):
+        _opened.append(str(_portfolio.date))
+        return _create_security(ticker)
+    _portfolio.create_security = create_security
+    return _simulator, _portfolio, _opened
+
+
+def test_reprice_uses_the_chain_and_the_flat_fallback():
+    _source = make_source(['SPY'])
+    _portfolio = make_portfolio(_source, '2022-01-10')
+    _portfolio.set_volatility(0.3)
+    _spot = _source.get_open_prices(['SPY'], '2022-01-10')['SPY']
+    _time = year_fractions([EXPIRY], '2022-01-10')
+
+    _prices = _portfolio.reprice([CONTRACT])
+    _expected = black_scholes(_spot, 100, _time, 0, 0.3, True)
+    assert _prices['tickers'] == [CONTRACT]
+    assert _prices['price'][0] == pytest.approx(_expected['price'][0])
+
+    _source.add_option_chain('SPY', pd.DataFrame({
+        'date': ['2022-01-07'], 'expiry': [EXPIRY], 'strike': [100.0], 'right': ['C'], 'implied_volatility': [0.5]
+    }))
+    _portfolio = make_portfolio(_source, '2022-01-10')
+    _prices = _portfolio.reprice([CONTRACT, 'QQQ220218C00100000'])
+    assert _prices['tickers'] == [CONTRACT]
+    assert _prices['price'][0] == pytest.approx(black_scholes(_spot, 100, _time, 0, 0.5, True)['price'][0])
+
+
+def test_open_reprice_and_greeks():
+    _source = make_source(['SPY'])
+    _simulator, _portfolio, _opened = run_options(_source, end=datetime.date(2022, 1, 20))
+    _simulator.run()
+    assert _opened == ['2022-01-04']
+    _option = _portfolio.securities[CONTRACT]
+    _spot = _source.get_open_prices(['SPY'], '2022-01-20')['SPY']
+    _expected = black_scholes(_spot, 100, year_fractions([EXPIRY], '2022-01-20'), 0, 0.2, True)
+    assert _option.get_current_price() == pytest.approx(_expected['price'][0])
+    assert _option.get_greeks()['delta'] == pytest.approx(_expected['delta'][0])
+
+    _size = _option.get_number_of_shares() * 100
+    assert _size > 0
+    _greeks = _portfolio.get_greeks()
+    for greek in ('delta', 'gamma', 'vega', 'theta', 'rho'):
+        assert _greeks[greek] == pytest.approx(_size * _expected[greek][0])
+
+
+def test_expired_contracts_settle_and_are_not_reopened():
+    _source = make_source(['SPY'])
+    _simulator, _portfolio, _opened = run_options(_source)
+    _closes = list()
+    _close_position = _portfolio.close_position
+
+    def close_position(ticker):
+        _closes.append((str(_portfolio.date), _portfolio.securities[ticker].get_current_price()))
+        return _close_position(ticker)
+    _portfolio.close_position = close_position
+    _simulator.run()
+
+    # Opened once, closed at intrinsic value on the expiry, never opened again
+    assert _opened == ['2022-01-04']
+    _spot = _source.get_open_prices(['SPY'], EXPIRY)['SPY']
+    assert _closes == [(EXPIRY, pytest.approx(max(_spot - 100, 0)))]
+    assert len(_portfolio.securities) == 0
+    _values = np.array(_portfolio.get_value_historical(), dtype=float)
+    _after_expiry = len(_simulator.trading_schedule) - _simulator.trading_schedule.index(EXPIRY)
+    assert np.all(_values[-_after_expiry:] == _values[-1])
+
+
+def test_expired_contracts_are_not_priced_for_opening():
+    _portfolio = make_portfolio(make_source(['SPY']), '2022-02-22')
+    assert _portfolio.get_open_prices([CONTRACT]) == dict()
+    assert _portfolio.compare_security(CONTRACT, 1) == (False, False)
+    _portfolio.set_date('2022-02-17')
+    assert list(_portfolio.get_open_prices([CONTRACT])) == [CONTRACT]
+    assert _portfolio.compare_security(CONTRACT, 1) == (False, True)
+
+
+def test_options_fall_back_to_the_flat_volatility_without_chains(tmp_path):
+    _source = make_source(['SPY'])
+    _panel = PricePanel.from_frames(_source.get_batch_price_time_bars(['SPY'], 'Daily', '2022-01-01', '2022-02-01'))
+    # A panel without source has prices but no option chains
+    _portfolio = make_portfolio(PanelDataSource(_panel), '2022-01-10')
+    _portfolio.set_volatility(0.4)
+    _spot = _source.get_open_prices(['SPY'], '2022-01-10')['SPY']
+    _expected = black_scholes(_spot, 100, year_fractions([EXPIRY], '2022-01-10'), 0, 0.4, True)
+    assert _portfolio.reprice([CONTRACT])['price'][0] == pytest.approx(_expected['price'][0])
+
+    _simulator = make_simulator(SQLiteDataSource(str(tmp_path / 'bars.db')))
+    _simulator.add_model(model_name='O', model=HoldContract, security_type='options', security_universe=['SPY'],
+                         allocation_percentage=1)
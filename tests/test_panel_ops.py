@@ -0,0 +1,72 @@
+import datetime
+import numpy as np
+from helpers import make_source, make_simulator
+from model import Model
+from panel_ops import rank, quantile_buckets, lag, pct_change, rolling_mean, make_signals
+
+
+def test_trailing_bars_cover_the_window_across_holidays():
+    _source = make_source(['A', 'B'], start='2020-06-01', holidays=True)
+    _bars = _source.get_trailing_bars(['A', 'B', 'Z'], '2022-08-01', 253, ('close',))
+    assert _bars['close'].shape == (253, 3)
+    assert not np.isnan(_bars['close'][:, :2]).any()
+    assert np.isnan(_bars['close'][:, 2]).all()
+
+
+def test_trailing_bars_stop_where_the_data_starts():
+    _source = make_source(['A'], start='2022-06-01', holidays=True)
+    _bars = _source.get_trailing_bars(['A'], '2022-08-01', 253, ('close',))
+    _valid = ~np.isnan(_bars['close'][:, 0])
+    # The bars there are, at the bottom
+    assert _valid[-1] and not _valid[0]
+    assert _valid.sum() == len(_source.get_price_time_bars('A', 'Daily', '2022-06-01', '2022-08-01'))
+
+
+def test_panel_and_frames_give_the_same_trailing_bars():
+    _source = make_source(['A', 'B'], start='2020-06-01', holidays=True)
+    _simulator = make_simulator(_source, start=datetime.date(2021, 8, 1), end=datetime.date(2022, 8, 1))
+    _simulator.add_model(model_name='M', model=Model, security_type='equity', security_universe=['A', 'B'],
+                         allocation_percentage=1)
+    _simulator.load_price_panel(look_back=400)
+    _panel_bars = _simulator.get_data_source().get_trailing_bars(['A', 'B'], '2022-07-01', 253, ('close',))
+    _frame_bars = _source.get_trailing_bars(['A', 'B'], '2022-07-01', 253, ('close',))
+    assert np.array_equal(_panel_bars['close'], _frame_bars['close'])
+
+
+def test_rank_averages_ties_and_skips_nan():
+    _ranks = rank(np.array([[3.0, 1.0, np.nan, 3.0], [1.0, 2.0, 3.0, 4.0]]))
+    assert np.allclose(_ranks, [[2.5, 1, np.nan, 2.5], [1, 2, 3, 4]], equal_nan=True)
+    assert np.allclose(rank([2.0, 1.0], pct=True), [1, 0.5])
+
+
+def test_quantile_buckets_cover_every_bucket():
+    _buckets = quantile_buckets(np.arange(20.0), 10)
+    assert _buckets.tolist() == [i // 2 for i in range(20)]
+
+
+def test_time_series_operators():
+    _values = np.array([[1.0], [2.0], [np.nan], [4.0], [8.0]])
+    assert np.allclose(lag(_values, 1)[:, 0], [np.nan, 1, 2, np.nan, 4], equal_nan=True)
+    assert np.allclose(pct_change(_values)[:, 0], [np.nan, 1, np.nan, np.nan, 1], equal_nan=True)
+    assert np.allclose(rolling_mean(_values, 2, 1)[:, 0], [1, 1.5, 2, 4, 6], equal_nan=True)
+
+
+def test_momentum_example_of_the_module():
+    _tickers = [f"T{i}" for i in range(20)]
+    _source = make_source(_tickers, start='2020-06-01', holidays=True)
+
+    class Momentum(Model):
+        def run(self):
+            _close = self.pull_panel(253)['close']
+            _momentum = lag(_close, 21)[-1] / _close[0] - 1
+            self.valid = int((~np.isnan(_momentum)).sum())
+            _buckets = quantile_buckets(_momentum, 10)
+            return make_signals(self.security_universe, long=_buckets == 9, valid=~np.isnan(_momentum))
+
+    _simulator = make_simulator(_source, start=datetime.date(2022, 6, 1), end=datetime.date(2022, 6, 10))
+    _simulator.add_model(model_name='M', model=Momentum, security_type='equity', security_universe=_tickers,
+                         allocation_percentage=1)
+    _simulator.run()
+    assert _simulator.portfolio.models['equity']['M']['model'].valid == 20
+    # Top decile of 20 tickers
+    assert len(_simulator.portfolio.models['equity']['M']['portfolio'].securities) == 2
@@ -0,0 +1,17 @@
+import numpy as np
+from plotting import lttb
+
+
+def test_lttb_keeps_the_ends_and_the_extremes():
+    _values = np.zeros(1000)
+    _values[317] = 10
+    _values[642] = -10
+    _kept = lttb(_values, 50)
+    assert _kept.shape[0] == 50
+    assert _kept[0] == 0 and _kept[-1] == 999
+    assert 317 in _kept and 642 in _kept
+    assert (np.diff(_kept) > 0).all()
+
+
+def test_lttb_short_series_are_kept_whole():
+    assert lttb(np.arange(10.0), 50).tolist() == list(range(10))
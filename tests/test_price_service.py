@@ -0,0 +1,57 @@
+import collections
+import datetime
+from helpers import make_source, make_simulator
+from data_source import DataSource
+from price_service import PriceService
+from test_model import DummyModel
+
+
+class CountingSource(DataSource):
+    # Records every open price request made to the wrapped source
+    def __init__(self, source):
+        self.source = source
+        self.calls = list()
+
+    def get_price_time_bars(self, symbol, timespan, start_date, end_date):
+        return self.source.get_price_time_bars(symbol, timespan, start_date, end_date)
+
+    def get_open_prices(self, symbols, date):
+        self.calls.append((str(date), list(symbols)))
+        return self.source.get_open_prices(symbols, date)
+
+
+def test_symbols_are_fetched_once_a_day():
+    _source = CountingSource(make_source(['A', 'B']))
+    _service = PriceService()
+    _service.set_data_source(_source)
+    _service.set_date('2022-01-03')
+    _prices = _service.get_open_prices(['A', 'B', 'Z', 'A'])
+    assert sorted(_prices) == ['A', 'B']
+    # Known and missing symbols are not asked for again the same day
+    assert _service.get_open_prices(['B', 'Z']) == {'B': _prices['B']}
+    assert _service.get_open_price('A') == _prices['A']
+    assert _source.calls == [('2022-01-03', ['A', 'B', 'Z'])]
+    assert _service.get_requests() == 1 and _service.get_symbols_requested() == 3
+
+    _service.set_prices({'Z': 10.0})
+    assert _service.get_open_price('Z') == 10.0
+    _service.set_date('2022-01-04')
+    _service.get_open_prices(['A', 'Z'])
+    assert _source.calls[-1] == ('2022-01-04', ['A', 'Z'])
+
+
+def test_models_sharing_tickers_fetch_them_once():
+    _source = CountingSource(make_source(['A', 'B', 'C']))
+    _simulator = make_simulator(_source, end=datetime.date(2022, 2, 1))
+    _simulator.add_model(model_name='M1', model=DummyModel, security_type='equity', security_universe=['A', 'B'],
+                         allocation_percentage=0.5)
+    _simulator.add_model(model_name='M2', model=DummyModel, security_type='equity', security_universe=['B', 'C'],
+                         allocation_percentage=0.5)
+    _simulator.run()
+
+    _requested = collections.Counter()
+    for date, symbols in _source.calls:
+        _requested.update((date, symbol) for symbol in symbols)
+    assert len(_requested) != 0
+    assert max(_requested.values()) == 1
+    assert {symbol for _, symbol in _requested} == {'A', 'B', 'C'}
@@ -0,0 +1,81 @@
+import numpy as np
+from risk import RiskEngine
+
+
+def make_engine(correlated=False, days=41, seed=0, method='ewma', window=60):
+    _engine = RiskEngine(method, window=window)
+    _engine.set_symbols(['A', 'B', 'C'])
+    _rng = np.random.default_rng(seed)
+    _prices = np.full(3, 100.0)
+    for day in range(days):
+        _returns = _rng.normal(0, 0.01, 3)
+        if correlated:
+            _returns[:] = _returns[0]
+        _prices = _prices * (1 + _returns)
+        _engine.update(dict(zip(['A', 'B', 'C'], _prices)))
+    return _engine
+
+
+def test_a_batch_opens_on_an_empty_book():
+    _engine = make_engine()
+    _engine.set_limits(max_risk_contribution=0.6)
+    assert _engine.is_ready()
+    assert _engine.check_openings({}, ['A', 'B', 'C'], np.array([0.3, 0.3, 0.3])).all()
+
+
+def test_risk_contribution_drops_the_worst_candidate():
+    _engine = make_engine()
+    _engine.set_limits(max_risk_contribution=0.7)
+    _allowed = _engine.check_openings({}, ['A', 'B', 'C'], np.array([0.1, 0.1, 0.9]))
+    assert _allowed.tolist() == [True, True, False]
+
+
+def test_window_matches_the_sample_covariance():
+    _rng = np.random.default_rng(1)
+    _prices = 100 * np.cumprod(1 + _rng.normal(0, 0.01, (30, 3)), axis=0)
+    _returns = _prices[1:] / _prices[:-1] - 1
+    _engine = RiskEngine('window', window=10)
+    _engine.set_symbols(['A', 'B', 'C'])
+    for day, prices in enumerate(_prices):
+        _engine.update(dict(zip(['A', 'B', 'C'], prices)))
+        # Before the window is full the covariance uses every return so far
+        if day >= 2:
+            _expected = np.cov(_returns[max(day - 10, 0):day], rowvar=False)
+            assert np.allclose(_engine.get_covariance(), _expected, rtol=1e-9, atol=1e-15)
+
+
+def test_risk_contribution_keeps_the_holdings_and_drops_the_largest_share():
+    _engine = make_engine(method='window', window=20)
+    _held = {'A': 0.2}
+    _weights = {'A': 0.2, 'B': 0.2, 'C': 0.6}
+    _variance = _engine.get_portfolio_variance(_weights)
+    _shares = {ticker: _weights[ticker] * _engine.get_marginal_contributions(_weights)[ticker] *
+               np.sqrt(_variance) / _variance for ticker in _weights}
+    assert max(_shares, key=_shares.get) == 'C'
+    _engine.set_limits(max_risk_contribution=(_shares['C'] + max(_shares['A'], _shares['B'])) / 2)
+    _allowed = _engine.check_openings(_held, ['B', 'C'], np.array([0.2, 0.6]))
+    assert _allowed.tolist() == [True, False]
+    # With C gone B is under the limit, the holding is never dropped
+    _kept = {'A': 0.2, 'B': 0.2}
+    _variance = _engine.get_portfolio_variance(_kept)
+    _share = 0.2 * _engine.get_marginal_contributions(_kept)['B'] * np.sqrt(_variance) / _variance
+    assert _share <= _engine.max_risk_contribution
+
+
+def test_volatility_is_checked_on_the_whole_batch():
+    _engine = make_engine(correlated=True)
+    _volatility = np.sqrt(_engine.get_portfolio_variance({'A': 0.3}) * 252)
+    # One candidate fits the limit, the three of them together do not
+    _engine.set_limits(max_volatility=_volatility * 2)
+    _allowed = _engine.check_openings({}, ['A', 'B', 'C'], np.array([0.3, 0.3, 0.3]))
+    assert _allowed.sum() == 2
+    _weights = {ticker: 0.3 for ticker, allowed in zip(['A', 'B', 'C'], _allowed) if allowed}
+    assert np.sqrt(_engine.get_portfolio_variance(_weights) * 252) <= _volatility * 2 + 1e-12
+
+
+def test_holdings_count_towards_the_batch():
+    _engine = make_engine(correlated=True)
+    _volatility = np.sqrt(_engine.get_portfolio_variance({'A': 0.3}) * 252)
+    _engine.set_limits(max_volatility=_volatility * 2)
+    _allowed = _engine.check_openings({'A': 0.3, 'B': 0.3}, ['C'], np.array([0.3]))
+    assert _allowed.tolist() == [False]
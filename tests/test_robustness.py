@@ -0,0 +1,33 @@
+import datetime
+import numpy as np
+from helpers import make_source, make_simulator
+from robustness import RobustnessEngine, METRICS
+from test_model import DummyModel
+
+
+def test_too_few_returns_give_nan_summaries():
+    for returns in ([], [0.01], [np.nan, np.nan, 0.02]):
+        _summary = RobustnessEngine(returns).run(100)
+        assert sorted(_summary) == sorted(METRICS)
+        assert all(np.isnan(_summary[metric]['observed']) for metric in METRICS)
+        assert all(_summary[metric]['values'].shape[0] == 0 for metric in METRICS)
+
+
+def test_bootstrap_is_seeded():
+    _returns = np.random.default_rng(0).normal(0, 0.01, 100)
+    _engine = RobustnessEngine(_returns)
+    _engine.set_seed(3)
+    _first = _engine.run(200)
+    _second = _engine.run(200)
+    assert np.array_equal(_first['sharpe']['values'], _second['sharpe']['values'])
+    assert _first['sharpe']['lower'] <= _first['sharpe']['upper']
+
+
+def test_simulator_report_with_a_single_day_run():
+    _source = make_source(['A', 'B'])
+    _simulator = make_simulator(_source, start=datetime.date(2022, 1, 3), end=datetime.date(2022, 1, 3))
+    _simulator.add_model(model_name='M', model=DummyModel, security_type='equity', security_universe=['A', 'B'],
+                         allocation_percentage=1)
+    _simulator.run()
+    _report = _simulator.robustness(number_of_paths=100)
+    assert np.isnan(_report['parent']['sharpe']['observed'])
@@ -0,0 +1,56 @@
+import datetime
+import numpy as np
+import pytest
+from helpers import make_source, make_simulator
+from model import Model
+from schedule import RebalanceSchedule
+from simulator import make_trading_schedule
+from custom_exceptions import BadRebalanceFrequency
+
+SCHEDULE = make_trading_schedule(datetime.date(2022, 1, 1), datetime.date(2022, 2, 28))
+
+
+class MonthEnd(Model):
+    def __init__(self):
+        Model.__init__(self)
+        self.set_schedule('month_end')
+        self.dates = list()
+
+    def run(self):
+        self.dates.append(str(self.current_date).split()[0])
+        return {ticker: 1 for ticker in self.security_universe}
+
+
+def get_active_dates(frequency, every=1, dates=None):
+    _schedule = RebalanceSchedule(frequency, every, dates)
+    _schedule.compile(SCHEDULE)
+    return [SCHEDULE[i] for i in _schedule.get_indices()]
+
+
+def test_frequencies():
+    assert get_active_dates('daily') == SCHEDULE
+    assert get_active_dates('month_end') == ['2022-01-31', '2022-02-28']
+    assert get_active_dates('weekly')[:3] == ['2022-01-07', '2022-01-14', '2022-01-21']
+    assert get_active_dates('every_n', every=10) == SCHEDULE[::10]
+    # Weekend and holiday dates move to the next trading day, dates after the schedule are dropped
+    assert get_active_dates('custom', dates=['2022-01-15', '2022-02-21', '2023-01-01']) == ['2022-01-18', '2022-02-22']
+    with pytest.raises(BadRebalanceFrequency):
+        RebalanceSchedule('yearly')
+
+
+def test_idle_days_only_mark_to_market():
+    _simulator = make_simulator(make_source(['A', 'B']), end=datetime.date(2022, 2, 28))
+    _simulator.add_model(model_name='M', model=MonthEnd, security_type='equity', security_universe=['A', 'B'],
+                         allocation_percentage=1)
+    _simulator.run()
+    _model = _simulator.portfolio.models['equity']['M']['model']
+    _portfolio = _simulator.portfolio.models['equity']['M']['portfolio']
+    assert _model.dates == ['2022-01-31', '2022-02-28']
+
+    # Opened the day after the first rebalance, then marked to market every day
+    _values = np.array(_portfolio.get_value_historical(), dtype=float)
+    _opened = SCHEDULE.index('2022-02-01')
+    assert len(_values) == len(SCHEDULE)
+    assert np.all(_values[:_opened + 1] == _values[0])
+    assert np.all(np.diff(_values[_opened + 1:]) != 0)
+    assert sorted(_portfolio.securities) == ['A', 'B']
@@ -0,0 +1,81 @@
+import datetime
+import multiprocessing
+import numpy as np
+import pytest
+from helpers import make_source, make_simulator
+from shared_panel import PricePanel
+from test_model import DummyModel
+
+TICKERS = ['A', 'B', 'C']
+
+
+def make_panel():
+    _source = make_source(TICKERS)
+    return PricePanel.from_frames(
+        _source.get_batch_price_time_bars(TICKERS, 'Daily', '2022-01-01', '2022-03-01'),
+        calendar=['2022-01-03', '2022-01-04']
+    )
+
+
+def read_panel(handle):
+    # Runs in a worker process
+    _panel = PricePanel.attach(handle)
+    _result = (np.nansum(_panel.get_field('close')), _panel.get_dates(), _panel.get_symbols(), _panel.get_calendar(),
+               _panel.get_field('open').flags.writeable)
+    _panel.close()
+    return _result
+
+
+def run_attached(handle):
+    # Runs in a worker process
+    _simulator = make_simulator(None, end=datetime.date(2022, 2, 1))
+    _simulator.add_model(model_name='M', model=DummyModel, security_type='equity', security_universe=TICKERS,
+                         allocation_percentage=1)
+    _simulator.attach_price_panel(handle)
+    _simulator.run()
+    _simulator.close_price_panel()
+    return list(_simulator.portfolio.pnl)
+
+
+@pytest.mark.parametrize('use_file', [False, True])
+def test_workers_read_the_published_panel(tmp_path, use_file):
+    _panel = make_panel()
+    _expected = (np.nansum(_panel.get_field('close')), _panel.get_dates(), TICKERS, ['2022-01-03', '2022-01-04'], False)
+    _handle = _panel.publish(str(tmp_path / 'panel.bin') if use_file else None)
+    try:
+        with multiprocessing.get_context('spawn').Pool(2) as pool:
+            assert pool.map(read_panel, [_handle, _handle]) == [_expected, _expected]
+        # The publisher still reads its own copy
+        assert np.nansum(_panel.get_field('close')) == _expected[0]
+    finally:
+        _panel.close()
+
+
+def test_simulator_runs_on_an_attached_panel():
+    _simulator = make_simulator(make_source(TICKERS), end=datetime.date(2022, 2, 1))
+    _simulator.add_model(model_name='M', model=DummyModel, security_type='equity', security_universe=TICKERS,
+                         allocation_percentage=1)
+    _handle = _simulator.publish_price_panel()
+    try:
+        _simulator.run()
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            assert pool.apply(run_attached, (_handle,)) == list(_simulator.portfolio.pnl)
+    finally:
+        _simulator.close_price_panel()
+
+
+def test_close_unlinks_the_published_memory():
+    _panel = make_panel()
+    _handle = _panel.publish()
+    _attached = PricePanel.attach(_handle)
+    with pytest.raises(ValueError):
+        _attached.get_field('open')[0, 0] = 1
+    _attached.close()
+    # Closing an attached panel leaves the published one alone
+    _attached = PricePanel.attach(_handle)
+    assert _attached.get_symbols() == TICKERS
+    _attached.close()
+    _panel.close()
+    assert _panel.values is None
+    with pytest.raises(FileNotFoundError):
+        PricePanel.attach(_handle)
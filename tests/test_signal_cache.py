@@ -0,0 +1,86 @@
+import datetime
+import inspect
+import warnings
+import pytest
+from helpers import make_source, make_simulator
+from model import Model
+from signal_cache import SignalCache
+
+TICKERS = ['A', 'B']
+
+
+class Indicator:
+    # Default repr, <Indicator object at 0x...>
+    pass
+
+
+class Base(Model):
+    def __init__(self):
+        Model.__init__(self)
+        self.flip = 1
+
+    def run(self):
+        return {ticker: self.flip for ticker in self.security_universe}
+
+
+class Child(Base):
+    pass
+
+
+class WithIndicator(Base):
+    def __init__(self):
+        Base.__init__(self)
+        self.indicator = Indicator()
+
+
+def make_cached_simulator(source, directory, model):
+    _simulator = make_simulator(source, end=datetime.date(2022, 2, 1))
+    _simulator.add_model(model_name='M', model=model, security_type='equity', security_universe=TICKERS,
+                         allocation_percentage=1)
+    _simulator.set_signal_cache(str(directory))
+    return _simulator
+
+
+def get_key(simulator, cache):
+    simulator.prepare_run()
+    _entry = simulator.portfolio.models['equity']['M']
+    return cache.get_key(_entry['model'], _entry['universe'], simulator.trading_schedule)
+
+
+def test_second_run_replays_the_signals(tmp_path):
+    _source = make_source(TICKERS)
+    _first = make_cached_simulator(_source, tmp_path, Child)
+    _first.run()
+    _second = make_cached_simulator(_source, tmp_path, Child)
+    _second.run()
+    assert _second.get_signal_cache().hits == 1
+    assert list(_second.portfolio.pnl) == list(_first.portfolio.pnl)
+
+
+def test_key_covers_the_base_classes(tmp_path, monkeypatch):
+    _source = make_source(TICKERS)
+    _cache = SignalCache(str(tmp_path))
+    _key = get_key(make_cached_simulator(_source, tmp_path, Child), _cache)
+    # Editing the base class changes the key of the subclass
+    _getsource = inspect.getsource
+    monkeypatch.setattr('inspect.getsource', lambda cls: _getsource(cls) + ('#' if cls is Base else ''))
+    assert get_key(make_cached_simulator(_source, tmp_path, Child), _cache) != _key
+
+
+def test_parameters_with_an_object_id_are_not_cached(tmp_path):
+    _source = make_source(TICKERS)
+    for _ in range(2):
+        _simulator = make_cached_simulator(_source, tmp_path, WithIndicator)
+        with pytest.warns(UserWarning, match='indicator'):
+            _simulator.run()
+        assert _simulator.get_signal_cache().hits == 0
+        assert _simulator.get_signal_cache().misses == 0
+    assert list(tmp_path.iterdir()) == list()
+
+
+def test_stable_parameters_are_kept(tmp_path):
+    _cache = SignalCache(str(tmp_path))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert _cache.get_unstable_parameters(Child()) == list()
+    assert _cache.get_unstable_parameters(WithIndicator()) == ['indicator']
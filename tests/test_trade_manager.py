@@ -0,0 +1,76 @@
+import datetime
+import numpy as np
+import pytest
+from helpers import make_source, make_simulator
+from model import Model
+from trade_manager import TradeManager
+
+WEIGHTS = {'A': 0.4, 'B': 0.1}
+
+
+class Weighted(Model):
+    def __init__(self):
+        Model.__init__(self)
+
+    def run(self):
+        return {ticker: {'position_type': 1, 'weight': WEIGHTS[ticker]} for ticker in self.security_universe}
+
+
+class HoldAll(Model):
+    def __init__(self):
+        Model.__init__(self)
+
+    def run(self):
+        return {ticker: 1 for ticker in self.security_universe}
+
+
+def test_signal_weights_go_through_the_order_queue():
+    _trade_manager = TradeManager()
+    _trade_manager.add_new_position_to_open('equity', 'M', 'A', {'position_type': -1, 'weight': 0.3})
+    _trade_manager.add_new_position_to_open('equity', 'M', 'B', 1)
+    _batches = list()
+    _trade_manager.open_all_positions(lambda security_type, model, positions: _batches.append(positions))
+    assert _batches == [{'A': {'position_type': -1, 'allocation_percentage': 0.3}, 'B': {'position_type': 1}}]
+    assert _trade_manager.get_orders().get_size() == 0
+
+
+def test_weighted_signals_size_the_positions():
+    _source = make_source(['A', 'B'])
+    _simulator = make_simulator(_source, end=datetime.date(2022, 1, 10))
+    _simulator.add_model(model_name='M', model=Weighted, security_type='equity', security_universe=['A', 'B'],
+                         allocation_percentage=1)
+    _simulator.run()
+    _portfolio = _simulator.portfolio.models['equity']['M']['portfolio']
+    _amounts = dict()
+    for ticker in WEIGHTS:
+        _security = _portfolio.securities[ticker]
+        assert _security.get_allocation_percentage() == WEIGHTS[ticker]
+        _amounts[ticker] = _security.get_cash_balance() + _security.get_allocated_balance()
+    assert _amounts['A'] / _amounts['B'] == pytest.approx(4, rel=1e-3)
+
+
+def test_unpriced_positions_keep_their_share_in_cash():
+    _source = make_source(['A', 'B'])
+    _simulator = make_simulator(_source, end=datetime.date(2022, 1, 10))
+    # C has no data so it never gets an open price
+    _simulator.add_model(model_name='M', model=HoldAll, security_type='equity', security_universe=['A', 'B', 'C'],
+                         allocation_percentage=1)
+    _simulator.run()
+    _portfolio = _simulator.portfolio.models['equity']['M']['portfolio']
+    assert sorted(_portfolio.securities) == ['A', 'B']
+    for ticker in ('A', 'B'):
+        assert _portfolio.securities[ticker].get_allocation_percentage() == pytest.approx(1 / 3)
+
+
+def test_execute_closes_prefetches_then_opens():
+    _trade_manager = TradeManager()
+    _trade_manager.add_new_position_to_close('equity', 'M', 'A')
+    _trade_manager.add_new_position_to_open('equity', 'M', 'B', 1)
+    _calls = list()
+    _trade_manager.execute(
+        lambda security_type, model, tickers: _calls.append(('close', tickers)),
+        lambda security_type, model, positions: _calls.append(('open', list(positions))),
+        lambda batches: _calls.append(('prefetch', [batch[2] for batch in batches]))
+    )
+    assert _calls == [('close', ['A']), ('prefetch', [['B']]), ('open', ['B'])]
+    assert _trade_manager.get_orders().get_size() == 0
@@ -0,0 +1,69 @@
+import datetime
+import numpy as np
+import pytest
+from helpers import make_source, make_simulator
+from model import Model
+from universe import DynamicUniverse
+from custom_exceptions import BadUniverseEvent
+
+SCHEDULE = ['2022-01-03', '2022-01-04', '2022-01-05', '2022-01-06', '2022-01-07', '2022-01-10']
+
+
+class HoldAll(Model):
+    def __init__(self):
+        Model.__init__(self)
+
+    def run(self):
+        return {ticker: 1 for ticker in self.security_universe}
+
+
+def test_membership_follows_the_events():
+    _universe = DynamicUniverse(['A'])
+    _universe.add('B', '2022-01-05')
+    # Weekend events take effect on the next trading day
+    _universe.remove('A', '2022-01-08')
+    _universe.add('C', '2022-01-04')
+    _universe.remove('C', '2022-01-06')
+    _universe.compile(SCHEDULE)
+
+    assert _universe.get_all_symbols() == ['A', 'B', 'C']
+    assert _universe.get_members(0) == ['A']
+    assert _universe.get_members(1) == ['A', 'C']
+    assert _universe.get_members(2) == ['A', 'B', 'C']
+    assert _universe.get_members(3) == ['A', 'B']
+    assert _universe.get_members(5) == ['B']
+    assert [_universe.has_changed(i) for i in range(6)] == [True, True, True, True, False, True]
+    assert _universe.is_member('B', 2) and not _universe.is_member('B', 1) and not _universe.is_member('D', 2)
+
+
+def test_repeated_events_and_rejoins():
+    _universe = DynamicUniverse()
+    _universe.add_events([
+        ('2022-01-04', 'add', 'A'),
+        ('2022-01-04', 'add', 'A'),
+        ('2022-01-05', 'remove', 'A'),
+        ('2022-01-07', 'add', 'A'),
+        ('2022-01-03', 'remove', 'B'),
+    ])
+    _universe.compile(SCHEDULE)
+    assert np.array_equal(_universe.membership[:, 0], [False, True, False, False, True, True])
+    assert not _universe.membership[:, 1].any()
+    with pytest.raises(BadUniverseEvent):
+        _universe.add_event('2022-01-04', 'split', 'A')
+
+
+def held_at(end, universe):
+    _simulator = make_simulator(make_source(['A', 'B']), end=end)
+    _simulator.add_model(model_name='M', model=HoldAll, security_type='equity', security_universe=universe,
+                         allocation_percentage=1)
+    _simulator.run()
+    return sorted(_simulator.portfolio.models['equity']['M']['portfolio'].securities)
+
+
+def test_simulator_opens_joins_and_closes_drops():
+    _universe = DynamicUniverse(['A'])
+    _universe.add('B', '2022-02-01')
+    _universe.remove('A', '2022-03-01')
+    assert held_at(datetime.date(2022, 1, 20), _universe) == ['A']
+    assert held_at(datetime.date(2022, 2, 15), _universe) == ['A', 'B']
+    assert held_at(datetime.date(2022, 3, 15), _universe) == ['B']
@@ -0,0 +1,79 @@
+import datetime
+import numpy as np
+import pytest
+from helpers import make_source, make_simulator
+from walk_forward import WalkForward
+from robustness import returns_from_values
+from custom_exceptions import UnknownChoice
+from test_lockstep import Threshold
+
+TICKERS = ['SPY', 'QQQ', 'GLD']
+START = datetime.date(2022, 1, 1)
+END = datetime.date(2022, 6, 1)
+
+
+def make_walk_forward(source=None, anchored=False, grid=None):
+    _walk_forward = WalkForward(Threshold, TICKERS, grid or {'look_back': [5, 20], 'flip': [1]}, source)
+    _walk_forward.set_start_date(START)
+    _walk_forward.set_end_date(END)
+    _walk_forward.set_windows(40, 20, anchored=anchored)
+    _walk_forward.set_look_back(40)
+    _walk_forward.set_processes(1)
+    _walk_forward.set_minimum_cash_percentage(0.03)
+    _walk_forward.set_maximum_single_percent_allocation(0.5)
+    return _walk_forward
+
+
+@pytest.mark.parametrize('anchored', [False, True])
+def test_fold_boundaries(anchored):
+    _walk_forward = make_walk_forward(anchored=anchored)
+    _folds = _walk_forward.build_folds()
+    _schedule = _walk_forward.trading_schedule
+    assert len(_folds) == int(np.ceil((len(_schedule) - 40) / 20))
+    for k, fold in enumerate(_folds):
+        _test_start = 40 + 20 * k
+        _train_start = 0 if anchored else _test_start - 40
+        assert fold['train'] == (_schedule[_train_start], _schedule[_test_start - 1])
+        assert fold['test'][0] == _schedule[_test_start]
+    # Test windows follow each other and the last one is cut at the end date
+    assert _folds[-1]['test'][1] == _schedule[-1]
+    for previous, fold in zip(_folds, _folds[1:]):
+        assert _schedule.index(fold['test'][0]) == _schedule.index(previous['test'][1]) + 1
+
+
+def test_select():
+    _walk_forward = make_walk_forward()
+    assert _walk_forward.select([0.5, np.nan, 1.5, 1.0]) == 2
+    assert _walk_forward.select([np.nan, np.nan]) == 0
+    _walk_forward.set_metric('volatility')
+    assert _walk_forward.select([0.3, 0.1, np.nan, 0.2]) == 1
+    with pytest.raises(UnknownChoice):
+        _walk_forward.set_metric('alpha')
+
+
+def test_out_of_sample_curve_is_stitched_from_the_test_windows():
+    _source = make_source(TICKERS)
+    _walk_forward = make_walk_forward(_source, grid=[{'look_back': 5, 'flip': 1}, {'look_back': 20, 'flip': -1}])
+    _curve = _walk_forward.run()
+    _folds = _walk_forward.get_folds()
+    _schedule = _walk_forward.trading_schedule
+    assert list(_curve.index) == _schedule[40:]
+    assert _curve.iloc[0] == 1000000
+
+    _value = 1000000
+    for fold in _folds:
+        assert fold['parameters'] == _walk_forward.parameters[_walk_forward.select(fold['train_scores'])]
+        # The winner on the test window, run on its own
+        _simulator = make_simulator(_source, datetime.date.fromisoformat(fold['test'][0]),
+                                    datetime.date.fromisoformat(fold['test'][1]))
+        _simulator.add_model(model_name='M', model=Threshold, security_type='equity', security_universe=TICKERS,
+                             allocation_percentage=1)
+        _simulator.portfolio.models['equity']['M']['model'].set_parameters(fold['parameters'])
+        _simulator.run()
+        assert np.allclose(fold['test_returns'], returns_from_values(_simulator.portfolio.pnl))
+
+        # Every window starts flat, then compounds its returns
+        _window = _curve.loc[fold['test'][0]:fold['test'][1]].values
+        assert _window[0] == pytest.approx(_value)
+        assert np.allclose(_window[1:] / _window[:-1] - 1, fold['test_returns'])
+        _value = _window[-1]